@@ -4,14 +4,15 @@ import time
 
 # --- 1. Import core functions and constants from utils.py ---
 # NOTE: This assumes utils.py is accessible in the same directory and contains
-# clear_screen, Colors, load_ascii_art, and translate_art_tags.
+# Colors, load_ascii_art, and translate_art_tags (clear_screen is in terminal.py).
 try:
-    from utils import clear_screen, Colors, load_ascii_art, translate_art_tags
+    from terminal import clear_screen
+    from utils import Colors, load_ascii_art, translate_art_tags
 except ImportError:
     # Fallback/Error handling if utils.py is not found or is missing functions
     print("ERROR: Could not import functions from utils.py.")
     print("Please ensure utils.py is in the same directory and contains:")
-    print("clear_screen, Colors, load_ascii_art, and translate_art_tags.")
+    print("Colors, load_ascii_art, and translate_art_tags.")
     sys.exit(1)
 
 
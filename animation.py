@@ -0,0 +1,162 @@
+"""
+Animation scheduler.
+
+Effects (typewriter text, phaser beams, torpedo tracks, the intro ship)
+are described as frame sequences: a list of (text, hold) pairs, where
+text is written to the screen and hold is how long, in seconds, the
+frame stays up. The Animator plays a sequence against deadlines instead
+of sleeping a fixed time per frame, so it can:
+
+  - run faster or slower with a global speed factor (speed=2 is twice as fast),
+  - run instantly (instant=True, or speed 0),
+  - skip to the end when a key is pressed,
+  - drop frames (write them without showing them) when output falls
+    behind schedule, catching up instead of running late.
+"""
+import select
+import sys
+import time
+from collections import deque
+
+
+class Animator:
+    """
+    Plays frame sequences.
+
+    Args:
+        write (callable): Writes a frame's text.
+        flush (callable): Shows everything written so far.
+        sleep (callable): Waits a number of seconds. A recorder can be
+                          passed here to defer the timing to someone else
+                          (e.g. an asyncio session, see server.py).
+        clock (callable): Time source for deadlines, or None to never drop frames.
+        speed (float): Global speed factor.
+        instant (bool): If True, sequences are written with no waits at all.
+        skip_check (callable): Returns True if the player wants to skip.
+        max_lag (float): Seconds behind schedule before frames are dropped.
+    """
+
+    def __init__(self, write, flush, sleep=time.sleep, clock=time.monotonic,
+                 speed=1.0, instant=False, skip_check=None, max_lag=0.05):
+        self._write = write
+        self._flush = flush
+        self._sleep = sleep
+        self._clock = clock
+        self.speed = speed
+        self.instant = instant
+        self.skip_check = skip_check
+        self.max_lag = max_lag
+
+        # --- Counters ---
+        self.frames_shown = 0
+        self.frames_dropped = 0
+        self.sequences_skipped = 0
+
+    def play(self, frames):
+        """
+        Plays a sequence of (text, hold) frames and leaves the last one
+        on screen. Returns when the sequence is over.
+        """
+        if self.instant or self.speed <= 0:
+            for text, _ in frames:
+                self._write(text)
+            return
+
+        clock = self._clock
+        deadline = clock() if clock else 0.0
+        skipping = False
+        for text, hold in frames:
+            self._write(text)
+            if skipping:
+                continue
+            if self.skip_check and self.skip_check():
+                skipping = True
+                self.sequences_skipped += 1
+                continue
+
+            deadline += hold / self.speed
+            if clock:
+                behind = clock() - deadline
+                if behind > self.max_lag:
+                    # Too late to show this frame; it appears with the next one
+                    self.frames_dropped += 1
+                    continue
+                wait = -behind
+            else:
+                wait = hold / self.speed
+
+            self._flush()
+            self.frames_shown += 1
+            if wait > 0:
+                self._sleep(wait)
+        self._flush()
+
+
+class LineModeInput:
+    """
+    Skip check, sleep and line reader for a terminal in its normal line
+    mode (when keyboard.py's cbreak mode is not available), where keys
+    only arrive once Enter is pressed. It has the same methods the game
+    uses on a Keyboard.
+
+    A line waiting on stdin skips the current animation. A bare Enter is
+    used up by the skip; a typed command is kept for the next prompt
+    instead of being thrown away. Waits between frames end early when a
+    line comes in, so a skip takes effect at once.
+
+    Args:
+        stream: Input stream (default sys.stdin).
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdin
+        self.typed_ahead = deque() # Lines typed during animations
+        try:
+            self._tty = self.stream.isatty()
+        except (AttributeError, ValueError):
+            self._tty = False
+
+    def _ready(self, timeout):
+        """True if a line can be read within timeout seconds (a terminal only)."""
+        if not self._tty:
+            return False
+        try:
+            ready, _, _ = select.select([self.stream], [], [], timeout)
+        except (OSError, ValueError):
+            return False
+        return bool(ready)
+
+    def key_pressed(self):
+        """The skip check: True if a line was typed."""
+        if not self._ready(0):
+            return False
+        line = self.stream.readline().rstrip("\r\n")
+        if line.strip():
+            self.typed_ahead.append(line)
+        return True
+
+    def wait(self, seconds):
+        """Waits between frames, returning early if a line comes in."""
+        if self._tty:
+            self._ready(seconds)
+        else:
+            time.sleep(seconds)
+
+    def read_line(self):
+        """
+        The oldest typed-ahead line, or else the next line from the
+        stream (input() for stdin). Raises EOFError at the end of input.
+        """
+        if self.typed_ahead:
+            return self.typed_ahead.popleft()
+        if self.stream is sys.stdin:
+            return input()
+        line = self.stream.readline()
+        if not line:
+            raise EOFError
+        return line.rstrip("\r\n")
+
+    def wait_key(self):
+        """Waits for Enter, unless a command was already typed ahead."""
+        if not self.typed_ahead:
+            self.read_line()
@@ -0,0 +1,89 @@
+"""
+Preloaded, pre-translated ASCII art.
+
+Art files are read and their [RED]-style tags translated once, on first
+use (or by preload()), instead of on every frame. Each file is checked
+for changes at most once per check_interval seconds and only re-read if
+its modification time changed.
+"""
+import os
+import time
+
+from utils import load_ascii_art, translate_art_tags, strip_art_tags
+
+
+class ArtAsset:
+    """One art file, ready to write."""
+
+    __slots__ = ("filename", "lines", "widths", "mtime", "checked_at")
+
+    def __init__(self, filename, lines, mtime, checked_at):
+        self.filename = filename
+        # Lines with tags already translated to ANSI codes
+        self.lines = [translate_art_tags(line) for line in lines]
+        # Visible (on-screen) width of each line
+        self.widths = [strip_art_tags(line)[1] for line in lines]
+        self.mtime = mtime
+        self.checked_at = checked_at
+
+    @property
+    def width(self):
+        """Widest visible line."""
+        return max(self.widths, default=0)
+
+
+class AssetRegistry:
+    """
+    Caches ArtAssets by filename.
+
+    Args:
+        check_interval (float): Minimum seconds between change checks
+                                for a file. 0 checks on every access.
+        clock (callable): Time source, for testing.
+    """
+
+    def __init__(self, check_interval=1.0, clock=time.monotonic):
+        self.check_interval = check_interval
+        self._clock = clock
+        self._assets = {}
+
+    def get(self, filename):
+        """Returns the ArtAsset for filename, loading or reloading it if needed."""
+        now = self._clock()
+        asset = self._assets.get(filename)
+        if asset is not None and now - asset.checked_at < self.check_interval:
+            return asset
+
+        try:
+            mtime = os.stat(filename).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        if asset is not None and asset.mtime == mtime:
+            asset.checked_at = now
+            return asset
+
+        # load_ascii_art returns its own error lines for missing files
+        lines = [line.rstrip('\r') for line in load_ascii_art(filename)]
+        asset = self._assets[filename] = ArtAsset(filename, lines, mtime, now)
+        return asset
+
+    def lines(self, filename):
+        """Returns the translated lines of an art file."""
+        return self.get(filename).lines
+
+    def preload(self, *filenames):
+        """Loads the given art files now rather than on first use."""
+        for filename in filenames:
+            self.get(filename)
+
+    def invalidate(self, filename=None):
+        """Drops one cached file (or all of them) so it is re-read next time."""
+        if filename is None:
+            self._assets.clear()
+        else:
+            self._assets.pop(filename, None)
+
+
+# Shared registry used by the game
+ASSETS = AssetRegistry()
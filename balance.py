@@ -0,0 +1,243 @@
+"""
+Monte Carlo balancing harness for the Difficulty presets.
+
+Plays many seeded headless games under scripted captain policies on a
+multiprocessing pool and reports, per preset and policy:
+
+  - win rate
+  - mean stardates used
+  - mean efficiency rating (wins only, same formula as the end screen)
+  - how the games ended (WIN, DESTROYED, TIME, QUIT, or STEPS when a
+    game hit the step limit). The hunter policy resigns (QUIT) when it
+    is out of energy.
+
+Seeds are split into chunks; each worker plays a chunk on one reused
+HeadlessStarTrek and sends back only the summed totals, so the work
+scales with the number of cores.
+
+    python balance.py --games 100000 --policy hunter
+    python balance.py --games 1000000 --processes 32 --json results.json
+
+A policy is a function policy(game, state, rng) -> (command, args) where
+game is the HeadlessStarTrek, state is its state() dict and rng is a
+random.Random for the policy's own choices. Register new policies in
+POLICIES, or pass any module-level function to run_balance().
+"""
+import argparse
+import json
+import multiprocessing
+import random
+import time
+from collections import Counter
+
+from engine import HeadlessStarTrek
+from utils import DIFFICULTIES, get_course_and_distance, get_distance
+
+
+# --- Policies ---
+
+def random_policy(game, state, rng):
+    """Picks a command and its answers at random."""
+    command = rng.choice(("NAV", "SRS", "LRS", "PHA", "TOR", "SHE", "DAM"))
+    if command == "NAV":
+        return command, (round(rng.uniform(1, 8.99), 2), round(rng.uniform(0.1, 2), 2))
+    if command == "PHA":
+        return command, (int(rng.uniform(0.05, 0.5) * state["energy"]),)
+    if command == "TOR":
+        return command, (round(rng.uniform(1, 8.99), 2),)
+    if command == "SHE":
+        return command, (int(rng.uniform(0, 0.5) * (state["energy"] + state["shields"])),)
+    return command, ()
+
+
+def hunter_policy(game, state, rng):
+    """
+    Hunts Klingons: keeps shields up, torpedoes the nearest Klingon (phasers
+    when out of torpedoes) and otherwise warps to the nearest quadrant that
+    still has Klingons. It reads the true galaxy map, so it never scans.
+    """
+    damage = state["damage"]
+    s1, s2 = state["sector"]
+    klingons = state["klingons"]
+
+    # Arriving in a quadrant with no shields up is fatal
+    total = state["energy"] + state["shields"]
+    if total < 50:
+        return "XXX", () # Dead in space: resign
+    if damage["SHIELD_CONTROL"] >= 0:
+        if state["shields"] < total / 4:
+            return "SHE", (int(total / 2),)
+        # ...but the ship needs energy to move and fire
+        if state["energy"] < 200 and state["shields"] > total / 2:
+            return "SHE", (int(total / 3),)
+
+    if klingons:
+        k1, k2, _ = min(klingons, key=lambda k: get_distance(s1, s2, k[0], k[1]))
+        if state["torpedoes"] > 0 and damage["PHOTON_TUBES"] >= 0:
+            course, _ = get_course_and_distance(s1, s2, k1, k2)
+            return "TOR", (round(course, 3),)
+        if damage["PHASER_CONTROL"] >= 0 and state["energy"] > 50:
+            return "PHA", (int(min(state["energy"] / 2, 200 * len(klingons))),)
+
+    # Warp toward the nearest quadrant with Klingons (or anywhere if none)
+    q1, q2 = state["quadrant"]
+    galaxy = game.galaxy
+    targets = [(r, c) for r in range(1, galaxy.rows + 1) for c in range(1, galaxy.cols + 1)
+               if (r, c) != (q1, q2) and galaxy.klingons(r, c) > 0]
+    if targets:
+        t1, t2 = min(targets, key=lambda q: get_distance(q1, q2, q[0], q[1]))
+    else:
+        t1, t2 = rng.randint(1, galaxy.rows), rng.randint(1, galaxy.cols)
+
+    # Galaxy-wide sector coordinates, aiming for the middle of the target
+    row, col = (q1 - 1) * 8 + s1, (q2 - 1) * 8 + s2
+    course, distance = get_course_and_distance(row, col, (t1 - 1) * 8 + 4.5, (t2 - 1) * 8 + 4.5)
+    if distance == 0:
+        course, distance = rng.uniform(1, 8.99), 8
+    warp = min(max(distance / 8, 0.125), game._max_warp())
+    return "NAV", (round(course, 3), round(warp, 3))
+
+
+POLICIES = {
+    "random": random_policy,
+    "hunter": hunter_policy,
+}
+
+
+# --- Playing games ---
+
+def _empty_totals():
+    return {
+        "games": 0,
+        "wins": 0,
+        "stardates": 0.0,
+        "steps": 0,
+        "rating": 0.0,
+        "endings": Counter(),
+    }
+
+
+def _merge_totals(into, totals):
+    for key in ("games", "wins", "stardates", "steps", "rating"):
+        into[key] += totals[key]
+    into["endings"].update(totals["endings"])
+
+
+def play_game(game, difficulty, policy, seed, max_steps=500):
+    """
+    Plays one game to the end with the given policy.
+    Returns (ending, stardates used, steps taken, efficiency rating).
+    """
+    rng = random.Random(seed ^ 0x5EED)
+    _, state = game.reset(difficulty, seed=seed)
+
+    steps = 0
+    while state["running"] and steps < max_steps:
+        command, args = policy(game, state, rng)
+        _, state = game.step(command, args)
+        steps += 1
+
+    ending = state["game_over_reason"] or ("WIN" if state["klingons_total"] <= 0 else "STEPS")
+    used = game.stardate - game.stardate_start
+    rating = 0.0
+    if ending == "WIN":
+        rating = 1000 * (game.klingons_start / (used or 0.1)) ** 2
+    return ending, used, steps, rating
+
+
+def _play_chunk(job):
+    """Pool worker: plays one chunk of seeds and returns its totals."""
+    difficulty, policy, first_seed, count, max_steps = job
+    if isinstance(policy, str):
+        policy = POLICIES[policy]
+    game = HeadlessStarTrek(difficulty)
+    totals = _empty_totals()
+    for seed in range(first_seed, first_seed + count):
+        ending, used, steps, rating = play_game(game, difficulty, policy, seed, max_steps)
+        totals["games"] += 1
+        totals["wins"] += ending == "WIN"
+        totals["stardates"] += used
+        totals["steps"] += steps
+        totals["rating"] += rating
+        totals["endings"][ending] += 1
+    return difficulty.name, totals
+
+
+def summarize(totals):
+    """Turns summed totals into the reported averages."""
+    games = totals["games"] or 1
+    wins = totals["wins"]
+    return {
+        "games": totals["games"],
+        "win_rate": wins / games,
+        "mean_stardates": totals["stardates"] / games,
+        "mean_steps": totals["steps"] / games,
+        "mean_rating": totals["rating"] / wins if wins else 0.0,
+        "endings": dict(totals["endings"].most_common()),
+    }
+
+
+def run_balance(games, presets=DIFFICULTIES, policy="hunter", seed=0,
+                processes=None, chunk_size=1000, max_steps=500):
+    """
+    Plays `games` games per preset and returns {preset name: summary}.
+
+    Args:
+        games (int): Games per preset.
+        presets (list): Difficulty objects to test.
+        policy (str or callable): A POLICIES name or a module-level function.
+        seed (int): First seed; game i of every preset uses seed + i, so
+                    presets are compared on the same seeds.
+        processes (int): Pool size (default: all cores). 1 runs in-process.
+        chunk_size (int): Games per pool task.
+        max_steps (int): Commands before a game is cut off.
+    """
+    jobs = [(difficulty, policy, seed + start, min(chunk_size, games - start), max_steps)
+            for difficulty in presets
+            for start in range(0, games, chunk_size)]
+
+    totals = {difficulty.name: _empty_totals() for difficulty in presets}
+    if processes == 1:
+        results = map(_play_chunk, jobs)
+        for name, chunk in results:
+            _merge_totals(totals[name], chunk)
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            for name, chunk in pool.imap_unordered(_play_chunk, jobs):
+                _merge_totals(totals[name], chunk)
+
+    return {name: summarize(t) for name, t in totals.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play many games per difficulty preset and report the results.")
+    parser.add_argument("--games", type=int, default=10000, help="games per preset")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="hunter")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--max-steps", type=int, default=500)
+    parser.add_argument("--json", metavar="FILE", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = run_balance(args.games, policy=args.policy, seed=args.seed,
+                          processes=args.processes, chunk_size=args.chunk_size,
+                          max_steps=args.max_steps)
+    elapsed = time.perf_counter() - start
+
+    total_games = sum(r["games"] for r in results.values())
+    print(f"{total_games} games ({args.policy} policy) in {elapsed:.1f}s "
+          f"= {total_games / elapsed:.0f} games/s")
+    for name, r in results.items():
+        endings = ", ".join(f"{k} {v / r['games']:.1%}" for k, v in r["endings"].items())
+        print(f"  {name:<12} win {r['win_rate']:6.1%}  stardates {r['mean_stardates']:6.2f}  "
+              f"rating {r['mean_rating']:8.1f}  steps {r['mean_steps']:6.1f}  [{endings}]")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"policy": args.policy, "seed": args.seed, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
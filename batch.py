@@ -0,0 +1,272 @@
+"""
+Batch command scripts: play scripted games at full speed.
+
+A script is what a player would type, one line per prompt: commands and
+the answers to their follow-up prompts. Each game runs on a
+HeadlessStarTrek (see engine.py), so nothing is drawn and nothing
+sleeps, and its transcript streams to stdout as it plays:
+
+    python batch.py games.sst
+    python batch.py games.sst --json > transcripts.jsonl
+    python batch.py games.sst --repeat 1000 --quiet     # load test
+    printf 'GAME seed=7\\nSRS\\nNAV\\n1\\n0.5\\n' | python batch.py -
+
+Script format:
+
+    # Comments and blank lines are skipped
+    GAME seed=42 difficulty=2 galaxy=8x8   starts a game; all options optional
+    NAV                                    a command...
+    1                                      ...its course...
+    0.5                                    ...and warp factor
+    PHA
+    300
+
+    GAME options:
+      seed=N          the game's seed (default: random)
+      difficulty=N    1-3 as on the difficulty menu (default 2)
+      galaxy=RxC      galaxy size in quadrants (default 8x8)
+      classic=1       fill the whole galaxy up front (see --classic-galaxy;
+                      at most 256x256)
+
+Lines before the first GAME line play a game with the defaults. Lines
+after a game has ended are skipped. Each game plays as soon as the next
+GAME line (or the end of the script) is read, so a piped script's games
+play while later ones are still being written.
+
+Each game's transcript has its opening messages, every line with the
+messages it produced, and the final state with its digest (the one
+replay.py checks). --json gives the same as one JSON object per line.
+"""
+import argparse
+import json
+import sys
+import time
+import traceback
+
+from engine import HeadlessStarTrek
+from galaxy_store import check_filled_size, galaxy_size
+from replay import state_digest
+from utils import DIFFICULTIES
+
+
+class ScriptError(ValueError):
+    """A script line that cannot be understood."""
+
+
+class ScriptGame:
+    """The options and input lines of one scripted game."""
+
+    __slots__ = ("seed", "difficulty", "galaxy_size", "procedural", "lines")
+
+    def __init__(self):
+        self.seed = None
+        self.difficulty = 2
+        self.galaxy_size = (8, 8)
+        self.procedural = True
+        self.lines = []
+
+    def set_option(self, text):
+        """Applies one NAME=VALUE option from a GAME line."""
+        name, sep, value = text.partition("=")
+        name = name.lower()
+        try:
+            if not sep:
+                raise ValueError
+            if name == "seed":
+                self.seed = int(value)
+            elif name == "difficulty":
+                self.difficulty = int(value)
+                if not 1 <= self.difficulty <= len(DIFFICULTIES):
+                    raise ValueError
+            elif name == "galaxy":
+                self.galaxy_size = galaxy_size(value)
+            elif name == "classic":
+                self.procedural = value.lower() in ("0", "no", "false")
+            else:
+                raise ScriptError(f"unknown GAME option {name!r}")
+        except ScriptError:
+            raise
+        except (ValueError, argparse.ArgumentTypeError):
+            raise ScriptError(f"bad GAME option {text!r}") from None
+
+
+def read_script(lines):
+    """
+    Yields a ScriptGame for each game in an iterable of script lines, as
+    soon as its last line has been read. Raises ScriptError for a bad
+    GAME line.
+    """
+    game = None
+    for line_no, line in enumerate(lines, 1):
+        line = line.rstrip("\r\n")
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        words = stripped.split()
+        if words[0].upper() == "GAME":
+            if game:
+                yield game
+            game = ScriptGame()
+            for option in words[1:]:
+                try:
+                    game.set_option(option)
+                except ScriptError as e:
+                    raise ScriptError(f"line {line_no}: {e}") from None
+            if not game.procedural:
+                try:
+                    check_filled_size(*game.galaxy_size)
+                except ValueError as e:
+                    raise ScriptError(f"line {line_no}: {e}") from None
+            continue
+        if game is None:
+            game = ScriptGame()
+        game.lines.append(line)
+    if game:
+        yield game
+
+
+# --- Playing ---
+
+class Transcript:
+    """
+    Writes game transcripts to a text stream.
+
+    Args:
+        out: The stream (default sys.stdout).
+        as_json (bool): One JSON object per line instead of text.
+        quiet (bool): Only each game's final state.
+    """
+
+    def __init__(self, out=None, as_json=False, quiet=False):
+        self.out = out or sys.stdout
+        self.as_json = as_json
+        self.quiet = quiet
+
+    def start(self, number, game, script, events):
+        if self.quiet:
+            return
+        if self.as_json:
+            self._json({"game": number, "seed": game.rng.seed, "difficulty": script.difficulty,
+                        "galaxy": script.galaxy_size, "events": events})
+        else:
+            self.out.write(f"=== game {number}: seed {game.rng.seed}, {game.difficulty.name}, "
+                           "galaxy {}x{}\n".format(*script.galaxy_size))
+            self._events(events)
+
+    def line(self, number, line, events):
+        if self.quiet:
+            return
+        if self.as_json:
+            self._json({"game": number, "input": line, "events": events})
+        else:
+            self.out.write(f"> {line}\n")
+            self._events(events)
+
+    def finish(self, number, game, skipped, error=None):
+        state = game.state()
+        digest = state_digest(game)
+        if self.as_json:
+            self._json({"game": number, "final": state, "digest": digest,
+                        "skipped_lines": skipped, "error": error})
+        else:
+            if error:
+                self.out.write(error)
+            result = state["game_over_reason"] or "RUNNING"
+            self.out.write(f"=== game {number}: {result} at stardate {state['stardate']:.1f}, "
+                           f"{state['klingons_total']} Klingons left, energy {state['energy']}, "
+                           f"digest {digest}"
+                           + (f", {skipped} lines after the end skipped" if skipped else "")
+                           + (", ERROR" if error else "") + "\n")
+        # Flushed per game, so whoever reads the pipe sees each one as it ends
+        self.out.flush()
+
+    def _events(self, events):
+        for event in events:
+            self.out.write(f"  {event}\n")
+
+    def _json(self, record):
+        self.out.write(json.dumps(record) + "\n")
+
+
+def play(script, number, transcript, seed=None, games=None):
+    """
+    Plays one ScriptGame and writes its transcript. The seed, if given,
+    overrides the script's. Returns (game, ok) where ok is False if the
+    game raised an error (reported in the transcript).
+
+    games is an optional dict of HeadlessStarTrek objects by galaxy
+    options, reused from game to game (reset() starts each one afresh).
+    """
+    key = (script.galaxy_size, script.procedural)
+    game = games.get(key) if games is not None else None
+    if game is None:
+        game = HeadlessStarTrek(galaxy_size=script.galaxy_size, procedural_galaxy=script.procedural)
+        if games is not None:
+            games[key] = game
+    events, _ = game.reset(DIFFICULTIES[script.difficulty - 1],
+                           seed=script.seed if seed is None else seed)
+    transcript.start(number, game, script, events)
+    skipped = 0
+    try:
+        for i, line in enumerate(script.lines):
+            if not game.is_running:
+                skipped = len(script.lines) - i
+                break
+            events, _ = game.feed(line)
+            transcript.line(number, line, events)
+    except Exception:
+        transcript.finish(number, game, skipped, error=traceback.format_exc())
+        # Not reused: the error may have left it half way through a command
+        if games is not None:
+            games.pop(key, None)
+        return game, False
+    transcript.finish(number, game, skipped)
+    return game, True
+
+
+def run(lines, transcript, repeat=1):
+    """
+    Plays every game of a script, each repeat times (a game with a seed
+    gets seed, seed+1, ... so the repeats differ). Returns (games, errors).
+    """
+    played = errors = 0
+    games = {}
+    for script in read_script(lines):
+        for i in range(repeat):
+            played += 1
+            seed = script.seed + i if script.seed is not None else None
+            _, ok = play(script, played, transcript, seed, games)
+            errors += not ok
+    return played, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play scripted Super Star Trek games at full speed.")
+    parser.add_argument("script", help="command script to play, or - for stdin")
+    parser.add_argument("--json", action="store_true", help="write transcripts as JSON lines")
+    parser.add_argument("--quiet", action="store_true", help="only write each game's final state")
+    parser.add_argument("--repeat", type=int, default=1, metavar="N",
+                        help="play each scripted game N times (default 1)")
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    transcript = Transcript(as_json=args.json, quiet=args.quiet)
+    start = time.perf_counter()
+    try:
+        if args.script == "-":
+            games, errors = run(sys.stdin, transcript, args.repeat)
+        else:
+            with open(args.script) as f:
+                games, errors = run(f, transcript, args.repeat)
+    except (OSError, ScriptError) as e:
+        print(f"batch.py: {e}", file=sys.stderr)
+        return 2
+    elapsed = time.perf_counter() - start
+    print(f"{games} games in {elapsed:.2f}s ({games / max(elapsed, 1e-9):.0f} games/s), "
+          f"{errors} with errors", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,400 @@
+"""
+Benchmark suite for the hot paths of a turn.
+
+Times game setup, quadrant entry, NAV, TOR and PHA, the message box and
+a full UI redraw on a game whose terminal is stubbed out: output goes to
+a byte-counting sink and animation holds are not slept. Every operation
+starts from a snapshot of a fixed-seed game (see snapshot.py), so runs
+do the same work and can be compared.
+
+For each benchmark it reports:
+
+  - ops/sec and p50/p99 latency, each operation ending in one flushed frame
+  - bytes emitted per frame
+  - bytes allocated per operation (tracemalloc peak, in a separate pass
+    so tracing does not skew the timings)
+
+    python benchmark.py
+    python benchmark.py --ops 5000 --json results.json
+    python benchmark.py --compare baseline.json --tolerance 0.2
+    python benchmark.py startup startup_full    # time to first prompt only
+
+The startup benchmarks run main.py in a child process and answer its
+setup prompts the moment they appear. They report the time to import
+the game, to the first output (first frame), to the difficulty prompt
+(first prompt) and to the first COMMAND? prompt, with --fast-start
+("startup") and without it ("startup_full", which sits through the
+intro and typewriter briefing, so it only runs when named).
+
+--compare exits with status 1 if any metric is worse than the baseline
+by more than the tolerance (a fraction, default 0.15; p99 gets twice
+that, being the noisiest).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import selectors
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from animation import Animator
+from game import SuperStarTrek
+from snapshot import pack, unpack
+from terminal import TerminalWriter
+from utils import STANDARD, get_course_and_distance
+
+# Per metric: whether larger is better, and how many tolerances it may
+# drift before --compare calls it a regression (tail latency is noisy)
+METRICS = {
+    "ops_per_sec": (True, 1),
+    "p50_us": (False, 1),
+    "p99_us": (False, 2),
+    "bytes_per_frame": (False, 1),
+    "alloc_bytes": (False, 1),
+    # Startup, a process spawn each, so noisier
+    "import_ms": (False, 2),
+    "first_frame_ms": (False, 2),
+    "first_prompt_ms": (False, 2),
+    "command_prompt_ms": (False, 2),
+}
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Prompts main.py shows on the way to the first command, the mark each
+# one sets and the answer given to it
+_STARTUP_SCRIPT = (
+    (b"ENTER CHOICE", "first_prompt_ms", b"2\n"),
+    (b"PRESS Y TO ACCEPT", None, b"Y\n"),
+    (b"COMMAND?", "command_prompt_ms", None),
+)
+
+
+class _NullStream:
+    """A text stream that throws its output away."""
+    encoding = "utf-8"
+
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+class BenchGame(SuperStarTrek):
+    """A SuperStarTrek with a stubbed terminal: nothing is shown or slept."""
+
+    def __init__(self):
+        super().__init__(out=TerminalWriter(_NullStream()))
+        # Every frame is written, none dropped, and holds are only added up
+        self.slept = 0.0
+        self.animator = Animator(self._write, self._flush, sleep=self._sleep, clock=None)
+
+    def _sleep(self, seconds):
+        self.slept += seconds
+
+    def _pause(self, prompt="Press Enter to continue..."):
+        self._write(prompt)
+
+    def _clear_screen(self):
+        self._write("\033[H\033[2J")
+
+    def _read_line(self, prompt):
+        raise RuntimeError("a benchmark game has no keyboard")
+
+    def new_game(self, seed):
+        """Starts a fixed-seed game in its first quadrant."""
+        self.reset_state(seed)
+        self.setup_game()
+        self.apply_difficulty(STANDARD)
+        self.enter_quadrant()
+        self.message_queue.clear()
+
+
+def _starting_states(game, seed, count):
+    """Snapshots of the first `count` games from `seed` that start next to Klingons."""
+    states = []
+    while len(states) < count:
+        game.new_game(seed)
+        if game.live_klingons:
+            states.append(pack(game))
+        seed += 1
+    return states
+
+
+# --- Benchmarks ---
+# Each one prepares the game for operation i (untimed) and returns the
+# operation to time.
+
+def bench_setup(game, states, i, rng):
+    seed = rng.getrandbits(32)
+
+    def op():
+        game.reset_state(seed)
+        game.setup_game()
+        game.apply_difficulty(STANDARD)
+    return op
+
+
+def bench_enter_quadrant(game, states, i, rng):
+    unpack(states[i % len(states)], game)
+    game.q1 = rng.randint(1, game.galaxy.rows)
+    game.q2 = rng.randint(1, game.galaxy.cols)
+    return game.enter_quadrant
+
+
+def bench_nav(game, states, i, rng):
+    unpack(states[i % len(states)], game)
+    course = round(rng.uniform(1, 8.99), 2)
+    warp = rng.choice((0.2, 0.5, 1.0, 3.0))
+    return lambda: game.execute_nav_move(course, warp)
+
+
+def bench_tor(game, states, i, rng):
+    unpack(states[i % len(states)], game)
+    k = game.live_klingons[0]
+    course, _ = get_course_and_distance(game.s1, game.s2, k.s1, k.s2)
+    return lambda: game.execute_tor_fire(course)
+
+
+def bench_pha(game, states, i, rng):
+    unpack(states[i % len(states)], game)
+    return lambda: game.execute_pha_fire(400)
+
+
+def bench_message_queue(game, states, i, rng):
+    unpack(states[i % len(states)], game)
+    game.lrs_command()
+    game._queue_damage_report()
+    game.queue_message("   LT. SULU: 'STANDING BY.'", delay=0.02)
+    return game._process_message_queue
+
+
+def bench_full_ui(game, states, i, rng):
+    unpack(states[i % len(states)], game)
+    game._srs_map_cache = None
+    return game._draw_full_ui
+
+
+BENCHMARKS = {
+    "setup_game": bench_setup,
+    "enter_quadrant": bench_enter_quadrant,
+    "execute_nav_move": bench_nav,
+    "execute_tor_fire": bench_tor,
+    "execute_pha_fire": bench_pha,
+    "process_message_queue": bench_message_queue,
+    "draw_full_ui": bench_full_ui,
+}
+
+
+# --- Startup ---
+
+def _startup_once(fast, timeout):
+    """Runs main.py once and returns {mark: milliseconds since spawn}."""
+    args = [sys.executable, "main.py"] + (["--fast-start"] if fast else [])
+    start = time.perf_counter()
+    proc = subprocess.Popen(args, cwd=_HERE, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL)
+    marks = {}
+    seen = b""
+    script = list(_STARTUP_SCRIPT)
+    deadline = start + timeout
+    try:
+        with selectors.DefaultSelector() as selector:
+            selector.register(proc.stdout, selectors.EVENT_READ)
+            while script and selector.select(deadline - time.perf_counter()):
+                data = os.read(proc.stdout.fileno(), 65536)
+                now = (time.perf_counter() - start) * 1000
+                if not data:
+                    break
+                marks.setdefault("first_frame_ms", now)
+                seen += data
+                while script and script[0][0] in seen:
+                    text, mark, answer = script.pop(0)
+                    seen = seen[seen.index(text) + len(text):]
+                    if mark:
+                        marks[mark] = now
+                    if answer:
+                        proc.stdin.write(answer)
+                        proc.stdin.flush()
+    finally:
+        proc.kill()
+        proc.wait()
+    if script:
+        raise RuntimeError(f"main.py never showed {script[0][0].decode()!r}")
+    return marks
+
+
+def _import_ms():
+    """Milliseconds a fresh interpreter takes to import main.py's modules."""
+    code = ("import time; start = time.perf_counter(); import main; "
+            "print((time.perf_counter() - start) * 1000)")
+    return float(subprocess.check_output([sys.executable, "-c", code], cwd=_HERE))
+
+
+def run_startup(fast=True, runs=3, timeout=120):
+    """
+    Times main.py from spawn to its first command prompt. Returns the
+    median of each mark over the runs (see _STARTUP_SCRIPT).
+    """
+    samples = [dict(_startup_once(fast, timeout), import_ms=_import_ms()) for _ in range(runs)]
+    return {mark: round(statistics.median(s[mark] for s in samples), 1)
+            for mark in ("import_ms", "first_frame_ms", "first_prompt_ms", "command_prompt_ms")}
+
+
+STARTUP_BENCHMARKS = {"startup": True, "startup_full": False} # name: fast start
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def run_benchmark(name, ops=1000, warmup=100, alloc_ops=200, seed=0, states=None, game=None):
+    """
+    Runs one benchmark and returns its metrics as a dict (see METRICS).
+    The same seed always does the same operations.
+    """
+    game = game or BenchGame()
+    states = states or _starting_states(game, seed, 16)
+    prepare = BENCHMARKS[name]
+    out = game.out
+
+    for i in range(warmup):
+        prepare(game, states, i, random.Random(f"{seed}:{name}:{i}"))()
+        game._flush()
+
+    times = []
+    frame_bytes = 0
+    for i in range(ops):
+        op = prepare(game, states, i, random.Random(f"{seed}:{name}:{i}"))
+        start_bytes = out.bytes_written
+        start = time.perf_counter_ns()
+        op()
+        game._flush()
+        times.append(time.perf_counter_ns() - start)
+        frame_bytes += out.bytes_written - start_bytes
+
+    # Tracing only runs around the operation itself, so its peak is
+    # what the operation allocated
+    alloc = 0
+    for i in range(alloc_ops):
+        op = prepare(game, states, i, random.Random(f"{seed}:{name}:{i}"))
+        tracemalloc.start()
+        try:
+            op()
+            game._flush()
+            alloc += tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    times.sort()
+    return {
+        "ops_per_sec": round(ops / (sum(times) / 1e9), 1),
+        "p50_us": round(_percentile(times, 0.50) / 1e3, 2),
+        "p99_us": round(_percentile(times, 0.99) / 1e3, 2),
+        "bytes_per_frame": round(frame_bytes / ops, 1),
+        "alloc_bytes": round(alloc / alloc_ops, 1) if alloc_ops else 0,
+    }
+
+
+def run_suite(names=None, ops=1000, warmup=100, alloc_ops=200, seed=0, runs=3):
+    """
+    Runs the named benchmarks (default: all but startup_full) and returns
+    {name: metrics}.
+    """
+    names = names or list(BENCHMARKS) + ["startup"]
+    game = BenchGame()
+    states = _starting_states(game, seed, 16)
+    results = {}
+    for name in names:
+        if name in STARTUP_BENCHMARKS:
+            results[name] = run_startup(STARTUP_BENCHMARKS[name], runs)
+        else:
+            results[name] = run_benchmark(name, ops, warmup, alloc_ops, seed, states, game)
+    return results
+
+
+def compare(results, baseline, tolerance=0.15):
+    """
+    Compares results with baseline results ({name: metrics} each).
+    Returns a list of (name, metric, baseline value, new value) for every
+    metric that got worse by more than the tolerance.
+    """
+    regressions = []
+    for name, metrics in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric, (higher_is_better, tolerances) in METRICS.items():
+            old, new = base.get(metric), metrics.get(metric)
+            if old is None or new is None:
+                continue
+            allowed = tolerance * tolerances
+            if higher_is_better:
+                worse = new < old * (1 - allowed)
+            else:
+                worse = new > old * (1 + allowed)
+            if worse:
+                regressions.append((name, metric, old, new))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the hot paths of a turn.")
+    parser.add_argument("benchmarks", nargs="*", metavar="BENCHMARK",
+                        help=f"which to run (default all but startup_full): "
+                             f"{', '.join(list(BENCHMARKS) + list(STARTUP_BENCHMARKS))}")
+    parser.add_argument("--ops", type=int, default=1000, help="timed operations per benchmark")
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--alloc-ops", type=int, default=200, help="operations traced for allocations")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--runs", type=int, default=3, help="startup runs (the median is kept)")
+    parser.add_argument("--json", metavar="FILE", help="also write the results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="allowed fraction worse than the baseline (default 0.15)")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.benchmarks
+               if name not in BENCHMARKS and name not in STARTUP_BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark: {', '.join(unknown)}")
+
+    results = run_suite(args.benchmarks, ops=args.ops, warmup=args.warmup,
+                        alloc_ops=args.alloc_ops, seed=args.seed, runs=args.runs)
+
+    operations = {name: r for name, r in results.items() if name in BENCHMARKS}
+    if operations:
+        print(f"{'benchmark':<22} {'ops/s':>10} {'p50 us':>9} {'p99 us':>9} "
+              f"{'bytes/frame':>12} {'alloc B/op':>11}")
+        for name, r in operations.items():
+            print(f"{name:<22} {r['ops_per_sec']:>10.0f} {r['p50_us']:>9.1f} {r['p99_us']:>9.1f} "
+                  f"{r['bytes_per_frame']:>12.0f} {r['alloc_bytes']:>11.0f}")
+    startups = {name: r for name, r in results.items() if name in STARTUP_BENCHMARKS}
+    if startups:
+        print(f"{'startup':<22} {'import ms':>10} {'1st frame':>10} {'1st prompt':>11} {'COMMAND?':>10}")
+        for name, r in startups.items():
+            print(f"{name:<22} {r['import_ms']:>10.1f} {r['first_frame_ms']:>10.1f} "
+                  f"{r['first_prompt_ms']:>11.1f} {r['command_prompt_ms']:>10.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"python": platform.python_version(), "seed": args.seed, "ops": args.ops,
+                       "results": results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for name, metric, old, new in regressions:
+            print(f"REGRESSION {name} {metric}: {old} -> {new}")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Precomputed sector paths for NAV and TOR.
+
+A course is a float from 1 to 8.99. The game interpolates between the
+eight compass vectors (lines 530-600 of the BASIC code) and steps a
+sector at a time, rounding each point to the nearest sector. The
+sectors a move or a torpedo passes through depend only on the start
+sector and the course (and for NAV the distance), so they are worked
+out once and looked up:
+
+    for r, c in torpedo_ray(s1, s2, course):            # sectors after the start
+        ...
+    for r, c, stop_r, stop_c in nav_path(s1, s2, course, distance):
+        ...
+
+Both follow the game's original stepping exactly, float for float:
+
+  - A torpedo adds the course vector to its position each step and
+    rounds that. Its ray ends with the first sector outside the
+    quadrant (the exit point), or after MAX_RAY sectors.
+  - The Enterprise steps from the sector it last reached: step i lands
+    on that sector plus i times the vector (so steps compound), and
+    steps that fall outside the quadrant are passed over. Each step also
+    carries the sector the ship stops in if that step is blocked, which
+    is worked out the same way from i - 1.
+
+Courses are cached exactly as typed; each distinct course costs one
+entry. Sectors are addressed 1-8 like the rest of the game.
+"""
+
+import functools
+
+# This maps Course (1-8) to a (dRow, dCol) vector
+# Based on lines 530, 540, and 600 of the BASIC code
+COURSE_VECTORS = {
+     1: (0, 1),   # Right
+     2: (-1, 1),  # Up-Right
+     3: (-1, 0),  # Up
+     4: (-1, -1), # Up-Left
+     5: (0, -1),  # Left
+     6: (1, -1),  # Down-Left
+     7: (1, 0),   # Down
+     8: (1, 1)    # Down-Right
+}
+
+MAX_RAY = 15 # Sectors a torpedo can travel
+QUADRANT_SIZE = 8
+
+
+@functools.lru_cache(maxsize=4096)
+def course_vector(course):
+    """The (dRow, dCol) vector of a course from 1 to 8.99."""
+    # Get the integer part of the course for vector lookup, and the
+    # fractional part for interpolation (line 3110)
+    course_int = int(course)
+    course_frac = course - course_int
+    vec1 = COURSE_VECTORS[course_int]
+    vec2 = COURSE_VECTORS[course_int + 1] if course_int < 8 else COURSE_VECTORS[1]
+    return (vec1[0] + (vec2[0] - vec1[0]) * course_frac,
+            vec1[1] + (vec2[1] - vec1[1]) * course_frac)
+
+
+def _in_quadrant(r, c):
+    return 1 <= r <= QUADRANT_SIZE and 1 <= c <= QUADRANT_SIZE
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def torpedo_ray(s1, s2, course):
+    """
+    The sectors a torpedo fired from sector s1,s2 on course passes
+    through, in order, ending with its exit point from the quadrant.
+
+    Returns:
+        tuple: (row, col) pairs; only the last one can be off the map.
+    """
+    d_row, d_col = course_vector(course)
+    track_row, track_col = float(s1), float(s2)
+    ray = []
+    for _ in range(MAX_RAY):
+        track_row += d_row
+        track_col += d_col
+        r, c = int(track_row + 0.5), int(track_col + 0.5)
+        ray.append((r, c))
+        if not _in_quadrant(r, c):
+            break
+    return tuple(ray)
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def nav_path(s1, s2, course, distance):
+    """
+    The steps of a NAV move of distance sectors from s1,s2 that stays in
+    the quadrant.
+
+    Returns:
+        tuple: (row, col, stop_row, stop_col) per step: the sector the
+               step reaches, and where the ship stops if that sector is
+               blocked.
+    """
+    d_row, d_col = course_vector(course)
+    row, col = s1, s2
+    path = []
+    for i in range(1, distance + 1):
+        new_row = int(row + i * d_row + 0.5)
+        new_col = int(col + i * d_col + 0.5)
+        if not _in_quadrant(new_row, new_col):
+            continue
+        path.append((new_row, new_col,
+                     int(row + (i - 1) * d_row + 0.5), int(col + (i - 1) * d_col + 0.5)))
+        row, col = new_row, new_col
+    return tuple(path)
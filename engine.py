@@ -0,0 +1,160 @@
+"""
+Headless step engine for SuperStarTrek.
+
+Runs the same game rules as game.py with no terminal attached: nothing is
+drawn, nothing sleeps, no ANSI codes are produced and every prompt is
+answered from the arguments passed to step().
+
+    game = HeadlessStarTrek(STANDARD)
+    events, state = game.step("NAV", [1, 0.5])
+    events, state = game.step("PHA", [300])
+    events, state = game.feed("SHE")     # or one typed line at a time
+"""
+from game import SuperStarTrek
+from utils import STANDARD, strip_ansi
+
+
+class HeadlessStarTrek(SuperStarTrek):
+    """
+    A SuperStarTrek game driven by step(command, args) instead of a keyboard.
+    """
+
+    def __init__(self, difficulty=STANDARD, seed=None, galaxy=None, galaxy_size=(8, 8),
+                 procedural_galaxy=True):
+        super().__init__(galaxy_size=galaxy_size, procedural_galaxy=procedural_galaxy)
+        self._events = []
+        self.reset(difficulty, galaxy, seed)
+
+    def reset(self, difficulty=STANDARD, galaxy=None, seed=None):
+        """
+        Starts a new game with the given Difficulty preset, following the
+        same order as run(): setup, difficulty, then the first quadrant.
+        A pre-generated galaxy (see galaxy_batch.py) skips the random fill.
+        The same seed (and commands) always gives the same game.
+        Returns (events, state) like step().
+        """
+        self.reset_state(seed)
+        self._events = []
+        self.setup_game(galaxy)
+        self.apply_difficulty(difficulty)
+        self.enter_quadrant()
+        return self._events_and_state()
+
+    def step(self, command, args=()):
+        """
+        Runs one command to completion and returns (events, state).
+
+        Args:
+            command (str): A main prompt command, e.g. "NAV" or "PHA".
+            args (iterable): Answers for the follow-up prompts, in order
+                             (e.g. course then warp for NAV). If the command
+                             asks for more answers than given, it is aborted.
+
+        Returns:
+            tuple: (events, state) where events is a list of plain-text
+                   messages produced this step and state is a dict (see state()).
+        """
+        if not self.is_running:
+            return self._events_and_state()
+
+        self.submit(str(command))
+        for arg in args:
+            if not self.input_handler:
+                break
+            self.submit(str(arg))
+
+        # Drop any prompt the caller did not answer
+        if self.input_handler:
+            self.input_handler = None
+            self.input_prompt = ""
+            self.input_render = None
+            self.command_data = {}
+
+        self._end_turn()
+        return self._events_and_state()
+
+    def feed(self, line):
+        """
+        Submits one line as if typed at the terminal: a command at the main
+        prompt, or the answer to the prompt the last command left pending.
+        The Klingons get their turn once a command has all its answers.
+
+        Returns:
+            tuple: (events, state) like step().
+        """
+        if not self.is_running:
+            return self._events_and_state()
+
+        self.submit(str(line))
+        if not self.input_handler:
+            self._end_turn()
+        return self._events_and_state()
+
+    def _end_turn(self):
+        """The rest of a turn after its command has run."""
+        self._check_end_conditions()
+        self.pause_after_messages = False
+
+        # Same order as the terminal loop: docking is checked before the
+        # Klingons get their turn.
+        if self.is_running:
+            self._update_condition()
+            if self.hostile_action_taken:
+                self.klingons_fire_back()
+            self.hostile_action_taken = False
+        if not self.is_running:
+            self.replay_log.finish(self)
+
+    def _drain_message_queue(self):
+        """Moves queued messages into the event list as plain text."""
+        for msg_args in self.message_queue:
+            self._events.append(strip_ansi(msg_args["text"]))
+        self.message_queue.clear()
+
+    def _events_and_state(self):
+        """Collects this step's events and the current state."""
+        self._drain_message_queue()
+        events = self._events
+        self._events = []
+        return events, self.state()
+
+    # --- Terminal I/O hooks: no terminal here ---
+
+    def _write(self, text):
+        pass
+
+    def _flush(self):
+        pass
+
+    def _sleep(self, seconds):
+        pass
+
+    def _animate(self, frames):
+        pass
+
+    def _pause(self, prompt="Press Enter to continue..."):
+        pass
+
+    def _clear_screen(self):
+        pass
+
+    def _read_line(self, prompt):
+        raise RuntimeError("a headless game has no keyboard; pass answers to step()")
+
+    def typewriter_print(self, text="", delay=0.05, color=None, newline=True):
+        """Records directly printed text (e.g. Klingon hit reports) as events."""
+        self._drain_message_queue() # Keep events in the order they happened
+        text = strip_ansi(text).strip("\n")
+        if text:
+            self._events.append(text)
+
+    # --- Drawing: nothing to draw ---
+
+    def _draw_current_srs_map(self):
+        pass
+
+    def _draw_attack_art(self):
+        pass
+
+    def _move_to_map_sector(self, r, c):
+        pass
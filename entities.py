@@ -0,0 +1,43 @@
+"""
+The objects in a quadrant: Klingons, stars and starbases.
+
+Small fixed-field records with __slots__, so each one is a compact
+object without a per-instance __dict__. Coordinates are sectors 1-8
+like the rest of the game.
+"""
+
+
+class Klingon:
+    """A Klingon ship. It is destroyed when its shields reach 0."""
+
+    __slots__ = ("s1", "s2", "shields")
+
+    def __init__(self, s1, s2, shields):
+        self.s1 = s1
+        self.s2 = s2
+        self.shields = shields
+
+    def __repr__(self):
+        return f"Klingon({self.s1}, {self.s2}, {self.shields!r})"
+
+
+class Star:
+    __slots__ = ("s1", "s2")
+
+    def __init__(self, s1, s2):
+        self.s1 = s1
+        self.s2 = s2
+
+    def __repr__(self):
+        return f"Star({self.s1}, {self.s2})"
+
+
+class Starbase:
+    __slots__ = ("s1", "s2")
+
+    def __init__(self, s1, s2):
+        self.s1 = s1
+        self.s2 = s2
+
+    def __repr__(self):
+        return f"Starbase({self.s1}, {self.s2})"
@@ -0,0 +1,443 @@
+"""
+Compact, sparse storage for the galaxy map.
+
+Replaces the 9x9 lists of k*100+b*10+s ints (G) and known flags (Z).
+Each quadrant is one byte:
+
+    bits 5-7  Klingons  (0-7)
+    bit  4    Starbase  (0-1)
+    bits 0-3  Stars     (0-15)
+
+and the known map is a bitset, one bit per quadrant. Quadrants are
+addressed 1-rows, 1-cols like the rest of the game (8x8 by default).
+
+The galaxy is split into CHUNK x CHUNK blocks of quadrants. A block's
+bytes are only allocated once something non-empty is stored in it, so
+a 4096x4096 galaxy costs memory for the area that is populated or
+visited, not for all 16 million quadrants.
+
+ProceduralGalaxy goes further: quadrants are generated from a hash of
+the galaxy seed when they are looked at, and only changes are stored.
+"""
+
+import hashlib
+import random
+import struct
+
+_STAR_MASK = 0x0F
+_BASE_SHIFT = 4
+_BASE_MASK = 0x10
+_KLINGON_SHIFT = 5
+_KLINGON_MASK = 0xE0
+
+MAX_KLINGONS = 7
+MAX_STARBASES = 1
+MAX_STARS = 15
+
+# Quadrants per side of a storage block
+CHUNK = 16
+_CHUNK_CELLS = CHUNK * CHUNK
+_ROW_BYTES = CHUNK // 8 # Known bits for one row of a block
+
+# Largest supported galaxy side, in quadrants
+MAX_GALAXY_SIZE = 4096
+
+# Most quadrants a galaxy filled up front may have. Filling it and
+# to_bytes() visit every quadrant, which takes seconds past about this.
+MAX_FILLED_QUADRANTS = 256 * 256
+
+# Most recently looked-at cells a ProceduralGalaxy remembers
+_RECENT_CACHE_SIZE = 1 << 16
+
+# Rough bytes per entry of a small dict keyed by quadrant (see memory_estimate)
+_DICT_ENTRY_BYTES = 112
+
+_QUADRANT = struct.Struct("<HH")
+_OVERLAY_ENTRY = struct.Struct("<HHB")
+
+
+def galaxy_size(text):
+    """
+    Parses a galaxy size like "64x64" (or "64") into (rows, cols).
+    Used as an argparse type by main.py and server.py.
+    """
+    import argparse # Only the command-line tools need it
+    try:
+        parts = [int(p) for p in text.lower().split("x")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid galaxy size: {text!r}")
+    if len(parts) == 1:
+        parts *= 2
+    if len(parts) != 2 or not all(1 <= p <= MAX_GALAXY_SIZE for p in parts):
+        raise argparse.ArgumentTypeError(
+            f"galaxy size must be ROWSxCOLS, each 1-{MAX_GALAXY_SIZE}: {text!r}")
+    return tuple(parts)
+
+
+def check_filled_size(rows, cols):
+    """Raises ValueError if a rows x cols galaxy is too big to fill up front."""
+    if rows * cols > MAX_FILLED_QUADRANTS:
+        raise ValueError(f"a {rows}x{cols} galaxy is too big to fill up front "
+                         f"(at most {MAX_FILLED_QUADRANTS} quadrants, e.g. 256x256)")
+
+
+class GalaxyStore:
+    """Bit-packed quadrant counts and known-quadrant bits, stored in sparse blocks."""
+
+    __slots__ = ("rows", "cols", "_cells", "_known")
+
+    # Quadrant contents are re-randomized on every visit (see ProceduralGalaxy)
+    procedural = False
+
+    def __init__(self, rows=8, cols=8):
+        if not (1 <= rows <= MAX_GALAXY_SIZE and 1 <= cols <= MAX_GALAXY_SIZE):
+            raise ValueError(f"galaxy size {rows}x{cols} is not between 1x1 and "
+                             f"{MAX_GALAXY_SIZE}x{MAX_GALAXY_SIZE}")
+        self.rows = rows
+        self.cols = cols
+        # (block row, block col) -> bytearray of the block's cells / known bits
+        self._cells = {}
+        self._known = {}
+
+    def contains(self, q1, q2):
+        """True if q1,q2 is a quadrant of this galaxy."""
+        return 1 <= q1 <= self.rows and 1 <= q2 <= self.cols
+
+    def _locate(self, q1, q2):
+        """Returns (block key, index in block) for quadrant q1,q2."""
+        if not (1 <= q1 <= self.rows and 1 <= q2 <= self.cols):
+            raise IndexError(f"quadrant {q1},{q2} is outside the galaxy")
+        r, c = q1 - 1, q2 - 1
+        return (r // CHUNK, c // CHUNK), (r % CHUNK) * CHUNK + (c % CHUNK)
+
+    def _cell(self, q1, q2):
+        key, i = self._locate(q1, q2)
+        block = self._cells.get(key)
+        return block[i] if block is not None else 0
+
+    def blocks_in_use(self):
+        """Number of allocated storage blocks (a rough memory measure)."""
+        return len(self._cells.keys() | self._known.keys())
+
+    def memory_estimate(self):
+        """Rough bytes held by the stored blocks."""
+        return (len(self._cells) * (_CHUNK_CELLS + _DICT_ENTRY_BYTES)
+                + len(self._known) * (CHUNK * _ROW_BYTES + _DICT_ENTRY_BYTES))
+
+    # --- Counts ---
+
+    def klingons(self, q1, q2):
+        """Number of Klingons in quadrant q1,q2."""
+        return self._cell(q1, q2) >> _KLINGON_SHIFT
+
+    def starbases(self, q1, q2):
+        """Number of Starbases (0 or 1) in quadrant q1,q2."""
+        return (self._cell(q1, q2) & _BASE_MASK) >> _BASE_SHIFT
+
+    def stars(self, q1, q2):
+        """Number of Stars in quadrant q1,q2."""
+        return self._cell(q1, q2) & _STAR_MASK
+
+    def counts(self, q1, q2):
+        """Returns (klingons, starbases, stars) for quadrant q1,q2."""
+        cell = self._cell(q1, q2)
+        return (cell >> _KLINGON_SHIFT,
+                (cell & _BASE_MASK) >> _BASE_SHIFT,
+                cell & _STAR_MASK)
+
+    def set_counts(self, q1, q2, klingons, starbases, stars):
+        """Stores all three counts for quadrant q1,q2."""
+        if not (0 <= klingons <= MAX_KLINGONS and 0 <= starbases <= MAX_STARBASES
+                and 0 <= stars <= MAX_STARS):
+            raise ValueError(f"counts {klingons},{starbases},{stars} do not fit a quadrant")
+        self._store(q1, q2, (klingons << _KLINGON_SHIFT) | (starbases << _BASE_SHIFT) | stars)
+
+    def _store(self, q1, q2, cell):
+        key, i = self._locate(q1, q2)
+        block = self._cells.get(key)
+        if block is None:
+            if not cell:
+                return # Empty space needs no storage
+            block = self._cells[key] = bytearray(_CHUNK_CELLS)
+        block[i] = cell
+
+    def set_klingons(self, q1, q2, klingons):
+        """Updates the Klingon count for quadrant q1,q2."""
+        _, starbases, stars = self.counts(q1, q2)
+        self.set_counts(q1, q2, klingons, starbases, stars)
+
+    def set_starbases(self, q1, q2, starbases):
+        """Updates the Starbase count for quadrant q1,q2."""
+        klingons, _, stars = self.counts(q1, q2)
+        self.set_counts(q1, q2, klingons, starbases, stars)
+
+    # --- The classic 3-digit format ---
+
+    def display_value(self, q1, q2):
+        """Returns the k*100+b*10+s value shown by LRS and the galactic record."""
+        klingons, starbases, stars = self.counts(q1, q2)
+        return klingons * 100 + starbases * 10 + stars
+
+    def set_display_value(self, q1, q2, value):
+        """Stores a quadrant from its k*100+b*10+s value."""
+        self.set_counts(q1, q2, value // 100, (value % 100) // 10, value % 10)
+
+    # --- Known map ---
+
+    def is_known(self, q1, q2):
+        """True if quadrant q1,q2 has been visited or scanned."""
+        key, i = self._locate(q1, q2)
+        bits = self._known.get(key)
+        return bits is not None and bool(bits[i >> 3] & (1 << (i & 7)))
+
+    def mark_known(self, q1, q2):
+        """Records quadrant q1,q2 as visited or scanned."""
+        key, i = self._locate(q1, q2)
+        bits = self._known.get(key)
+        if bits is None:
+            bits = self._known[key] = bytearray(_CHUNK_CELLS // 8)
+        bits[i >> 3] |= 1 << (i & 7)
+
+    # --- Destroyed Klingons ---
+
+    def destroyed(self, q1, q2):
+        """Bitmask of the quadrant's Klingons that were destroyed (bit i = Klingon i)."""
+        return 0
+
+    def mark_destroyed(self, q1, q2, index):
+        """
+        Records that Klingon `index` of quadrant q1,q2 was destroyed. Only a
+        procedural galaxy needs this, to leave it out when the quadrant is
+        generated again.
+        """
+
+    # --- Windows ---
+
+    def window(self, q1, q2, size=8):
+        """
+        Returns (first row, first col, rows, cols) of a view of at most
+        size x size quadrants around q1,q2, kept inside the galaxy.
+        A galaxy no bigger than the view is shown whole.
+        """
+        rows, cols = min(size, self.rows), min(size, self.cols)
+        top = min(max(q1 - rows // 2, 1), self.rows - rows + 1)
+        left = min(max(q2 - cols // 2, 1), self.cols - cols + 1)
+        return top, left, rows, cols
+
+    # --- Raw access (for snapshots and batch loading) ---
+
+    def to_bytes(self):
+        """
+        Returns every quadrant's packed cell in reading order, followed by
+        the known bitset (one bit per quadrant, in the same order). The
+        size grows with the whole galaxy, so this is meant for small ones.
+        """
+        return self._dense_cells() + self._dense_known()
+
+    def load_bytes(self, data):
+        """Restores the store from to_bytes() output."""
+        n = self.rows * self.cols
+        if len(data) != n + (n + 7) // 8:
+            raise ValueError("galaxy data does not match this galaxy's size")
+        self._load_cells(data[:n])
+        self._load_known(data[n:])
+
+    def fingerprint(self):
+        """Bytes that identify the galaxy's whole state (for state digests)."""
+        return self.to_bytes()
+
+    def _dense_cells(self):
+        cells = bytearray(self.rows * self.cols)
+        for (br, bc), block in self._cells.items():
+            width = min(CHUNK, self.cols - bc * CHUNK)
+            for r in range(min(CHUNK, self.rows - br * CHUNK)):
+                start = (br * CHUNK + r) * self.cols + bc * CHUNK
+                cells[start:start + width] = block[r * CHUNK:r * CHUNK + width]
+        return bytes(cells)
+
+    def _dense_known(self):
+        known = 0 # The dense bitset as one int, bit j = quadrant j
+        for (br, bc), bits in self._known.items():
+            width = min(CHUNK, self.cols - bc * CHUNK)
+            mask = (1 << width) - 1
+            for r in range(min(CHUNK, self.rows - br * CHUNK)):
+                row_bits = int.from_bytes(bits[r * _ROW_BYTES:(r + 1) * _ROW_BYTES], "little") & mask
+                if row_bits:
+                    known |= row_bits << ((br * CHUNK + r) * self.cols + bc * CHUNK)
+        return known.to_bytes((self.rows * self.cols + 7) // 8, "little")
+
+    def _load_cells(self, data):
+        self._cells = {}
+        for row in range(self.rows):
+            br, r = divmod(row, CHUNK)
+            for bc in range((self.cols + CHUNK - 1) // CHUNK):
+                width = min(CHUNK, self.cols - bc * CHUNK)
+                start = row * self.cols + bc * CHUNK
+                cells = data[start:start + width]
+                if any(cells):
+                    block = self._cells.get((br, bc))
+                    if block is None:
+                        block = self._cells[(br, bc)] = bytearray(_CHUNK_CELLS)
+                    block[r * CHUNK:r * CHUNK + width] = cells
+
+    def _load_known(self, data):
+        self._known = {}
+        known = int.from_bytes(data, "little")
+        for row in range(self.rows):
+            br, r = divmod(row, CHUNK)
+            for bc in range((self.cols + CHUNK - 1) // CHUNK):
+                width = min(CHUNK, self.cols - bc * CHUNK)
+                row_bits = (known >> (row * self.cols + bc * CHUNK)) & ((1 << width) - 1)
+                if row_bits:
+                    bits = self._known.get((br, bc))
+                    if bits is None:
+                        bits = self._known[(br, bc)] = bytearray(_CHUNK_CELLS // 8)
+                    bits[r * _ROW_BYTES:(r + 1) * _ROW_BYTES] = row_bits.to_bytes(_ROW_BYTES, "little")
+
+
+class ProceduralGalaxy(GalaxyStore):
+    """
+    A galaxy whose quadrants are worked out on demand instead of stored.
+
+    A quadrant's counts come from a hash of (galaxy seed, q1, q2), with
+    the same odds as SuperStarTrek._randomize_galaxy: 1-8 stars, and a 20%
+    chance of 1-3 Klingons. Sector positions come from layout_rng(), so a
+    quadrant looks the same every time it is entered.
+
+    Only changes are stored: counts that differ from the generated ones
+    (destroyed Klingons, lost or placed starbases) in one overlay dict,
+    and which Klingons were destroyed in another. Memory and generation
+    time grow with the quadrants visited, not with the galaxy's size.
+    """
+
+    __slots__ = ("seed", "_key", "_overlay", "_destroyed", "_recent")
+
+    procedural = True
+
+    def __init__(self, rows=8, cols=8, seed=0):
+        super().__init__(rows, cols)
+        self.seed = seed
+        self._key = hashlib.sha256(f"{seed}:galaxy".encode()).digest()[:16]
+        # (q1, q2) -> packed cell, only where it differs from the generated one
+        self._overlay = {}
+        # (q1, q2) -> bitmask of destroyed Klingons
+        self._destroyed = {}
+        # Cells looked at recently, so rescanning an area skips the hashing
+        self._recent = {}
+
+    def generated_cell(self, q1, q2):
+        """The packed counts quadrant q1,q2 starts with."""
+        h = int.from_bytes(hashlib.blake2b(_QUADRANT.pack(q1, q2), digest_size=8,
+                                           key=self._key).digest(), "little")
+        stars = (h & 7) + 1 # 1-8
+        klingons = 0
+        if ((h >> 8) & 0xFFFFFF) / 0x1000000 > 0.8:
+            klingons = (h >> 32) % 3 + 1 # 1-3
+        return (klingons << _KLINGON_SHIFT) | stars
+
+    def layout_rng(self, q1, q2):
+        """A random.Random that always lays out quadrant q1,q2 the same way."""
+        return random.Random(f"{self.seed}:quadrant:{q1},{q2}")
+
+    def _cell(self, q1, q2):
+        cell = self._recent.get((q1, q2))
+        if cell is None:
+            if not (1 <= q1 <= self.rows and 1 <= q2 <= self.cols):
+                raise IndexError(f"quadrant {q1},{q2} is outside the galaxy")
+            cell = self._overlay.get((q1, q2))
+            if cell is None:
+                cell = self.generated_cell(q1, q2)
+            if len(self._recent) >= _RECENT_CACHE_SIZE:
+                self._recent.clear()
+            self._recent[(q1, q2)] = cell
+        return cell
+
+    def _store(self, q1, q2, cell):
+        self._locate(q1, q2) # Bounds check
+        if cell == self.generated_cell(q1, q2):
+            self._overlay.pop((q1, q2), None)
+        else:
+            self._overlay[(q1, q2)] = cell
+        self._recent[(q1, q2)] = cell
+
+    def overlay_size(self):
+        """Number of quadrants whose counts changed from the generated ones."""
+        return len(self._overlay)
+
+    def memory_estimate(self):
+        entries = len(self._overlay) + len(self._destroyed) + len(self._recent)
+        return super().memory_estimate() + entries * _DICT_ENTRY_BYTES
+
+    def destroyed(self, q1, q2):
+        return self._destroyed.get((q1, q2), 0)
+
+    def mark_destroyed(self, q1, q2, index):
+        self._locate(q1, q2)
+        self._destroyed[(q1, q2)] = self._destroyed.get((q1, q2), 0) | (1 << index)
+
+    def delta_bytes(self):
+        """
+        Returns the stored changes in reading order: overlay cells (0 where
+        the generated counts stand), a bitset of which cells are overlaid,
+        each quadrant's destroyed-Klingon mask, then the known bitset.
+        Like to_bytes() it is sized for the whole galaxy, but it needs no
+        quadrant to be generated.
+        """
+        n = self.rows * self.cols
+        cells = bytearray(n)
+        destroyed = bytearray(n)
+        overlaid = 0
+        for (q1, q2), cell in self._overlay.items():
+            j = (q1 - 1) * self.cols + (q2 - 1)
+            cells[j] = cell
+            overlaid |= 1 << j
+        for (q1, q2), mask in self._destroyed.items():
+            destroyed[(q1 - 1) * self.cols + (q2 - 1)] = mask
+        return (bytes(cells) + overlaid.to_bytes((n + 7) // 8, "little")
+                + bytes(destroyed) + self._dense_known())
+
+    def load_delta_bytes(self, data):
+        """Restores the galaxy from delta_bytes() output."""
+        n = self.rows * self.cols
+        bits = (n + 7) // 8
+        if len(data) != 2 * n + 2 * bits:
+            raise ValueError("galaxy data does not match this galaxy's size")
+        self._recent = {}
+        overlaid = int.from_bytes(data[n:n + bits], "little")
+        cols = self.cols
+        self._overlay = {}
+        j = 0
+        while overlaid:
+            if overlaid & 1:
+                self._overlay[(j // cols + 1, j % cols + 1)] = data[j]
+            overlaid >>= 1
+            j += 1
+        destroyed = data[n + bits:2 * n + bits]
+        self._destroyed = {}
+        if any(destroyed):
+            self._destroyed = {(j // cols + 1, j % cols + 1): mask
+                               for j, mask in enumerate(destroyed) if mask}
+        self._load_known(data[2 * n + bits:])
+
+    def fingerprint(self):
+        # Only what was stored: the generated quadrants follow from the seed
+        parts = [f"{self.seed}:{self.rows}x{self.cols}".encode()]
+        for (q1, q2), cell in sorted(self._overlay.items()):
+            parts.append(_OVERLAY_ENTRY.pack(q1, q2, cell))
+        parts.append(b"/")
+        for (q1, q2), mask in sorted(self._destroyed.items()):
+            parts.append(_OVERLAY_ENTRY.pack(q1, q2, mask))
+        parts.append(b"/")
+        for key, bits in sorted(self._known.items()):
+            parts.append(_QUADRANT.pack(*key) + bytes(bits))
+        return b"".join(parts)
+
+    def _dense_cells(self):
+        return bytes(self._cell(r, c) for r in range(1, self.rows + 1)
+                     for c in range(1, self.cols + 1))
+
+    def _load_cells(self, data):
+        self._overlay = {}
+        self._recent = {}
+        for j, cell in enumerate(data):
+            self._store(j // self.cols + 1, j % self.cols + 1, cell)
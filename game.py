@@ -1,44 +1,136 @@
-import random
 #import math
-import time
 #import os
 import sys
-import textwrap
 
 # --- Import all our helpers and colors ---
-from utils import (clear_screen, get_quadrant_name, Colors, load_ascii_art,
-                   get_visible_length,translate_art_tags,
+from animation import Animator, LineModeInput
+from entities import Klingon, Star, Starbase
+from assets import ASSETS
+from course_rays import COURSE_VECTORS, course_vector, nav_path, torpedo_ray
+from galaxy_store import GalaxyStore, ProceduralGalaxy, check_filled_size
+from replay import ReplayLog
+from sector_grid import SectorGrid, EMPTY, ENTERPRISE, KLINGON, STARBASE, STAR
+from terminal import (TerminalWriter, CLEAR_SCREEN, layout_sequences, move, move_clear,
+                      move_clear_down)
+from utils import (get_quadrant_name, Colors,
+                   wrap_ansi,
                    get_course_and_distance,get_distance,
-                   get_device_name,Difficulty, DIFFICULTIES, EASY, STANDARD, HARD)
+                   get_device_name,Difficulty, DIFFICULTIES, EASY, STANDARD, HARD,
+                   GameRandom)
+
+
+def _reflect(x, last):
+    """
+    Folds a global sector row or column back into 0..last, bouncing off
+    either edge as many times as it takes.
+    """
+    if last <= 0:
+        return 0
+    x = abs(x) % (2 * last)
+    return 2 * last - x if x > last else x
+
+
 class SuperStarTrek:
     """
     A Python implementation of the Super Star Trek BASIC game.
     """
-    # This maps Course (1-8) to a (dRow, dCol) vector
-        # Based on lines 530, 540, and 600 of the BASIC code
-    COURSE_VECTORS = {
-         1: (0, 1),   # Right
-         2: (-1, 1),  # Up-Right
-         3: (-1, 0),  # Up
-         4: (-1, -1), # Up-Left
-         5: (0, -1),  # Left
-         6: (1, -1),  # Down-Left
-         7: (1, 0),   # Down
-         8: (1, 1)    # Down-Right
+    # Course (1-8) to (dRow, dCol); see course_rays.py
+    COURSE_VECTORS = COURSE_VECTORS
+
+    # Colored text for each condition returned by _update_condition
+    CONDITION_COLORS = {
+        "DOCKED": f"{Colors.CYAN}DOCKED{Colors.RESET}",
+        "*RED*": f"{Colors.RED}*RED*{Colors.RESET}",
+        "YELLOW": f"{Colors.YELLOW}YELLOW{Colors.RESET}",
+        "GREEN": f"{Colors.GREEN}GREEN{Colors.RESET}",
     }
 
-    def __init__(self):
-        
-
+    # How each sector grid code is drawn on the SRS map
+    SECTOR_GLYPHS = {
+        EMPTY: "   ",
+        ENTERPRISE: f"{Colors.CYAN}<E>{Colors.RESET}",
+        KLINGON: f"{Colors.RED}+K+{Colors.RESET}",
+        STARBASE: f"{Colors.GREEN}>B<{Colors.RESET}",
+        STAR: f"{Colors.YELLOW} * {Colors.RESET}",
+    }
 
+    def __init__(self, screen=None, out=None, animation_speed=1.0, replay_path=None,
+                 galaxy_size=(8, 8), procedural_galaxy=True, fast_start=False,
+                 keyboard=None):
+        """
+        Args:
+            screen (ScreenBuffer, optional): If given, all output is drawn
+                into this buffer and only the changes are sent on flush.
+            out (TerminalWriter, optional): Buffered output to the terminal.
+                Defaults to one on sys.stdout.
+            animation_speed (float, optional): Speed factor for the
+                typewriter, phaser, torpedo and intro effects. 0 = instant.
+            replay_path (str, optional): If given, each finished game's
+                replay log (see replay.py) is appended to this file.
+            galaxy_size (tuple, optional): (rows, cols) of quadrants, up to
+                4096x4096. A galaxy filled up front (procedural_galaxy=False)
+                may have at most MAX_FILLED_QUADRANTS (e.g. 256x256). Each
+                quadrant is always 8x8 sectors.
+            procedural_galaxy (bool, optional): Generate quadrants from the
+                seed when they are first needed, and keep their layout
+                between visits (see ProceduralGalaxy). False fills the
+                whole galaxy up front and re-randomizes every visit.
+            fast_start (bool, optional): Get to the first command quickly:
+                the intro is cut to its last frame and queued messages (the
+                briefing, NOW ENTERING...) appear at once instead of being
+                typed.
+            keyboard (Keyboard, optional): Read keys from this (see
+                keyboard.py) instead of stdin in line mode: any key skips
+                an animation, and lines typed during one are queued for
+                the next prompt. Without one a LineModeInput (see
+                animation.py) reads whole lines.
+        """
+        self.replay_path = replay_path
+        if not procedural_galaxy:
+            check_filled_size(*galaxy_size)
+        self.galaxy_size = tuple(galaxy_size)
+        self.procedural_galaxy = procedural_galaxy
+        self.fast_start = fast_start
+        self.screen = screen
+        self._attach_terminal(out, keyboard, animation_speed)
+        self.reset_state()
+
+    def _attach_terminal(self, out, keyboard, animation_speed):
+        """
+        Sets up what the terminal hooks below use: the output writer, the
+        keyboard and the animator. A game with no local terminal (see
+        server.py) overrides this.
+        """
+        self.out = out or TerminalWriter()
+        # Without a cbreak-mode keyboard, lines are read in line mode
+        self.keyboard = keyboard or LineModeInput()
+        # Plays timed effects; a key (in line mode, Enter) skips the
+        # current one
+        self.animator = Animator(self._write, self._flush, sleep=self._sleep,
+                                 speed=animation_speed, skip_check=self.keyboard.key_pressed)
+
+    def reset_state(self, seed=None):
         """
         Initialize the game state.
         This translates the DIM and variable setup from lines 260-1100.
+
+        Args:
+            seed (int, optional): Seed for this game's random numbers.
+                A random seed is picked if not given.
         """
-        # Note: We use 9x9 arrays (indexed 1-8) to match the BASIC code's
+        # This game's own random number streams, and the log to replay it
+        self.rng = GameRandom(seed)
+        self.replay_log = ReplayLog(self.rng.seed)
+
+        # Note: The galaxy is indexed from 1 to match the BASIC code's
         # 1-based indexing. This makes translation much easier.
-        self.galaxy = [[0 for _ in range(9)] for _ in range(9)] # G(8,8)
-        self.galaxy_known = [[False for _ in range(9)] for _ in range(9)] # Z(8,8)
+        # It holds both G(8,8) (counts) and Z(8,8) (known quadrants).
+        # A procedural galaxy works quadrants out from the seed on demand
+        if self.procedural_galaxy:
+            self.galaxy = ProceduralGalaxy(*self.galaxy_size, seed=self.rng.seed)
+        else:
+            self.galaxy = GalaxyStore(*self.galaxy_size)
+        self.replay_log.set_galaxy_options(self.galaxy_size, self.procedural_galaxy)
         
         # Quadrant (q1, q2) and Sector (s1, s2) coordinates
         self.q1 = 0
@@ -63,8 +155,12 @@ class SuperStarTrek:
         
         # Tracks Klingons/Bases/Stars in the *current* quadrant
         self.quadrant_klingons = [] # Replaces K(3,3)
+        self.live_klingons = [] # The quadrant's Klingons that are still alive
         self.quadrant_starbase = None # Replaces B4, B5
         self.quadrant_stars = []
+        # What is in each sector of the current quadrant, for O(1) lookups
+        self.sectors = SectorGrid()
+        self._srs_map_cache = None
         
         # Damage array (translates D(8))
         self.damage = {
@@ -90,9 +186,16 @@ class SuperStarTrek:
         self.msg_box_top = 12       # Top row of the message area
         self.msg_box_bottom = 29   # Last row for messages
         self.cmd_box_top = 31      # Row for the "COMMAND?" prompt
+        # The cursor moves and clears for that layout, built once
+        self.layout = layout_sequences(self.msg_box_col, self.msg_box_width, self.msg_box_top,
+                                       self.msg_box_bottom, self.cmd_box_top)
         # This will hold a *function* to call for input,
         # instead of the main "COMMAND?" prompt.
         self.input_handler = None
+        # The prompt shown for input_handler, and an optional function that
+        # draws anything the prompt needs (e.g. the difficulty menu).
+        self.input_prompt = ""
+        self.input_render = None
         # This will store temporary data between input steps
         self.command_data = {}
         self.pause_after_messages = False
@@ -120,9 +223,15 @@ class SuperStarTrek:
         
         # --- ADD: A pause so the user can see the help ---
      
-    def setup_game(self):
+    def setup_game(self, galaxy=None):
         """
         Populates the galaxy. This translates lines 820-1200.
+
+        Args:
+            galaxy (optional): A pre-generated grid of packed k*100+b*10+s
+                               counts the size of the galaxy (indexed from 0),
+                               e.g. one entry of galaxy_batch.packed_counts().
+                               If given, the galaxy is not randomized here.
         """
      
         self.queue_message_instant("Setting up the galaxy...",color=Colors.BOLD)
@@ -131,59 +240,75 @@ class SuperStarTrek:
         self.starbases_total = 0 # B9
         self.time_remaining = 30 # T9
         self.stardate = 2000     # T0
+        self.stardate_start = self.stardate # Where the efficiency rating counts from
         self.stardate_end = self.stardate + self.time_remaining
         #self.klingons_start = self.klingons_total  # Set starting K count
         self.game_over_reason = ""
         self.is_running = True
         
         # --- Place Klingons, Starbases, and Stars (Simplified Setup) ---
+        if galaxy is not None:
+            self.replay_log.set_galaxy(galaxy)
+            for r in range(1, self.galaxy.rows + 1):
+                for c in range(1, self.galaxy.cols + 1):
+                    self.galaxy.set_display_value(r, c, int(galaxy[r - 1][c - 1]))
+        else:
+            self._randomize_galaxy()
+
+        # Place the Enterprise (lines 490)
+        self.q1 = self.rng.setup.randint(1, self.galaxy.rows)
+        self.q2 = self.rng.setup.randint(1, self.galaxy.cols)
+        self.s1 = self.rng.setup.randint(1, 8)
+        self.s2 = self.rng.setup.randint(1, 8)
         
-        # 1. Distribute Starbases (B9 total) across the 64 quadrants
+    def _randomize_galaxy(self):
+        """
+        Fills the galaxy with random Klingons, Starbases and Stars.
+        (galaxy_batch.py generates many galaxies at once with the same odds
+        for stars and Klingons.)
+        """
+        # 1. Distribute Starbases (B9 total) across all the quadrants
         remaining_starbases = self.starbases_total
         
-        for r in range(1, 9):
-            for c in range(1, 9):
-                k = 0
-                b = 0
-                s = random.randint(1, 8) # Stars
-
-                # --- 2. Place Klingons (still randomized within the total) ---
-                if random.random() > 0.8:
-                    # Place 1-3 Klingons
-                    k = random.randint(1, 3) 
+        # A procedural galaxy generates Klingons and Stars itself when a
+        # quadrant is looked at; only its Starbases are placed here
+        if not self.galaxy.procedural:
+            for r in range(1, self.galaxy.rows + 1):
+                for c in range(1, self.galaxy.cols + 1):
+                    k = 0
+                    b = 0
+                    s = self.rng.setup.randint(1, 8) # Stars
+
+                    # --- 2. Place Klingons (still randomized within the total) ---
+                    if self.rng.setup.random() > 0.8:
+                        # Place 1-3 Klingons
+                        k = self.rng.setup.randint(1, 3) 
                     
-                # --- 3. Place Starbases (Bases are now placed exactly 'B9' times) ---
-                # Check if we still have bases to place AND randomize placement
-                if remaining_starbases > 0 and random.random() > 0.95: 
-                    b = 1
-                    remaining_starbases -= 1
+                    # --- 3. Place Starbases (Bases are now placed exactly 'B9' times) ---
+                    # Check if we still have bases to place AND randomize placement
+                    if remaining_starbases > 0 and self.rng.setup.random() > 0.95: 
+                        b = 1
+                        remaining_starbases -= 1
                 
-                self.galaxy[r][c] = k * 100 + b * 10 + s
-        
+                    self.galaxy.set_counts(r, c, k, b, s)
+
         # If we didn't place all bases randomly, force the placement of the remainder
         while remaining_starbases > 0:
-            r = random.randint(1, 8)
-            c = random.randint(1, 8)
+            r = self.rng.setup.randint(1, self.galaxy.rows)
+            c = self.rng.setup.randint(1, self.galaxy.cols)
             # Check if this quadrant already has a base
-            if (self.galaxy[r][c] % 100) // 10 == 0:
-                # Add a base (10 is the base multiplier)
-                self.galaxy[r][c] += 10 
+            if self.galaxy.starbases(r, c) == 0:
+                # Add a base
+                self.galaxy.set_starbases(r, c, 1)
                 remaining_starbases -= 1
 
-
-        # Place the Enterprise (lines 490)
-        self.q1 = random.randint(1, 8)
-        self.q2 = random.randint(1, 8)
-        self.s1 = random.randint(1, 8)
-        self.s2 = random.randint(1, 8)
-        
     def show_intro_animation(self):
         """
         Recreates the introductory animation using ANSI escape codes,
         just like the original BASIC file for a flicker-free animation.
         """
-        # Load the art from the file instead of a hardcoded list
-        enterprise_art = load_ascii_art("enterprise.txt")
+        # Art from the asset cache (tags already translated)
+        enterprise_art = ASSETS.lines("enterprise.txt")
         
         # --- ANSI Escape Codes ---
         # '\033' is the Python equivalent of CHR$(27)
@@ -198,25 +323,25 @@ class SuperStarTrek:
         CURSOR_SHIP = "\033[7;1H"
 
         # 1. Clear the screen and self.queue_message_instant the title ONCE
-        # We use end="" to prevent Python from adding extra newlines
-        print(CLEAR_SCREEN, end="")
-        print(CURSOR_TITLE, end="")
-        print(f"{Colors.BOLD}{Colors.BLUE}THE USS ENTERPRISE --- NCC-1701{Colors.RESET}") # (from line 211)
-
-        # 2. The animation loop (from line 222)
-        for yy in range(1, 41, 2):
+        # We write without newlines so the cursor stays where we put it
+        self._write(CLEAR_SCREEN)
+        self._write(CURSOR_TITLE)
+        self._write(f"{Colors.BOLD}{Colors.BLUE}THE USS ENTERPRISE --- NCC-1701{Colors.RESET}\n") # (from line 211)
+
+        # 2. The animation frames (from line 222)
+        frames = []
+        clear_line = "\033[K"
+        # A fast start shows only where the ship ends up
+        for yy in range(39 if self.fast_start else 1, 41, 2):
             # ... (print CURSOR_SHIP) ...
-            print(CURSOR_SHIP, end="")
-            for line in enterprise_art:
-                clear_line = "\033[K"
-                # --- FIX: Translate tags before printing ---
-                translated_line = translate_art_tags(line)
-                print(" " * yy + translated_line + clear_line)
-            
-            time.sleep(0.05)
-
-        # 3. Clear the screen at the end before the game starts
-        time.sleep(1)
+            frame = CURSOR_SHIP + ''.join(" " * yy + line + clear_line + "\n"
+                                          for line in enterprise_art)
+            frames.append((frame, 0.05))
+
+        # 3. Hold the last frame before the game starts
+        if not self.fast_start:
+            frames.append(("", 1))
+        self._animate(frames)
     
    
         
@@ -226,16 +351,12 @@ class SuperStarTrek:
         """
         # --- FIX: Clear the *message box* (Rows 12-29) ---
         message_row = self.msg_box_top
-        for r in range(self.msg_box_top, self.msg_box_bottom + 1):
-            print(f"\033[{r};{self.msg_box_col}H\033[K", end="")
-        print(f"\033[{message_row};{self.msg_box_col}H", end="") # Move cursor to top of box
+        self._write(self.layout.msg_clear) # Ends at the top of the box
         
-        art_lines = load_ascii_art(filename)
-        for line in art_lines:
-            translated_line = translate_art_tags(line)
+        for line in ASSETS.lines(filename):
             # Move to the correct row and column
-            print(f"\033[{message_row};{self.msg_box_col}H", end="")
-            self.typewriter_print(translated_line, delay=0, color=color, newline=False)
+            self._write(move(message_row, self.msg_box_col))
+            self.typewriter_print(line, delay=0, color=color, newline=False)
             message_row += 1
     
     def show_mission_briefing(self):
@@ -258,7 +379,7 @@ class SuperStarTrek:
         """
         Displays the instructions by loading and parsing 'instructions.txt'.
         """
-        clear_screen()
+        self._clear_screen()
         
         try:
             with open("instructions.txt", 'r') as f:
@@ -268,34 +389,34 @@ class SuperStarTrek:
                     
                     if cleaned_line == "[PAUSE]":
                         # This was an input() line
-                        print() # Add a space
-                        input("[ENTER] TO CONTINUE")
-                        clear_screen()
+                        self._write("\n") # Add a space
+                        self._pause("[ENTER] TO CONTINUE")
+                        self._clear_screen()
                     else:
                         # Just print the line of text
-                        print(cleaned_line)
+                        self._write(cleaned_line + "\n")
                         
         except FileNotFoundError:
             # Handle error if file is missing
-            print("ERROR: instructions.txt file not found.")
-            print("Please make sure it's in the same directory as main.py.")
-            input("[ENTER] TO CONTINUE")
+            self._write("ERROR: instructions.txt file not found.\n")
+            self._write("Please make sure it's in the same directory as main.py.\n")
+            self._pause("[ENTER] TO CONTINUE")
         except Exception as e:
-            print(f"ERROR: Could not read instructions file: {e}")
-            input("[ENTER] TO CONTINUE")
+            self._write(f"ERROR: Could not read instructions file: {e}\n")
+            self._pause("[ENTER] TO CONTINUE")
         
         # When done, clear screen and return to the main Y/N/I prompt
-        clear_screen() 
+        self._clear_screen() 
         
  
-    def handle_difficulty_select(self):
-        """Displays the difficulty menu and sets the handler for input."""
+    def show_difficulty_menu(self):
+        """Displays the difficulty menu (the render step for handle_difficulty_select)."""
         
         # Clear any messages queued by a failed attempt (if any)
         self.message_queue.clear() 
         
         # Clear the entire screen content before printing the menu.
-        print("\033[1;1H\033[J", end="")
+        self._write(move_clear_down(1, 1))
         
         # --- Print the menu directly to ensure it appears before input ---
         self.typewriter_print("--- SELECT DIFFICULTY ---", delay=0, color=Colors.CYAN)
@@ -305,46 +426,84 @@ class SuperStarTrek:
             self.typewriter_print(f"   {i + 1} - {diff.name} (Klingons: {diff.initial_klingons}, Shields: {diff.shield_multiplier}x)", delay=0)
         
         self.typewriter_print("\n" * 2, delay=0) # Add spacing before prompt
-        
+
+    def ask_difficulty(self):
+        """Sets the handler (and menu) for the difficulty prompt."""
+        # The input prompt is placed directly after the printed menu text.
+        self._await_input(self.handle_difficulty_select, "ENTER CHOICE (1-3): ",
+                          render=self.show_difficulty_menu)
+
+    def apply_difficulty(self, difficulty):
+        """Sets the mission totals from a Difficulty preset."""
+        self.difficulty = difficulty
+        self.replay_log.set_difficulty(difficulty)
+        self.klingons_total = self.difficulty.initial_klingons
+        self.klingons_start = self.klingons_total
+        self.starbases_total = self.difficulty.initial_starbases
+
+    def state(self):
+        """Returns a plain dict snapshot of the game state (see engine.py)."""
+        return {
+            "running": self.is_running,
+            "game_over_reason": self.game_over_reason,
+            "stardate": self.stardate,
+            "stardate_end": self.stardate_end,
+            "quadrant": (self.q1, self.q2),
+            "sector": (self.s1, self.s2),
+            "energy": self.energy,
+            "shields": self.shields,
+            "torpedoes": self.torpedoes,
+            "klingons_total": self.klingons_total,
+            "klingons_start": self.klingons_start,
+            "starbases_total": self.starbases_total,
+            "docked": self.is_docked,
+            "damage": dict(self.damage),
+            "klingons": [(k.s1, k.s2, k.shields) for k in self.live_klingons],
+            "starbase": ((self.quadrant_starbase.s1, self.quadrant_starbase.s2)
+                         if self.quadrant_starbase else None),
+            "stars": [(s.s1, s.s2) for s in self.quadrant_stars],
+        }
+
+    def handle_difficulty_select(self, response):
+        """Handles the difficulty menu choice."""
         try:
-            # The input prompt is now placed directly after the printed menu text.
-            choice = int(input("ENTER CHOICE (1-3): ").strip())
+            choice = int(response.strip())
             
             if 1 <= choice <= len(DIFFICULTIES):
                 # Set variables
-                self.difficulty = DIFFICULTIES[choice - 1]
-                self.klingons_total = self.difficulty.initial_klingons
-                self.klingons_start = self.klingons_total
-                self.starbases_total = self.difficulty.initial_starbases
+                self.apply_difficulty(DIFFICULTIES[choice - 1])
                 
                 self.queue_message_instant(f"DIFFICULTY SET TO: {self.difficulty.name}", color=Colors.GREEN)
                 
             else:
                 self.queue_message_instant(f"   {Colors.RED}INVALID CHOICE. ENTER 1, 2, or 3.{Colors.RESET}")
-                self.input_handler = self.handle_difficulty_select # Restart
+                self.ask_difficulty() # Restart
                 
         except ValueError:
             self.queue_message_instant(f"   {Colors.RED}INVALID INPUT. ENTER A NUMBER.{Colors.RESET}")
-            self.input_handler = self.handle_difficulty_select # Restart
+            self.ask_difficulty() # Restart
           
-        
-    def handle_y_n_i_input(self):
+    def ask_accept_command(self):
+        """Sets the handler for the final Y/N/I prompt after the mission briefing."""
+        # Use the centralized function for setup messages
+        self._await_input(self.handle_y_n_i_input,
+                          "PRESS Y TO ACCEPT COMMAND, N TO QUIT, I FOR INSTRUCTIONS: ",
+                          render=lambda: self._process_message_queue(use_full_width=True, start_row=30))
+        
+    def handle_y_n_i_input(self, response):
         """Handles the final Y/N/I input after the mission briefing."""
-        # Use the new centralized function for setup messages
-        self._process_message_queue(use_full_width=True,start_row=30) 
-        #print(f"\033[35;1H\033[K", end="")
-        response = input("PRESS Y TO ACCEPT COMMAND, N TO QUIT, I FOR INSTRUCTIONS: ").strip().upper()
+        response = response.strip().upper()
         if response == "I":
             self.show_instructions() 
-            clear_screen()
+            self._clear_screen()
             self.show_mission_briefing() # Re-queue the briefing after instructions
-            self.input_handler = self.handle_y_n_i_input # Loop back to this prompt
+            self.ask_accept_command() # Loop back to this prompt
         elif response == "Y":
-            clear_screen()
+            self._clear_screen()
             self.enter_quadrant() # Start the game!
             # The input_handler is cleared here, ending the setup loop in run()
         elif response == "N":
-            clear_screen()
+            self._clear_screen()
             self.typewriter_print("Coward",delay=0.2,color=Colors.RED)
             self.is_running = False
             self.game_over_reason = "QUIT" 
@@ -355,7 +514,7 @@ class SuperStarTrek:
         Klingons in the quadrant fire back at the Enterprise.
         This function now takes over the message area and pauses.
         """
-        active_klingons = [k for k in self.quadrant_klingons if k['shields'] > 0]
+        active_klingons = self.live_klingons
         if not active_klingons:
             return # No Klingons to fire
 
@@ -364,22 +523,17 @@ class SuperStarTrek:
             return
 
         # --- FIX: Take over the message area ---
-        print("\033[11;1H\033[J", end="") # Clear message area
-        
-        # Draw the Klingon art
-        art_lines = load_ascii_art("klingon.txt")
-        for line in art_lines:
-            self.typewriter_print(line, delay=0)
+        self._draw_attack_art()
 
         # Print damage reports
         for k in active_klingons:
-            distance = get_distance(self.s1, self.s2, k['s1'], k['s2'])
+            distance = get_distance(self.s1, self.s2, k.s1, k.s2)
             if distance == 0: distance = 0.1 
 
-            hit_strength = int((k['shields'] / distance) * (2 + random.random()) / self.difficulty.energy_divisor) # <-- NEW DIVISION
+            hit_strength = int((k.shields / distance) * (2 + self.rng.combat.random()) / self.difficulty.energy_divisor) # <-- NEW DIVISION
             self.shields -= hit_strength
             
-            self.typewriter_print(f"   {hit_strength} UNIT HIT ON ENTERPRISE FROM SECTOR {k['s1']},{k['s2']}", delay=0, color=Colors.RED)
+            self.typewriter_print(f"   {hit_strength} UNIT HIT ON ENTERPRISE FROM SECTOR {k.s1},{k.s2}", delay=0, color=Colors.RED)
 
             if self.shields <= 0:
                 self.typewriter_print("\n\n*** THE ENTERPRISE HAS BEEN DESTROYED ***", delay=0, color=Colors.RED)
@@ -392,35 +546,40 @@ class SuperStarTrek:
 
             # Check for random additional damage
             if hit_strength < 20 or \
-               random.random() > 0.6 or \
+               self.rng.damage.random() > 0.6 or \
                (self.shields > 0 and (hit_strength / self.shields) <= 0.02):
                 continue
                 
-            device_index = int(random.random() * 7.98 + 1.01) 
+            device_index = int(self.rng.damage.random() * 7.98 + 1.01) 
             device_key = list(self.damage.keys())[device_index - 1]
             device_name_str = get_device_name(device_index)
-            damage_amount = (hit_strength / self.shields if self.shields > 0 else 1) + (0.5 * random.random())
+            damage_amount = (hit_strength / self.shields if self.shields > 0 else 1) + (0.5 * self.rng.damage.random())
             self.damage[device_key] -= damage_amount
             
             self.typewriter_print(f"   DAMAGE CONTROL: '{device_name_str} DAMAGED BY THE HIT'", delay=0, color=Colors.MAGENTA)
 
         # --- FIX: Add the pause ---
         if self.is_running: # Don't pause if the game is over
-            input("\nPress Enter to continue...")
-            clear_screen() # <-- ADD THIS LINE
+            self._pause("\nPress Enter to continue...")
+            self._clear_screen() # <-- ADD THIS LINE
+
+    def _draw_attack_art(self):
+        """Clears the message area and draws the Klingon art for an attack."""
+        self._write(move_clear_down(11, 1)) # Clear message area
+        
+        for line in ASSETS.lines("klingon.txt"):
+            self.typewriter_print(line, delay=0)
             
-    def _get_random_sector(self, occupied_sectors):
+    def _get_random_sector(self):
         """
         Helper function to find an empty sector (1-8, 1-8).
-        This replaces the GOSUB 8590 logic.
+        This replaces the GOSUB 8590 logic. The caller places
+        whatever goes there on self.sectors.
+
+        GOSUB 8590 re-rolled FNR(1) until it hit an empty sector; the grid's
+        free list gives a uniformly random empty one in a single draw.
         """
-        while True:
-            # FNR(1) = INT(RND(1)*7.98+1.01)
-            r1 = int(random.random() * 7.98 + 1.01) # Row
-            r2 = int(random.random() * 7.98 + 1.01) # Col
-            if (r1, r2) not in occupied_sectors:
-                occupied_sectors.add((r1, r2))
-                return r1, r2
+        return self.sectors.random_free(self.rng.setup)
 
     def enter_quadrant(self):
         """
@@ -430,66 +589,213 @@ class SuperStarTrek:
         
         self.queue_message(f"NOW ENTERING {get_quadrant_name(self.q1, self.q2)} QUADRANT . . .",delay=0.05,color=Colors.GREEN)
         # Keep track of where we've placed objects
-        occupied_sectors = set()
-        occupied_sectors.add((self.s1, self.s2)) # Enterprise's location
+        self.sectors.clear()
+        self.sectors.place(self.s1, self.s2, ENTERPRISE)
         
         # Mark quadrant as visited (line 1320, Z(Q1,Q2)=G(Q1,Q2))
-        self.galaxy_known[self.q1][self.q2] = True
-        
-        # Decode quadrant data from galaxy map (line 1500)
-        quadrant_data = self.galaxy[self.q1][self.q2]
-        k_count = quadrant_data // 100
-        b_count = (quadrant_data % 100) // 10
-        s_count = quadrant_data % 10
+        self.galaxy.mark_known(self.q1, self.q2)
         
+        # Read quadrant data from galaxy map (line 1500)
+        k_count, b_count, s_count = self.galaxy.counts(self.q1, self.q2)
+
+        if self.galaxy.procedural:
+            self._generate_quadrant(k_count, b_count, s_count)
+        else:
+            self._randomize_quadrant(k_count, b_count, s_count)
+
+        # Check for "Condition Red" (lines 1560-1580)
+        if k_count > 0:
+            self.queue_message_instant(f"\n   {Colors.RED}{Colors.BOLD}COMBAT AREA      CONDITION RED{Colors.RESET}")
+            if self.shields <= 200:
+                self.queue_message_instant(f"      {Colors.YELLOW}SHIELDS DANGEROUSLY LOW{Colors.RESET}")
+        else:
+            self.queue_message_instant("") # Add a blank line
+
+    def _randomize_quadrant(self, k_count, b_count, s_count):
+        """Places the quadrant's objects at new random sectors (the classic way)."""
         # Place Klingons (lines 1720-1780)
         self.quadrant_klingons = []
-        for _ in range(k_count):
-            r1, r2 = self._get_random_sector(occupied_sectors)
+        for i in range(k_count):
+            r1, r2 = self._get_random_sector()
+            self.sectors.place(r1, r2, KLINGON, i)
             # K(I,3)=S9*(.5+RND(1)) -> shields = 200 * (0.5 + RND)
             shields_base = self.difficulty.base_klingon_shields
-            shields = shields_base * (0.5 + random.random())
-            self.quadrant_klingons.append({'s1': r1, 's2': r2, 'shields': shields})
+            shields = shields_base * (0.5 + self.rng.setup.random())
+            self.quadrant_klingons.append(Klingon(r1, r2, shields))
             
+        self.live_klingons = self.quadrant_klingons[:]
+
         # Place Starbase (line 1880)
         self.quadrant_starbase = None
         if b_count > 0:
-            r1, r2 = self._get_random_sector(occupied_sectors)
-            self.quadrant_starbase = {'s1': r1, 's2': r2}
+            r1, r2 = self._get_random_sector()
+            self.sectors.place(r1, r2, STARBASE)
+            self.quadrant_starbase = Starbase(r1, r2)
         
         # Place Stars (line 1910)
         self.quadrant_stars = []
-        for _ in range(s_count):
-            r1, r2 = self._get_random_sector(occupied_sectors)
-            self.quadrant_stars.append({'s1': r1, 's2': r2})
+        for i in range(s_count):
+            r1, r2 = self._get_random_sector()
+            self.sectors.place(r1, r2, STAR, i)
+            self.quadrant_stars.append(Star(r1, r2))
+
+    def _generate_quadrant(self, k_count, b_count, s_count):
+        """
+        Lays out a procedural galaxy's quadrant from its own seeded random
+        numbers, so it looks the same on every visit. Klingons destroyed
+        earlier keep their place in quadrant_klingons with no shields.
+        """
+        rng = self.galaxy.layout_rng(self.q1, self.q2)
+        destroyed = self.galaxy.destroyed(self.q1, self.q2)
+        # Scratch grid without the Enterprise, which arrives at a
+        # different sector each time
+        layout = SectorGrid()
+
+        def draw():
+            r1, r2 = layout.random_free(rng)
+            layout.place(r1, r2, STAR)
+            return r1, r2
+
+        # Klingons first, then stars and the starbase last, so losing
+        # a Klingon or the starbase does not move anything else
+        self.quadrant_klingons = []
+        for i in range(k_count + bin(destroyed).count("1")):
+            r1, r2 = draw()
+            shields = self.difficulty.base_klingon_shields * (0.5 + rng.random())
+            self.quadrant_klingons.append(Klingon(r1, r2, 0 if destroyed & (1 << i) else shields))
+        self.quadrant_stars = [Star(*draw()) for _ in range(s_count)]
+        self.quadrant_starbase = Starbase(*draw()) if b_count > 0 else None
+
+        # Anything generated where the Enterprise arrived is moved aside
+        objects = [(k, KLINGON, i) for i, k in enumerate(self.quadrant_klingons) if k.shields > 0]
+        objects += [(s, STAR, i) for i, s in enumerate(self.quadrant_stars)]
+        if self.quadrant_starbase:
+            objects.append((self.quadrant_starbase, STARBASE, 0))
+        in_the_way = None
+        for obj, code, i in objects:
+            if (obj.s1, obj.s2) == (self.s1, self.s2):
+                in_the_way = obj, code, i
+            else:
+                self.sectors.place(obj.s1, obj.s2, code, i)
+        if in_the_way:
+            obj, code, i = in_the_way
+            obj.s1, obj.s2 = self._get_random_sector()
+            self.sectors.place(obj.s1, obj.s2, code, i)
+        self.live_klingons = [k for k in self.quadrant_klingons if k.shields > 0]
+            
+    def _index_quadrant(self):
+        """Rebuilds the sector grid and live Klingons from the quadrant's object lists."""
+        self.live_klingons = [k for k in self.quadrant_klingons if k.shields > 0]
+        self.sectors.clear()
+        self.sectors.place(self.s1, self.s2, ENTERPRISE)
+        for i, k in enumerate(self.quadrant_klingons):
+            if k.shields > 0:
+                self.sectors.place(k.s1, k.s2, KLINGON, i)
+        if self.quadrant_starbase:
+            self.sectors.place(self.quadrant_starbase.s1, self.quadrant_starbase.s2, STARBASE)
+        for i, s in enumerate(self.quadrant_stars):
+            self.sectors.place(s.s1, s.s2, STAR, i)
+
+    def _destroy_klingon(self, k):
+        """Takes a Klingon out of play: no shields, off the grid and the live list."""
+        k.shields = 0
+        self.sectors.remove(k.s1, k.s2)
+        self.live_klingons.remove(k)
+        self.galaxy.mark_destroyed(self.q1, self.q2, self.quadrant_klingons.index(k))
 
-        # Check for "Condition Red" (lines 1560-1580)
-        if k_count > 0:
-            self.queue_message_instant(f"\n   {Colors.RED}{Colors.BOLD}COMBAT AREA      CONDITION RED{Colors.RESET}")
-            if self.shields <= 200:
-                self.queue_message_instant(f"      {Colors.YELLOW}SHIELDS DANGEROUSLY LOW{Colors.RESET}")
-        else:
-            self.queue_message_instant("") # Add a blank line
-            
     def _get_vector(self, course):
         """
         Calculates the (dRow, dCol) vector for a given course.
-        Used by both NAV and TOR commands.
+        Used by both NAV and TOR commands (cached, see course_rays.py).
         """
-        # Get the integer part of the course for vector lookup
-        course_int = int(course)
-        # Get the fractional part for interpolation
-        course_frac = course - course_int
-        
-        # Get the two vectors for interpolation (e.g., for course 1.5)
-        vec1 = self.COURSE_VECTORS[course_int]
-        vec2 = self.COURSE_VECTORS[course_int + 1] if course_int < 8 else self.COURSE_VECTORS[1]
+        return course_vector(course)
+    
+    # --- Terminal I/O hooks ---
+    # All screen output, pauses and keyboard reads go through these methods,
+    # so the game rules never touch the terminal directly. The headless
+    # engine (engine.py) overrides them to run without a TTY.
+
+    def _write(self, text):
+        """Writes raw text (including ANSI codes) to the terminal."""
+        if self.screen:
+            self.screen.write(text)
+        else:
+            self.out.write(text)
+
+    def _flush(self):
+        """Sends everything written so far to the terminal in one write."""
+        if self.screen:
+            self.screen.flush()
+        self.out.flush()
+
+    def _sleep(self, seconds):
+        """Waits between animation frames, cut short by a key."""
+        self.keyboard.wait(seconds)
+
+    def _animate(self, frames):
+        """Plays a list of (text, hold seconds) frames with the animator."""
+        self.animator.play(frames)
+
+    def _read_line(self, prompt):
+        """Shows a prompt and reads one line from the keyboard."""
+        # The prompt goes out in the same write as the rest of the frame
+        self._write(prompt)
+        self._flush()
+        response = self.keyboard.read_line()
+        if self.screen:
+            self.screen.note_line_input()
+        return response
+
+    def _pause(self, prompt="Press Enter to continue..."):
+        """Waits for the player to press Enter (with a keyboard, any key)."""
+        self._write(prompt)
+        self._flush()
+        self.keyboard.wait_key()
+        if self.screen:
+            self.screen.note_line_input()
+
+    def _clear_screen(self):
+        """Clears the whole terminal."""
+        if self.screen:
+            self.screen.clear()
+        else:
+            self._write(CLEAR_SCREEN)
 
-        # Interpolate the vector (line 3110)
-        dRow = vec1[0] + (vec2[0] - vec1[0]) * course_frac
-        dCol = vec1[1] + (vec2[1] - vec1[1]) * course_frac
-        
-        return dRow, dCol
+    def _await_input(self, handler, prompt, render=None):
+        """
+        Sets the function that will receive the next line of input,
+        the prompt to show for it and an optional render step.
+        """
+        self.input_handler = handler
+        self.input_prompt = prompt
+        self.input_render = render
+
+    def submit(self, response):
+        """
+        Feeds one line of input to the game: either the pending
+        input_handler or, if none is set, the main COMMAND? prompt.
+        """
+        handler = self.input_handler
+        self.input_handler = None
+        self.input_prompt = ""
+        self.input_render = None
+        if handler:
+            self.replay_log.add_answer(response)
+            handler(response)
+        else:
+            command = response.strip().upper()
+            self.replay_log.add_command(command)
+            self.handle_command(command)
+
+    def _next_prompt(self):
+        """Renders the pending prompt and returns its text."""
+        if self.input_render:
+            self.input_render()
+        return self.input_prompt if self.input_handler else "COMMAND? "
+
+    def _prompt_and_submit(self):
+        """Renders the pending prompt, reads a line and submits it."""
+        self.submit(self._read_line(self._next_prompt()))
     
     def typewriter_print(self, text="", delay=0.05, color=None, newline=True):
         """
@@ -499,35 +805,32 @@ class SuperStarTrek:
         
         # Start the color if one was provided
         if color:
-            sys.stdout.write(color)
-            sys.stdout.flush()
+            self._write(color)
 
         # --- THIS IS THE UPGRADED LOGIC ---
         if delay == 0:
             # If no delay, print the whole string at once.
             # This allows pre-embedded ANSI codes to work.
-            sys.stdout.write(text)
-            sys.stdout.flush()
+            # (It goes out with the rest of the frame.)
+            self._write(text)
         else:
-            # If there's a delay, iterate char by char
-            for char in text:
-                sys.stdout.write(char)
-                sys.stdout.flush()
-                time.sleep(delay)
+            # If there's a delay, show it char by char
+            self._animate([(char, delay) for char in text])
         
         # Reset the color if one was used
         if color:
-            sys.stdout.write(Colors.RESET)
-            sys.stdout.flush()
+            self._write(Colors.RESET)
 
         # --- FIX: Only print a newline if requested ---
         if newline:
-            print() # Move to the next line
+            self._write("\n") # Move to the next line
     
     def queue_message(self, text, delay=0.05, color=Colors.GREEN):
         """
         Adds a message to the queue to be self.queue_message_instanted with typewriter effect.
         """
+        if self.fast_start:
+            delay = 0
         # Store a dictionary with all the arguments for typewriter_print
         self.message_queue.append({
             "text": text,
@@ -546,38 +849,45 @@ class SuperStarTrek:
             "color": color
         })
     
-    def _draw_status_panel(self):
+    def _update_condition(self):
         """
-        Draws the 8-line status report in the top-right panel.
+        Works out docking and the ship's condition, refitting the ship
+        while docked. Returns "DOCKED", "*RED*", "YELLOW" or "GREEN".
         """
         # --- Logic moved from _draw_current_srs_map ---
         self.is_docked = False
         condition = ""
         if self.quadrant_starbase:
-            if abs(self.s1 - self.quadrant_starbase['s1']) <= 1 and \
-               abs(self.s2 - self.quadrant_starbase['s2']) <= 1:
+            if abs(self.s1 - self.quadrant_starbase.s1) <= 1 and \
+               abs(self.s2 - self.quadrant_starbase.s2) <= 1:
                 self.is_docked = True
-                condition = f"{Colors.CYAN}DOCKED{Colors.RESET}"
+                condition = "DOCKED"
                 self.energy = self.energy_start * self.difficulty.shield_multiplier
                 self.torpedoes = 10
                 self.shields = 0
                 self.queue_message_instant(f"{Colors.CYAN}SHIELDS DROPPED FOR DOCKING.{Colors.RESET}")
         
         if not self.is_docked:
-            if len(self.quadrant_klingons) > 0:
-                condition = f"{Colors.RED}*RED*{Colors.RESET}"
+            if len(self.live_klingons) > 0: # K3>0: destroyed ones don't count
+                condition = "*RED*"
             elif self.energy < self.energy_start * 0.1:
-                condition = f"{Colors.YELLOW}YELLOW{Colors.RESET}"
+                condition = "YELLOW"
             else:
-                condition = f"{Colors.GREEN}GREEN{Colors.RESET}"
-        # --- End of moved logic ---
+                condition = "GREEN"
+        return condition
+
+    def _draw_status_panel(self):
+        """
+        Draws the 8-line status report in the top-right panel.
+        """
+        condition = self.CONDITION_COLORS[self._update_condition()]
         
         # --- Print the 8 status lines ---
         col = self.msg_box_col # Start at the same column
         
         # Helper to clear line and print
         def print_status(row, text):
-            print(f"\033[{row};{col}H\033[K{text}", end="")
+            self._write(move_clear(row, col) + text)
 
         print_status(1, f"STARDATE          {int(self.stardate * 10) / 10}")
         print_status(2, f"CONDITION         {condition}")
@@ -593,82 +903,59 @@ class SuperStarTrek:
         Helper function to draw the SRS map in the top-left pane.
         """
         # --- ANSI: Move cursor to Row 1, Col 1 ---
-        print("\033[1;1H", end="")
+        self._write(move(1, 1))
 
         # 2. Sensor Damage Check
         if self.damage["SHORT_RANGE_SENSORS"] < 0:
             self.queue_message_instant(f"\n{Colors.RED}*** SHORT RANGE SENSORS ARE OUT ***{Colors.RESET}\n")
-            quadrant_map = [["???" for _ in range(9)] for _ in range(9)]
+            glyphs = None
         else:
-            # 3. Build the 2D map data
-            quadrant_map = [["   " for _ in range(9)] for _ in range(9)]
-            quadrant_map[self.s1][self.s2] = f"{Colors.CYAN}<E>{Colors.RESET}"
-            for k in self.quadrant_klingons:
-                if k['shields'] > 0:
-                    quadrant_map[k['s1']][k['s2']] = f"{Colors.RED}+K+{Colors.RESET}"
-            if self.quadrant_starbase:
-                quadrant_map[self.quadrant_starbase['s1']][self.quadrant_starbase['s2']] = f"{Colors.GREEN}>B<{Colors.RESET}"
-            for s in self.quadrant_stars:
-                quadrant_map[s['s1']][s['s2']] = f"{Colors.YELLOW} * {Colors.RESET}"
-
-        # 4. Print Map (No status)
-        top_bottom_border = "  +--1---2---3---4---5---6---7---8-+"
-        print(top_bottom_border)
-
-        for r in range(1, 9):
-            row_str = f"{r} |"
-            for c in range(1, 9):
-                row_str += f" {quadrant_map[r][c]}" 
-            row_str += f"|{r}"
-            print(row_str)
-
-        print(top_bottom_border)
+            glyphs = self.SECTOR_GLYPHS
+
+        # 3. Print Map (No status). The drawing only changes when the
+        # sector grid does, so it is kept until the grid's version moves on.
+        key = (self.sectors.version, glyphs is None)
+        if self._srs_map_cache is None or self._srs_map_cache[0] != key:
+            top_bottom_border = "  +--1---2---3---4---5---6---7---8-+"
+            lines = [top_bottom_border]
+            for r in range(1, 9):
+                if glyphs is None:
+                    cells = " ???" * 8
+                else:
+                    cells = "".join(" " + glyphs[code] for code in self.sectors.row_codes(r))
+                lines.append(f"{r} |{cells}|{r}")
+            lines.append(top_bottom_border)
+            self._srs_map_cache = (key, "\n".join(lines) + "\n")
+
+        self._write(self._srs_map_cache[1])
 
     def _draw_console_art(self):
         """
         Draws the console art in the bottom-left pane.
         """
         # Move cursor to line 11 to start drawing
-        print("\033[11;1H", end="")
+        self._write(move(11, 1))
         
-        art_lines = load_ascii_art("console.txt")
-        for line in art_lines:
-            # --- FIX: Translate tags before printing ---
-            translated_line = translate_art_tags(line)
-            print(translated_line)
+        for line in ASSETS.lines("console.txt"):
+            self._write(line + "\n")
     
     def _draw_right_panel(self):
         """
-        Draws the static UI for the right-hand message/command box.
+        Draws the static UI for the right-hand message/command box:
+        top border at row 11, sides down to the prompt row, a separator
+        at row 30 and the bottom border at row 32 (see LayoutSequences).
         """
-        col_start = self.msg_box_col - 1 # Start 1 column left for the border
-        box_width = self.msg_box_width + 1 # Add 1 for the border
-        
-        # --- Draw Top Border (at Row 11) ---
-        print(f"\033[11;{col_start}H+", end="")
-        print("-" * box_width, end="")
-        print("+", end="")
-        
-        # --- Draw Side Borders (from Row 12 to 31) ---
-        for r in range(self.msg_box_top, self.cmd_box_top + 1): # Use constants
-            print(f"\033[{r};{col_start}H|", end="")
-            print(f"\033[{r};{col_start + box_width + 1}H|", end="")
-        
-        # --- Draw Middle Separator (at Row 30) ---
-        print(f"\033[30;{col_start}H+", end="")
-        print("-" * box_width, end="")
-        print("+", end="")
-        
-        # --- Draw Bottom Border (at Row 32) ---
-        print(f"\033[32;{col_start}H+", end="")
-        print("-" * box_width, end="")
-        print("+", end="")
+        self._write(self.layout.right_panel)
             
     def _move_to_map_sector(self, r, c):
             """
             Moves the cursor to the center of a given map sector (r,c)
             on the map drawn by _draw_current_srs_map.
             """
+            self._write(self._map_sector_cursor(r, c))
+
+    def _map_sector_cursor(self, r, c):
+            """Returns the cursor move to map sector (r,c), for animation frames."""
             # Map row `r` is on screen row `r + 1` (border is on 1)
             screen_row = r + 1
             
@@ -676,7 +963,7 @@ class SuperStarTrek:
             # "r |" (3) + " " (1) + (c-1)*4 + " " (1, to be in the middle)
             screen_col = 5 + (c - 1) * 4 + 1 
             
-            print(f"\033[{screen_row};{screen_col}H", end="")
+            return move(screen_row, screen_col)
         
     def run(self):
         """The main game loop. Now uses the new two-pane layout."""
@@ -686,10 +973,10 @@ class SuperStarTrek:
             # --- 1. SETUP ---
                   
             # Move cursor to message area (Line 15) and clear for text
-            print("\033[15;1H\033[J", end="")
+            self._write(move_clear_down(15, 1))
             self.setup_game()
             # --- STEP 2: SELECT DIFFICULTY (First thing asked) ---
-            self.input_handler = self.handle_difficulty_select 
+            self.ask_difficulty()
             
             # Run the input handler sequence for setup
             while self.input_handler:
@@ -700,12 +987,8 @@ class SuperStarTrek:
                 # 2.1 Process Messages on the FULL SCREEN
                 self._process_message_queue(use_full_width=True) # <-- USE FULL WIDTH
                 
-                # 2.2 Clear command prompt line and get input
-                # Move cursor to a consistent location below the messages (e.g., line 25)
-                #print(f"\033[25;1H\033[K", end="") # <-- MOVE PROMPT TO FULL-SCREEN LOCATION
-                handler = self.input_handler
-                self.input_handler = None
-                handler() # Execute the current handler (Difficulty Select)
+                # 2.2 Show the menu and prompt, get input
+                self._prompt_and_submit() # Execute the current handler (Difficulty Select)
             
             # If the user quit during the setup phase, exit the replay loop
             if not self.is_running: 
@@ -716,78 +999,34 @@ class SuperStarTrek:
             self.show_mission_briefing() # Briefing uses queue_message
             
             # --- STEP 4: ACCEPT COMMAND (Y/N/I) ---
-            self.input_handler = self.handle_y_n_i_input
+            self.ask_accept_command()
             
             # Run the Y/N/I loop (Uses full screen for instructions/briefing display)
             while self.input_handler:
                 # We still need the process message queue for instructions/briefing updates
                 self._process_message_queue(use_full_width=True) 
                 
-                # Move cursor to a consistent location below the messages
-               # print(f"\033[25;1H\033[K", end="") # <-- USE FULL-SCREEN LOCATION
-                handler = self.input_handler
-                self.input_handler = None
-                handler()
+                self._prompt_and_submit()
             
             # If the user quit, exit
             if not self.is_running: 
                  break 
             
             # --- 5. MAIN GAME LOOP ---
-            clear_screen() # Clear final setup text before drawing UI
-            self.enter_quadrant() # Now start the game
+            self._clear_screen() # Clear final setup text before drawing UI
+            # --- FIX: handle_y_n_i_input already entered the first quadrant ---
             while self.is_running:
-                # --- DRAW THE FULL UI ---
-                self._draw_full_ui() 
-                
-                # 4. Print queued messages (using centralized function)
-                self._process_message_queue() 
-                
-                # --- NEW PAUSE LOGIC ---
-                if self.pause_after_messages:
-                    self.pause_after_messages = False 
-                    
-                    active_klingons = [k for k in self.quadrant_klingons if k['shields'] > 0]
-                    will_klingons_fire = self.hostile_action_taken and len(active_klingons) > 0
-                    
-                    if not will_klingons_fire:
-                        # No Klingons will fire, so we must pause.
-                        print(f"\033[{self.cmd_box_top};{self.msg_box_col}H\033[K", end="")
-                        input("Press Enter to continue...")
-                
-                # 5. Handle Klingon Attacks (if any)
-                if self.hostile_action_taken:
-                    self.klingons_fire_back()
-                    self.hostile_action_taken = False 
-                    continue 
-                    
-                # 6. Move to prompt *inside* the box
-                print(f"\033[{self.cmd_box_top};{self.msg_box_col}H\033[K", end="")
-                # --- NEW INPUT LOGIC ---
-                if self.input_handler:
-                    handler = self.input_handler
-                    self.input_handler = None
-                    handler()
-                else:
-                    command = input("COMMAND? ").strip().upper()
-                    self.handle_command(command)
-                
-                
-                    
-                # 7. Check for end-game conditions
-                if self.klingons_total <= 0 and self.game_over_reason == "":
-                    self.queue_message_instant("Congratulations, you have destroyed all Klingons!")
-                    self.is_running = False
-                    self.game_over_reason = "WIN"
-                if self.stardate > self.stardate_end and self.game_over_reason == "":
-                    self.queue_message_instant("Your time is up. The Federation has been conquered.")
-                    self.is_running = False
-                    self.game_over_reason = "TIME"
+                # One frame per turn: its output goes out in one write
+                with self.out.frame():
+                    self._play_turn()
             
             # --- 4. GAME ENDS ---
+            self.replay_log.finish(self)
+            if self.replay_path:
+                self.replay_log.save(self.replay_path)
             
             # Clear screen from the console art start point
-            print("\033[11;1H\033[J", end="")
+            self._write(move_clear_down(11, 1))
             
             # Print any final queued messages (e.g., "Congratulations...")
             self._process_message_queue(use_full_width=True)
@@ -795,10 +1034,68 @@ class SuperStarTrek:
             play_again = self._end_game()
             
             if play_again:
-                self.__init__() 
-                clear_screen()
+                self.reset_state()
+                self._clear_screen()
             else:
                 break
+
+        self._flush()
+
+    def _play_turn(self):
+        """
+        One pass of the main game loop: draw, show messages, let the
+        Klingons fire, then read and run one command.
+        """
+        if self._start_turn():
+            self._prompt_and_submit()
+
+            # 7. Check for end-game conditions
+            self._check_end_conditions()
+
+    def _start_turn(self):
+        """
+        The part of a turn before the command prompt. Returns True if a
+        command should be read, False if the Klingons fired instead.
+        """
+        # --- DRAW THE FULL UI ---
+        self._draw_full_ui() 
+        
+        # 4. Print queued messages (using centralized function)
+        self._process_message_queue() 
+        
+        # --- NEW PAUSE LOGIC ---
+        if self.pause_after_messages:
+            self.pause_after_messages = False 
+            
+            will_klingons_fire = self.hostile_action_taken and len(self.live_klingons) > 0
+            
+            if not will_klingons_fire:
+                # No Klingons will fire, so we must pause.
+                self._write(self.layout.cmd_line)
+                self._pause("Press Enter to continue...")
+        
+        # 5. Handle Klingon Attacks (if any)
+        if self.hostile_action_taken:
+            self.klingons_fire_back()
+            self.hostile_action_taken = False 
+            return False
+            
+        # 6. Move to prompt *inside* the box
+        self._write(self.layout.cmd_line)
+        # --- NEW INPUT LOGIC ---
+        # Either the pending input_handler or the COMMAND? prompt
+        return True
+
+    def _check_end_conditions(self):
+        """Ends the game if all Klingons are gone or time has run out."""
+        if self.klingons_total <= 0 and self.game_over_reason == "":
+            self.queue_message_instant("Congratulations, you have destroyed all Klingons!")
+            self.is_running = False
+            self.game_over_reason = "WIN"
+        if self.stardate > self.stardate_end and self.game_over_reason == "":
+            self.queue_message_instant("Your time is up. The Federation has been conquered.")
+            self.is_running = False
+            self.game_over_reason = "TIME"
     
     def handle_command(self, command):
         """Routes the user's command to the correct function."""
@@ -836,7 +1133,7 @@ class SuperStarTrek:
         self.queue_message_instant("        ...")
         self.queue_message_instant("      . . .")
         self.queue_message_instant("      6  7  8")
-        self.input_handler = self.handle_nav_course
+        self._await_input(self.handle_nav_course, "COURSE (1-8): ")
 
     def _process_message_queue(self, use_full_width=False,start_row = 15):
         """
@@ -854,15 +1151,15 @@ class SuperStarTrek:
             max_width = 78
             
             # Clear screen from the start row down
-            print(f"\033[{start_row};1H\033[J", end="") 
+            self._write(move_clear_down(start_row, 1))
             
             for msg_args in self.message_queue:
-                # Wrap the text using full width
-                lines = textwrap.wrap(msg_args["text"], width=max_width)
+                # Wrap the text using full width (same ANSI-aware engine as the box)
+                lines = wrap_ansi(msg_args["text"], max_width)
                 if not lines: lines = [""] # Handle blank lines
 
                 for line in lines:
-                    print(f"\033[{current_row};1H", end="") # Move to the line
+                    self._write(move(current_row, 1)) # Move to the line
                     self.typewriter_print(
                         text=line,
                         delay=msg_args["delay"],
@@ -875,48 +1172,23 @@ class SuperStarTrek:
             # Main game UI box logic
             message_row = self.msg_box_top
             
-            # Clear the message box
-            for r in range(self.msg_box_top, self.msg_box_bottom + 1):
-                print(f"\033[{r};{self.msg_box_col}H\033[K", end="")
-            print(f"\033[{message_row};{self.msg_box_col}H", end="") # Move cursor to top of box
+            # Clear the message box, leaving the cursor at its top
+            self._write(self.layout.msg_clear)
 
             # Print queued messages
             for msg_args in self.message_queue:
                 if message_row > self.msg_box_bottom:
                     break # Stop printing if we run out of space
                 
-                # ANSI-AWARE TEXT WRAP LOGIC
-                lines = []
-                # First, split by any manual newlines
-                for line in msg_args["text"].split('\n'):
-                    if get_visible_length(line) <= self.msg_box_width:
-                        lines.append(line)
-                    else:
-                        current_line = ""
-                        words = line.split(' ')
-                        for word in words:
-                            if get_visible_length(word) > self.msg_box_width:
-                                if current_line: lines.append(current_line)
-                                lines.append(word)
-                                current_line = ""
-                                continue
-                            
-                            test_line = current_line + " " + word if current_line else word
-                            if get_visible_length(test_line) <= self.msg_box_width:
-                                current_line = test_line
-                            else:
-                                lines.append(current_line)
-                                current_line = word
-                        
-                        if current_line: lines.append(current_line)
-                
+                # ANSI-AWARE TEXT WRAP (cached per message and width)
+                lines = wrap_ansi(msg_args["text"], self.msg_box_width)
                 if not lines: lines = [""] 
 
                 for line in lines:
                     if message_row > self.msg_box_bottom:
                         break
                     # Move to the correct row AND column, and clear the line
-                    print(f"\033[{message_row};{self.msg_box_col}H\033[K", end="")
+                    self._write(self.layout.msg_lines[message_row])
                     self.typewriter_print(
                         text=line,
                         delay=msg_args["delay"],
@@ -935,10 +1207,14 @@ class SuperStarTrek:
         self._draw_console_art()    # Draws art at [11;1]
         self._draw_right_panel()    # Draws the message box border
 
-    def handle_nav_course(self):
-        """Gets the COURSE input for NAV."""
+    def _max_warp(self):
+        """Highest warp factor the engines will take right now."""
+        return 0.2 if self.damage["WARP_ENGINES"] < 0 else 8.0
+
+    def handle_nav_course(self, response):
+        """Handles the COURSE input for NAV."""
         try:
-            course = float(input("COURSE (1-8): "))
+            course = float(response)
             if course == 9: course = 1
             if not 1 <= course < 9:
                 self.queue_message_instant("   LT. SULU: 'INCORRECT COURSE DATA, SIR!'", color=Colors.RED)
@@ -946,22 +1222,21 @@ class SuperStarTrek:
             
             # Store course and set next handler
             self.command_data = {'course': course}
-            self.input_handler = self.handle_nav_warp
+            max_warp = self._max_warp()
+            if self.damage["WARP_ENGINES"] < 0:
+                self.queue_message_instant(f"   CHIEF ENGINEER SCOTT: 'WARP ENGINES DAMAGED. MAX = {max_warp}'")
+            self._await_input(self.handle_nav_warp, f"WARP FACTOR (0-{max_warp}): ")
             
         except ValueError:
             self.queue_message_instant("   LT. SULU: 'INCORRECT COURSE DATA, SIR!'", color=Colors.RED)
 
-    def handle_nav_warp(self):
-        """Gets the WARP input and executes the NAV command."""
+    def handle_nav_warp(self, response):
+        """Handles the WARP input and executes the NAV command."""
         try:
             course = self.command_data['course']
+            max_warp = self._max_warp()
             
-            max_warp = 8.0
-            if self.damage["WARP_ENGINES"] < 0:
-                max_warp = 0.2
-                self.queue_message_instant(f"   CHIEF ENGINEER SCOTT: 'WARP ENGINES DAMAGED. MAX = {max_warp}'")
-            
-            warp = float(input(f"WARP FACTOR (0-{max_warp}): "))
+            warp = float(response)
             if warp <= 0: return
             if warp > max_warp:
                 self.queue_message_instant(f"   CHIEF ENGINEER SCOTT: 'THE ENGINES WON'T TAKE WARP {warp}!'")
@@ -993,39 +1268,21 @@ class SuperStarTrek:
                 self.queue_message_instant("   (USE 'SHE' COMMAND TO TRANSFER ENERGY)", color=Colors.YELLOW)
                 return
 
-        dRow, dCol = self._get_vector(course)
+        dRow, dCol = course_vector(course)
         
         # --- KLINGON MOVEMENT (Lines 2610-2700) ---
-        occupied_sectors = set()
-        occupied_sectors.add((self.s1, self.s2)) # Enterprise
-        if self.quadrant_starbase:
-            occupied_sectors.add((self.quadrant_starbase['s1'], self.quadrant_starbase['s2']))
-        for s in self.quadrant_stars:
-            occupied_sectors.add((s['s1'], s['s2']))
-        
-        klingon_positions = set()
-        for k in self.quadrant_klingons:
-            if k['shields'] > 0:
-                klingon_positions.add((k['s1'], k['s2']))
-        occupied_sectors.update(klingon_positions)
-
-        for k in self.quadrant_klingons:
-            if k['shields'] <= 0:
+        sectors = self.sectors
+        for i, k in enumerate(self.quadrant_klingons):
+            if k.shields <= 0:
                 continue
-            occupied_sectors.remove((k['s1'], k['s2']))
-            new_s1, new_s2 = self._get_random_sector(occupied_sectors)
-            k['s1'] = new_s1
-            k['s2'] = new_s2
-            occupied_sectors.add((new_s1, new_s2))
+            sectors.remove(k.s1, k.s2)
+            new_s1, new_s2 = self._get_random_sector()
+            k.s1 = new_s1
+            k.s2 = new_s2
+            sectors.place(new_s1, new_s2, KLINGON, i)
             
         # --- STEP 4 & 5: EXECUTE MOVE ---
-        quadrant_map = [["   " for _ in range(9)] for _ in range(9)]
-        for k in self.quadrant_klingons:
-            if k['shields'] > 0: quadrant_map[k['s1']][k['s2']] = "+K+"
-        if self.quadrant_starbase:
-            quadrant_map[self.quadrant_starbase['s1']][self.quadrant_starbase['s2']] = ">B<"
-        for s in self.quadrant_stars:
-            quadrant_map[s['s1']][s['s2']] = " * "
+        start_s1, start_s2 = self.s1, self.s2
 
         final_row_f = self.s1 + distance_sectors * dRow
         final_col_f = self.s2 + distance_sectors * dCol
@@ -1036,24 +1293,25 @@ class SuperStarTrek:
         if 1 <= final_row_f <= 8.99 and 1 <= final_col_f <= 8.99:
             self.queue_message_instant("   LT. SULU: 'MANEUVERING WITHIN QUADRANT.'")
             
-            for i in range(1, distance_sectors + 1):
-                new_row = int(self.s1 + i * dRow + 0.5)
-                new_col = int(self.s2 + i * dCol + 0.5)
-
-                if not (1 <= new_row <= 8 and 1 <= new_col <= 8):
-                    continue 
-
-                if quadrant_map[new_row][new_col] != "   ":
+            # Walk the precomputed path (steps off the map are left out)
+            for new_row, new_col, stop_row, stop_col in nav_path(start_s1, start_s2, course,
+                                                                 distance_sectors):
+                if sectors.code_at(new_row, new_col) not in (EMPTY, ENTERPRISE):
                     self.queue_message_instant("   LT. SULU: 'WARP ENGINES SHUT DOWN AT SECTOR")
                     self.queue_message_instant(f"             {new_row},{new_col} DUE TO OBSTACLE!'")
-                    self.s1 = int(self.s1 + (i - 1) * dRow + 0.5)
-                    self.s2 = int(self.s2 + (i - 1) * dCol + 0.5)
+                    self.s1 = stop_row
+                    self.s2 = stop_col
                     break
                 
                 self.s1 = new_row
                 self.s2 = new_col
                 
             time_elapsed = 1.0 if warp >= 1.0 else warp
+            if sectors.code_at(self.s1, self.s2) in (EMPTY, ENTERPRISE):
+                sectors.move(start_s1, start_s2, self.s1, self.s2)
+            else:
+                # Stopped on top of an obstacle; it stays on the map, as before
+                sectors.remove(start_s1, start_s2)
 
         else:
             # --- Inter-Quadrant Move (Lines 3500-3870) ---
@@ -1066,24 +1324,21 @@ class SuperStarTrek:
             global_row_end = global_row_start + distance_sectors * dRow
             global_col_end = global_col_start + distance_sectors * dCol
 
-            if global_row_end < 0 or global_row_end > 63 or \
-               global_col_end < 0 or global_col_end > 63:
+            # Last global sector row/col (63 in the standard 8x8 galaxy)
+            last_row = self.galaxy.rows * 8 - 1
+            last_col = self.galaxy.cols * 8 - 1
+
+            if global_row_end < 0 or global_row_end > last_row or \
+               global_col_end < 0 or global_col_end > last_col:
                 
                 self.queue_message_instant("   LT. UHURA: 'MESSAGE FROM STARFLEET COMMAND --", color=Colors.YELLOW)
                 self.queue_message_instant("     'PERMISSION TO ATTEMPT CROSSING OF GALACTIC PERIMETER", color=Colors.YELLOW)
                 self.queue_message_instant("     IS HEREBY *DENIED*.'", color=Colors.YELLOW)
 
-                if global_row_end < 0:
-                    global_row_end = -global_row_end
-                elif global_row_end > 63:
-                    overshoot_row = global_row_end - 63
-                    global_row_end = 63 - overshoot_row
-                
-                if global_col_end < 0:
-                    global_col_end = -global_col_end
-                elif global_col_end > 63:
-                    overshoot_col = global_col_end - 63
-                    global_col_end = 63 - overshoot_col
+                # Bounce off the edges; in a galaxy narrower than the move
+                # it can take more than one bounce to land inside
+                global_row_end = _reflect(global_row_end, last_row)
+                global_col_end = _reflect(global_col_end, last_col)
 
             self.q1 = int(global_row_end // 8) + 1
             self.s1 = int(global_row_end % 8) + 1
@@ -1112,18 +1367,18 @@ class SuperStarTrek:
                     device_name = get_device_name(i + 1)
                     self.queue_message_instant(f"     {device_name} REPAIR COMPLETED.", color=Colors.GREEN)
 
-        if random.random() < 0.20:
-            device_index = random.randint(1, 8) 
+        if self.rng.damage.random() < 0.20:
+            device_index = self.rng.damage.randint(1, 8) 
             device_key = list(self.damage.keys())[device_index - 1]
             device_name = get_device_name(device_index)
             
-            if random.random() < 0.60:
-                damage_amount = random.random() * 5 + 1
+            if self.rng.damage.random() < 0.60:
+                damage_amount = self.rng.damage.random() * 5 + 1
                 self.damage[device_key] -= damage_amount
                 self.queue_message_instant("   DAMAGE CONTROL REPORT:", color=Colors.RED)
                 self.queue_message_instant(f"     {device_name} DAMAGED.", color=Colors.RED)
             else:
-                repair_amount = random.random() * 3 + 1
+                repair_amount = self.rng.damage.random() * 3 + 1
                 self.damage[device_key] += repair_amount
                 if self.damage[device_key] > 0:
                     self.damage[device_key] = 0.0 
@@ -1165,9 +1420,9 @@ class SuperStarTrek:
                 start_color = Colors.CYAN if is_current_quadrant else ""
                 end_color = Colors.RESET if is_current_quadrant else ""
 
-                if 1 <= r <= 8 and 1 <= c <= 8:
-                    scan_data = self.galaxy[r][c]
-                    self.galaxy_known[r][c] = True
+                if self.galaxy.contains(r, c):
+                    scan_data = self.galaxy.display_value(r, c)
+                    self.galaxy.mark_known(r, c)
                     row_str += f" {start_color}{scan_data:03d}{end_color} |"
                 else:
                     row_str += f" {start_color}***{end_color} |" # Outside galaxy
@@ -1187,7 +1442,7 @@ class SuperStarTrek:
             self.queue_message_instant(f"   {Colors.RED}PHASERS ARE INOPERATIVE.{Colors.RESET}")
             return
 
-        active_klingons = [k for k in self.quadrant_klingons if k['shields'] > 0]
+        active_klingons = self.live_klingons
         
         if not active_klingons:
             self.queue_message_instant(f"   {Colors.CYAN}MR. SPOCK: 'SENSORS SHOW NO ENEMY SHIPS IN THIS QUADRANT.'{Colors.RESET}")
@@ -1197,12 +1452,12 @@ class SuperStarTrek:
         self.queue_message_instant(f"   PHASERS LOCKED ON {len(active_klingons)} KLINGON(S).")
         self.queue_message_instant(f"   ENERGY AVAILABLE = {self.energy:.0f} UNITS")
         
-        self.input_handler = self.handle_pha_input
+        self._await_input(self.handle_pha_input, "   NUMBER OF UNITS TO FIRE: ")
 
-    def handle_pha_input(self):
-        """Gets the ENERGY input for PHA and executes the command."""
+    def handle_pha_input(self, response):
+        """Handles the ENERGY input for PHA and executes the command."""
         try:
-            fire_energy = float(input("   NUMBER OF UNITS TO FIRE: "))
+            fire_energy = float(response)
             
             if fire_energy <= 0:
                 return # Abort
@@ -1221,7 +1476,8 @@ class SuperStarTrek:
         """The actual logic for firing phasers, separated from input."""
         
         self.energy -= fire_energy
-        active_klingons = [k for k in self.quadrant_klingons if k['shields'] > 0]
+        # Copied, since Klingons destroyed below leave the live list
+        active_klingons = tuple(self.live_klingons)
         
         # --- 3. CALCULATE & DISTRIBUTE ENERGY ---
         energy_per_klingon = fire_energy / len(active_klingons)
@@ -1231,44 +1487,44 @@ class SuperStarTrek:
         
         self.queue_message("   PHASERS FIRING...", delay=0.02)
         
+        # The beams are played as one animation after the hits are worked out
+        frames = []
         for k in active_klingons:
-            distance = get_distance(self.s1, self.s2, k['s1'], k['s2'])
+            distance = get_distance(self.s1, self.s2, k.s1, k.s2)
             if distance == 0: distance = 0.1
             
             # --- 4. ANIMATION (Draw beam) ---
-            self._move_to_map_sector(self.s1, self.s2)
-            print(f"{Colors.MAGENTA}*--{Colors.RESET}", end="")
-            sys.stdout.flush()
-            time.sleep(0.1)
-            self._move_to_map_sector(k['s1'], k['s2'])
-            print(f"{Colors.MAGENTA}--*{Colors.RESET}", end="")
-            sys.stdout.flush()
-            time.sleep(0.3)
+            frames.append((self._map_sector_cursor(self.s1, self.s2) + f"{Colors.MAGENTA}*--{Colors.RESET}", 0.1))
+            frames.append((self._map_sector_cursor(k.s1, k.s2) + f"{Colors.MAGENTA}--*{Colors.RESET}", 0.3))
             
             # --- 5. CALCULATE & REPORT HIT ---
-            hit_strength = int((energy_per_klingon / distance) * (2 + random.random()))
-            k['shields'] -= hit_strength
+            hit_strength = int((energy_per_klingon / distance) * (2 + self.rng.combat.random()))
+            k.shields -= hit_strength
             
-            if k['shields'] <= 0:
-                self.queue_message_instant(f"   *** {Colors.RED}KLINGON DESTROYED{Colors.RESET} AT SECTOR {k['s1']},{k['s2']} ***", color=Colors.RED)
-                k['shields'] = 0 # Set shields to 0
+            if k.shields <= 0:
+                self.queue_message_instant(f"   *** {Colors.RED}KLINGON DESTROYED{Colors.RESET} AT SECTOR {k.s1},{k.s2} ***", color=Colors.RED)
+                self._destroy_klingon(k) # Set shields to 0
                 self.klingons_total -= 1
-                time.sleep(1)
             else:
-                self.queue_message_instant(f"   {hit_strength} UNIT HIT ON KLINGON AT SECTOR {k['s1']},{k['s2']}. (SENSORS SHOW {k['shields']:.0f} UNITS REMAINING)", color=Colors.YELLOW)
-                time.sleep(1)
+                self.queue_message_instant(f"   {hit_strength} UNIT HIT ON KLINGON AT SECTOR {k.s1},{k.s2}. (SENSORS SHOW {k.shields:.0f} UNITS REMAINING)", color=Colors.YELLOW)
+            frames.append(("", 1))
+        self._animate(frames)
         # --- 6. CLEANUP & POST-FIRE ---
         
         # Update galaxy map data
-        k_count = len([k for k in self.quadrant_klingons if k['shields'] > 0])
-        b_count = 1 if self.quadrant_starbase else 0
-        s_count = len(self.quadrant_stars)
-        self.galaxy[self.q1][self.q2] = k_count * 100 + b_count * 10 + s_count
+        self._update_galaxy_counts()
         
         self.hostile_action_taken = True
         
             
     
+    def _update_galaxy_counts(self):
+        """Writes the current quadrant's contents back to the galaxy map."""
+        k_count = len(self.live_klingons)
+        b_count = 1 if self.quadrant_starbase else 0
+        s_count = len(self.quadrant_stars)
+        self.galaxy.set_counts(self.q1, self.q2, k_count, b_count, s_count)
+
     def tor_command(self):
         """
         Handles the TOR command. Queues the first prompt
@@ -1292,12 +1548,12 @@ class SuperStarTrek:
         self.queue_message_instant("        ...")
         self.queue_message_instant("      . . .")
         self.queue_message_instant("      6  7  8")
-        self.input_handler = self.handle_tor_course
+        self._await_input(self.handle_tor_course, "PHOTON TORPEDO COURSE (1-8): ")
 
-    def handle_tor_course(self):
-        """Gets the COURSE input for TOR and executes the command."""
+    def handle_tor_course(self, response):
+        """Handles the COURSE input for TOR and executes the command."""
         try:
-            course = float(input("PHOTON TORPEDO COURSE (1-8): "))
+            course = float(response)
             if course == 9: course = 1
             if not 1 <= course < 9:
                 self.queue_message_instant("   ENSIGN CHEKOV: 'INCORRECT COURSE DATA, SIR!'")
@@ -1314,30 +1570,21 @@ class SuperStarTrek:
         # --- 3. FIRE TORPEDO & ANIMATE ---
         self.energy -= 2
         self.torpedoes -= 1
-        dRow, dCol = self._get_vector(course)
-        
-        track_row_f = float(self.s1)
-        track_col_f = float(self.s2)
         prev_r, prev_c = self.s1, self.s2
         
         hit_target = False
 
         # Redraw the map for the animation
         self._draw_current_srs_map()
+        # The track is played as one animation once the torpedo stops
+        frames = []
 
         # --- 4. TRACKING LOOP ---
-        for _ in range(15): # Max range of 15 sectors
-            track_row_f += dRow
-            track_col_f += dCol
-            r, c = int(track_row_f + 0.5), int(track_col_f + 0.5)
-
+        # The sectors along the course, up to the edge (max range 15 sectors)
+        for r, c in torpedo_ray(self.s1, self.s2, course):
             # --- Animation Part ---
-            self._move_to_map_sector(prev_r, prev_c)
-            print(f"{Colors.YELLOW}.{Colors.RESET}", end="")
-            self._move_to_map_sector(r, c)
-            print(f"{Colors.RED}*{Colors.RESET}", end="")
-            sys.stdout.flush() 
-            time.sleep(0.2)
+            frames.append((self._map_sector_cursor(prev_r, prev_c) + f"{Colors.YELLOW}.{Colors.RESET}"
+                           + self._map_sector_cursor(r, c) + f"{Colors.RED}*{Colors.RESET}", 0.2))
             prev_r, prev_c = r, c
             # --- End Animation Part ---
 
@@ -1346,45 +1593,40 @@ class SuperStarTrek:
                 self.queue_message_instant("   TORPEDO MISSED.", color=Colors.YELLOW)
                 break
                 
+            # What did it reach? One lookup in the sector grid
+            hit = self.sectors.code_at(r, c)
+
             # Check for Klingon hit
-            for k in self.quadrant_klingons:
-                if k['shields'] > 0 and k['s1'] == r and k['s2'] == c:
-                    self._move_to_map_sector(r, c)
-                    print(f"{Colors.RED}{Colors.BOLD}*!*{Colors.RESET}", end="") # EXPLOSION
-                    sys.stdout.flush()
-                    self.queue_message_instant(f"\n*** {Colors.RED}KLINGON DESTROYED{Colors.RESET} ***")
-                    k['shields'] = 0
-                    self.klingons_total -= 1
-                    k_count = len([k for k in self.quadrant_klingons if k['shields'] > 0])
-                    b_count = 1 if self.quadrant_starbase else 0
-                    s_count = len(self.quadrant_stars)
-                    self.galaxy[self.q1][self.q2] = k_count * 100 + b_count * 10 + s_count
-                    hit_target = True
-                    break
-            if hit_target: break
+            if hit == KLINGON:
+                k = self.quadrant_klingons[self.sectors.id_at(r, c)]
+                frames.append((self._map_sector_cursor(r, c) + f"{Colors.RED}{Colors.BOLD}*!*{Colors.RESET}", 0)) # EXPLOSION
+                self.queue_message_instant(f"\n*** {Colors.RED}KLINGON DESTROYED{Colors.RESET} ***")
+                self._destroy_klingon(k)
+                self.klingons_total -= 1
+                self._update_galaxy_counts()
+                hit_target = True
+                break
 
             # Check for Starbase hit
-            if self.quadrant_starbase and self.quadrant_starbase['s1'] == r and self.quadrant_starbase['s2'] == c:
-                self._move_to_map_sector(r, c)
-                print(f"{Colors.RED}{Colors.BOLD}*!*{Colors.RESET}", end="") # EXPLOSION
-                sys.stdout.flush()
+            if hit == STARBASE:
+                frames.append((self._map_sector_cursor(r, c) + f"{Colors.RED}{Colors.BOLD}*!*{Colors.RESET}", 0)) # EXPLOSION
                 self.queue_message_instant(f"\n*** {Colors.RED}{Colors.BOLD}STARBASE DESTROYED{Colors.RESET} ***")
                 self.queue_message_instant("   STARFLEET COMMAND REVIEWING YOUR RECORD...")
                 self.quadrant_starbase = None
+                self.sectors.remove(r, c)
                 self.starbases_total -= 1
                 hit_target = True
                 break
             
             # Check for Star hit
-            for s in self.quadrant_stars:
-                if s['s1'] == r and s['s2'] == c:
-                    self.queue_message_instant(f"   {Colors.YELLOW}STAR AT {r},{c} ABSORBED TORPEDO ENERGY.{Colors.RESET}")
-                    hit_target = True
-                    break
-            if hit_target: break
+            if hit == STAR:
+                self.queue_message_instant(f"   {Colors.YELLOW}STAR AT {r},{c} ABSORBED TORPEDO ENERGY.{Colors.RESET}")
+                hit_target = True
+                break
         
         # --- 5. POST-FIRE ---
-        time.sleep(1) # Pause on the final frame
+        frames.append(("", 1)) # Pause on the final frame
+        self._animate(frames)
         self.hostile_action_taken = True
         
     def she_command(self):
@@ -1400,13 +1642,13 @@ class SuperStarTrek:
         # --- 2. QUEUE PROMPTS & SET HANDLER ---
         total_energy = self.energy + self.shields
         self.queue_message_instant(f"   ENERGY AVAILABLE = {total_energy:.0f} UNITS")
-        self.input_handler = self.handle_she_input
+        self._await_input(self.handle_she_input, f" NUMBER OF UNITS TO SHIELDS (currently {self.shields:.0f}): ")
 
-    def handle_she_input(self):
-        """Gets the ENERGY input for SHE and executes the command."""
+    def handle_she_input(self, response):
+        """Handles the ENERGY input for SHE and executes the command."""
         try:
             total_energy = self.energy + self.shields
-            new_shield_level = float(input(f" NUMBER OF UNITS TO SHIELDS (currently {self.shields:.0f}): "))
+            new_shield_level = float(response)
             
         except ValueError:
             self.queue_message_instant(f"   {Colors.RED}INVALID ENERGY AMOUNT.{Colors.RESET}")
@@ -1460,19 +1702,19 @@ class SuperStarTrek:
                 self.queue_message_instant("TECHNICIANS STANDING BY TO EFFECT REPAIRS.", color=Colors.YELLOW)
                 self.queue_message_instant(f"ESTIMATED TIME TO REPAIR: {repair_time:.2f} STARDATES.", color=Colors.YELLOW)
                 
-                self.input_handler = self.handle_repair_input
+                self._await_input(self.handle_repair_input, "DO YOU AUTHORIZE REPAIRS? (Y/N): ")
             else:
                 self.queue_message_instant("ALL SYSTEMS FUNCTIONAL.", color=Colors.GREEN)
 
-    def handle_repair_input(self):
+    def handle_repair_input(self, response):
         """
         Handles the repair authorization input and executes the repair action 
         if authorized. (Translates part of BASIC lines 5590-5620).
         """
         repair_time = self.command_data.get('repair_time', 0)
         
-        # --- Prompt for Authorization ---
-        response = input("DO YOU AUTHORIZE REPAIRS? (Y/N): ").strip().upper()
+        # --- Authorization ---
+        response = response.strip().upper()
         
         if response == "Y":
             # --- Execute Repair ---
@@ -1515,21 +1757,30 @@ class SuperStarTrek:
         
         self.queue_message_instant(f"   {Colors.CYAN}COMPUTER RECORD OF GALAXY{Colors.RESET}")
         self.queue_message_instant(f"   (Quadrant {self.q1},{self.q2} is highlighted)")
+
+        # Larger galaxies are shown as an 8x8 window around the Enterprise
+        top, left, rows, cols = self.galaxy.window(self.q1, self.q2)
+        if (rows, cols) != (self.galaxy.rows, self.galaxy.cols):
+            self.queue_message_instant(f"   (Rows {top}-{top + rows - 1}, columns {left}-{left + cols - 1})")
         self.queue_message_instant("") # Blank line
+
+        # Row labels are as wide as the biggest row number shown
+        label = len(str(top + rows - 1))
         
         # --- Draw the new compact map (from example.txt) ---
-        self.queue_message_instant("     1   2   3   4   5   6   7   8")
+        header = " " * (label + 3) + " ".join(f"{c:^3}" for c in range(left, left + cols))
+        self.queue_message_instant(header.rstrip())
         
-        # Border is 37 chars wide, fits in our 40-char box
-        border = "   +---+---+---+---+---+---+---+---+"
+        # Border is 37 chars wide for an 8x8 galaxy, fits in our 40-char box
+        border = " " * (label + 2) + "+---" * cols + "+"
         self.queue_message_instant(border)
         
-        for r in range(1, 9):
+        for r in range(top, top + rows):
             # Start row with "r|" (e.g., " 1|")
-            row_str = f" {r} |" 
-            for c in range(1, 9):
-                if self.galaxy_known[r][c]:
-                    scan_data = self.galaxy[r][c] # K, B, S (e.g., 201)
+            row_str = f" {r:>{label}} |" 
+            for c in range(left, left + cols):
+                if self.galaxy.is_known(r, c):
+                    scan_data = self.galaxy.display_value(r, c) # K, B, S (e.g., 201)
                     
                     if r == self.q1 and c == self.q2:
                         # Highlight the current quadrant
@@ -1570,7 +1821,7 @@ class SuperStarTrek:
 
     def _com_torpedo_data(self):
         """COM Option 2: Queues Photon Torpedo Data"""
-        active_klingons = [k for k in self.quadrant_klingons if k['shields'] > 0]
+        active_klingons = self.live_klingons
         if not active_klingons:
             self.queue_message_instant(f"   {Colors.CYAN}MR. SPOCK: 'SENSORS SHOW NO ENEMY SHIPS IN THIS QUADRANT.'{Colors.RESET}")
             return
@@ -1579,8 +1830,8 @@ class SuperStarTrek:
         self.queue_message_instant(f"   FROM ENTERPRISE TO KLINGON BATTLE CRUSER{klingon_s}:", color=Colors.CYAN)
         
         for k in active_klingons:
-            course, distance = get_course_and_distance(self.s1, self.s2, k['s1'], k['s2'])
-            self.queue_message_instant(f"     SECTOR {k['s1']},{k['s2']}: DIRECTION = {course:.2f}, DISTANCE = {distance:.2f}")
+            course, distance = get_course_and_distance(self.s1, self.s2, k.s1, k.s2)
+            self.queue_message_instant(f"     SECTOR {k.s1},{k.s2}: DIRECTION = {course:.2f}, DISTANCE = {distance:.2f}")
 
     def _com_starbase_data(self):
         """COM Option 3: Queues Starbase Nav Data"""
@@ -1590,8 +1841,8 @@ class SuperStarTrek:
             
         self.queue_message_instant("   FROM ENTERPRISE TO STARBASE:", color=Colors.CYAN)
         b = self.quadrant_starbase
-        course, distance = get_course_and_distance(self.s1, self.s2, b['s1'], b['s2'])
-        self.queue_message_instant(f"     SECTOR {b['s1']},{b['s2']}: DIRECTION = {course:.2f}, DISTANCE = {distance:.2f}")
+        course, distance = get_course_and_distance(self.s1, self.s2, b.s1, b.s2)
+        self.queue_message_instant(f"     SECTOR {b.s1},{b.s2}: DIRECTION = {course:.2f}, DISTANCE = {distance:.2f}")
 
     def com_command(self):
         """
@@ -1614,29 +1865,40 @@ class SuperStarTrek:
         self.queue_message_instant("")
         
         # --- FIX: Set the input handler ---
-        self.input_handler = self.handle_com_input
+        self._await_input(self.handle_com_input, "COMPUTER ACTIVE AND AWAITING COMMAND: ")
             
     def _com_region_map(self):
         """COM Option 5: Queues Galaxy 'Region Name' Map"""
         self.queue_message_instant("         --- GALACTIC REGION MAP ---", color=Colors.CYAN)
+
+        # Names repeat every 8x8 block of a larger galaxy; show the
+        # Enterprise's block
+        block_row = (self.q1 - 1) // 8 * 8
+        block_col = (self.q2 - 1) // 8 * 8
+        last_row = min(block_row + 8, self.galaxy.rows)
+        last_col = min(block_col + 8, self.galaxy.cols)
+        if (self.galaxy.rows, self.galaxy.cols) != (8, 8):
+            self.queue_message_instant(f"    (Block of rows {block_row + 1}-{last_row}, columns {block_col + 1}-{last_col})")
+
         border = "    +-----------------+-----------------+"
         self.queue_message_instant(border)
         self.queue_message_instant("    |   (Columns 1-4) |   (Columns 5-8) |")
         self.queue_message_instant(border)
         
-        for r in range(1, 9):
-            name1 = get_quadrant_name(r, 1).split(" ")[0]
-            name2 = get_quadrant_name(r, 5).split(" ")[0]
+        for r in range(block_row + 1, last_row + 1):
+            name1 = get_quadrant_name(r, block_col + 1).split(" ")[0]
+            # Columns 5-8 may be past the edge of a narrow galaxy
+            name2 = get_quadrant_name(r, block_col + 5).split(" ")[0] if block_col + 5 <= last_col else ""
             
-            row_str = f" {r}  | {name1.ljust(15)} | {name2.ljust(15)} |"
+            row_str = f" {r - block_row}  | {name1.ljust(15)} | {name2.ljust(15)} |"
             self.queue_message_instant(row_str)
         self.queue_message_instant(border)
     
     
-    def handle_com_input(self):
+    def handle_com_input(self, response):
         """Handles the input *after* the COM menu is displayed."""
         try:
-            choice = int(input(f"COMPUTER ACTIVE AND AWAITING COMMAND: "))
+            choice = int(response)
             
             if choice == 0:
                 self._com_galactic_record()
@@ -1662,41 +1924,41 @@ class SuperStarTrek:
         self.queue_message_instant(f"   You are at Quadrant {self.q1},{self.q2} Sector {self.s1},{self.s2}")
         
         # Set the next input handler
-        self.input_handler = self.handle_calc_input_start
+        self._await_input(self.handle_calc_input_start, "START POINT (QR, QC, SR, SC): ")
     
-    def handle_calc_input_1(self):
-        """Gets the START coordinates (Q1, S1)."""
+    def handle_calc_input_1(self, response):
+        """Handles the START coordinates (Q1, S1)."""
         try:
             # We are asking for two numbers (Q1 and S1) separated by a comma
-            coords_str = input("START Q/S (e.g., 5,1): ").strip()
+            coords_str = response.strip()
             q1, s1 = map(int, coords_str.split(','))
             
-            # Input validation (must be between 1 and 8)
-            if not (1 <= q1 <= 8 and 1 <= s1 <= 8):
-                 self.queue_message_instant(f"   {Colors.RED}INVALID START COORDINATES (Q and S must be 1-8).{Colors.RESET}")
+            # Input validation (Q must be a galaxy row, S between 1 and 8)
+            if not (1 <= q1 <= self.galaxy.rows and 1 <= s1 <= 8):
+                 self.queue_message_instant(f"   {Colors.RED}INVALID START COORDINATES (Q must be 1-{self.galaxy.rows}, S 1-8).{Colors.RESET}")
                  return
             
             # Store Q1 and S1 and proceed to next handler
             self.command_data['q1'] = q1
             self.command_data['s1'] = s1
-            self.input_handler = self.handle_calc_input_2
+            self._await_input(self.handle_calc_input_2, "END Q/S (e.g., 8,8): ")
             
         except ValueError:
             self.queue_message_instant(f"   {Colors.RED}INVALID INPUT FORMAT. USE Q,S (e.g., 5,1).{Colors.RESET}")
     
-    def handle_calc_input_2(self):
-        """Gets the END coordinates (Q2, S2) and performs the calculation."""
+    def handle_calc_input_2(self, response):
+        """Handles the END coordinates (Q2, S2) and performs the calculation."""
         try:
             # Get data stored from previous step
             q1 = self.command_data['q1']
             s1 = self.command_data['s1']
             
-            coords_str = input("END Q/S (e.g., 8,8): ").strip()
+            coords_str = response.strip()
             q2, s2 = map(int, coords_str.split(','))
             
-            # Input validation (must be between 1 and 8)
-            if not (1 <= q2 <= 8 and 1 <= s2 <= 8):
-                 self.queue_message_instant(f"   {Colors.RED}INVALID END COORDINATES (Q and S must be 1-8).{Colors.RESET}")
+            # Input validation (Q must be a galaxy row, S between 1 and 8)
+            if not (1 <= q2 <= self.galaxy.rows and 1 <= s2 <= 8):
+                 self.queue_message_instant(f"   {Colors.RED}INVALID END COORDINATES (Q must be 1-{self.galaxy.rows}, S 1-8).{Colors.RESET}")
                  return
 
             # --- CORE CALCULATION LOGIC ---
@@ -1789,25 +2051,34 @@ class SuperStarTrek:
             # --- RESTARTING THE CALCULATOR INPUT FLOW FOR 4 COORD INPUT ---
             
             self.queue_message_instant(f"   {Colors.YELLOW}Enter START point coordinates: Q-Row, Q-Col, S-Row, S-Col.{Colors.RESET}")
-            self.input_handler = self.handle_calc_input_start
+            self._await_input(self.handle_calc_input_start, "START POINT (QR, QC, SR, SC): ")
             
             
         except ValueError:
             self.queue_message_instant(f"   {Colors.RED}INVALID INPUT FORMAT. USE Q,S (e.g., 8,8).{Colors.RESET}")
             self.command_data = {} # Clear temp data for restart
-            self.input_handler = self._com_calculator_run # Restart the command
+            self._com_calculator_run() # Restart the command
+
 
+    def _valid_location(self, q_row, q_col, s_row, s_col):
+        """True if the quadrant is in the galaxy and the sector is 1-8."""
+        return self.galaxy.contains(q_row, q_col) and 1 <= s_row <= 8 and 1 <= s_col <= 8
 
-    def handle_calc_input_start(self):
-        """Gets the four start coordinates (Q1, Q2, S1, S2)."""
+    def _location_ranges(self):
+        if self.galaxy.rows == self.galaxy.cols == 8:
+            return "All components must be 1-8"
+        return f"Quadrants 1-{self.galaxy.rows},1-{self.galaxy.cols}, sectors 1-8"
+
+    def handle_calc_input_start(self, response):
+        """Handles the four start coordinates (Q1, Q2, S1, S2)."""
         try:
-            coords_str = input("START POINT (QR, QC, SR, SC): ").strip()
+            coords_str = response.strip()
             # Q1=QR, Q2=QC, S1=SR, S2=SC
             qr1, qc1, sr1, sc1 = map(int, coords_str.split(','))
             
-            # Validate all inputs are 1-8
-            if not all(1 <= c <= 8 for c in [qr1, qc1, sr1, sc1]):
-                 self.queue_message_instant(f"   {Colors.RED}INVALID START COORDINATES (All components must be 1-8).{Colors.RESET}")
+            # Validate the quadrant is in the galaxy and the sector is 1-8
+            if not self._valid_location(qr1, qc1, sr1, sc1):
+                 self.queue_message_instant(f"   {Colors.RED}INVALID START COORDINATES ({self._location_ranges()}).{Colors.RESET}")
                  return
             
             # Store all four coordinates
@@ -1817,14 +2088,14 @@ class SuperStarTrek:
             self.command_data['sc1'] = sc1
             
             # Set next handler
-            self.input_handler = self.handle_calc_input_end
+            self._await_input(self.handle_calc_input_end, "END POINT (QR, QC, SR, SC): ")
             
         except ValueError:
             self.queue_message_instant(f"   {Colors.RED}INVALID INPUT FORMAT. USE QR,QC,SR,SC (e.g., 5,3,4,8).{Colors.RESET}")
             self.command_data = {}
 
-    def handle_calc_input_end(self):
-        """Gets the four end coordinates and performs the calculation."""
+    def handle_calc_input_end(self, response):
+        """Handles the four end coordinates and performs the calculation."""
         # --- Retrieve Start Coordinates ---
         qr1 = self.command_data['qr1']
         qc1 = self.command_data['qc1']
@@ -1832,15 +2103,15 @@ class SuperStarTrek:
         sc1 = self.command_data['sc1']
 
         try:
-            coords_str = input("END POINT (QR, QC, SR, SC): ").strip()
+            coords_str = response.strip()
             qr2, qc2, sr2, sc2 = map(int, coords_str.split(','))
             
-            # Validate all inputs are 1-8
-            if not all(1 <= c <= 8 for c in [qr2, qc2, sr2, sc2]):
-                 self.queue_message_instant(f"   {Colors.RED}INVALID END COORDINATES (All components must be 1-8).{Colors.RESET}")
+            # Validate the quadrant is in the galaxy and the sector is 1-8
+            if not self._valid_location(qr2, qc2, sr2, sc2):
+                 self.queue_message_instant(f"   {Colors.RED}INVALID END COORDINATES ({self._location_ranges()}).{Colors.RESET}")
                  return
 
-            # --- CONVERT TO GLOBAL 64x64 COORDINATES ---
+            # --- CONVERT TO GLOBAL SECTOR COORDINATES (64x64 in an 8x8 galaxy) ---
             # Global Row (R) = (Q_Row - 1) * 8 + S_Row
             r1_global = (qr1 - 1) * 8 + sr1
             r2_global = (qr2 - 1) * 8 + sr2
@@ -1879,8 +2150,17 @@ class SuperStarTrek:
         This translates lines 6220-6400.
         Returns True if the user wants to play again, False otherwise.
         """
+        self._show_end_report()
+        response = self._read_line(self.REPLAY_PROMPT)
+        return self._handle_replay_answer(response)
+
+    # Replay question (lines 6310-6330)
+    REPLAY_PROMPT = "IF THERE IS A VOLUNTEER, LET HIM STEP FORWARD AND ENTER 'AYE': "
+
+    def _show_end_report(self):
+        """Shows the win/defeat report, up to the replay question."""
         # --- Clear the entire prompt area for messages ---
-        print(f"\033[{self.cmd_box_top};{self.msg_box_col}H\033[J", end="") 
+        self._write(self.layout.cmd_clear_down)
 
         if self.game_over_reason == "WIN":
             # --- Show WIN art in the message box ---
@@ -1915,11 +2195,13 @@ class SuperStarTrek:
             self.typewriter_print("THE END OF YOUR MISSION.", color=Colors.YELLOW)
 
         # Replay logic (lines 6310-6330)
-        print("\n")
+        self._write("\n\n")
         #spacer = " " * self.msg_box_col
         self.typewriter_print("THE FEDERATION IS IN NEED OF A NEW STARSHIP COMMANDER.")
-        response = input("IF THERE IS A VOLUNTEER, LET HIM STEP FORWARD AND ENTER 'AYE': ").strip().upper()
-        
+
+    def _handle_replay_answer(self, response):
+        """Returns True for a new game, False to quit."""
+        response = response.strip().upper()
         if response == "AYE":
             return True # Play again
         
@@ -0,0 +1,247 @@
+"""
+Keyboard input without blocking on input().
+
+open_keyboard() puts the terminal in cbreak mode (keys arrive one at a
+time, with no echo) and a Keyboard reads them through a selector. Keys
+go to a small line editor, and finished lines wait in a type-ahead
+buffer until the game asks for one, so the player can type during an
+animation and the command runs as soon as the game is ready for it:
+
+    with open_keyboard(out.write, out.flush) as keyboard:
+        line = keyboard.read_line()   # a typed-ahead line, or wait for one
+        keyboard.wait_key()           # "Press Enter to continue"
+        keyboard.key_pressed()        # animation skip check
+        keyboard.wait(0.05)           # sleep, but wake up on a key
+
+Editing keys: Backspace, Ctrl-U (erase the line), Enter. Ctrl-D on an
+empty line is end of input. Ctrl-C still interrupts the game, since
+cbreak mode leaves signals on. Escape sequences (arrow keys and the
+like) and a lone Escape are ignored.
+
+The line being typed is only echoed while the game waits for it; during
+an animation keys are collected quietly and shown once the prompt is up.
+
+When stdin is not a terminal, or there is no termios (Windows),
+open_keyboard() gives None and the game reads lines with input().
+"""
+import codecs
+import os
+import selectors
+import sys
+from collections import deque
+from contextlib import contextmanager
+
+ENTER = ("\r", "\n")
+BACKSPACE = ("\x7f", "\b")
+ERASE_LINE = "\x15"  # Ctrl-U
+END_OF_INPUT = "\x04"  # Ctrl-D
+ESCAPE = "\x1b"
+
+
+class Keyboard:
+    """
+    Args:
+        fd (int): File descriptor to read keys from (already in cbreak mode).
+        write, flush: Where typed keys are echoed (the game's output).
+    """
+
+    def __init__(self, fd, write, flush):
+        self.fd = fd
+        self._write = write
+        self._flush = flush
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(fd, selectors.EVENT_READ)
+        self._decoder = codecs.getincrementaldecoder(sys.stdin.encoding or "utf-8")(errors="replace")
+
+        self.lines = deque()  # Finished lines not read yet (type-ahead)
+        self.partial = []     # The line being typed
+        self.eof = False
+        self._echo = False    # Echo keys as they come (only while reading a line)
+        self._keys = 0        # Keys since the last key_pressed()
+        self._escape = None   # Escape sequence being skipped: "", "[" or "O"
+        self._last_cr = False
+
+        # --- Counters ---
+        self.keys_read = 0
+        self.lines_read = 0
+        self.lines_typed_ahead = 0
+
+    def close(self):
+        self._selector.close()
+
+    # --- Reading keys ---
+
+    def wait(self, timeout):
+        """
+        Waits up to timeout seconds (None for ever) for keys and handles
+        any that arrive. Returns True if there were some.
+        """
+        if self.eof or not self._selector.select(timeout):
+            return False
+        try:
+            data = os.read(self.fd, 1024)
+        except InterruptedError:
+            return False
+        if not data:
+            self._end_of_input()
+            return False
+        self._feed(self._decoder.decode(data))
+        return True
+
+    def _feed(self, text):
+        """Runs typed characters through the line editor."""
+        echo = []
+        for ch in text:
+            self.keys_read += 1
+            self._keys += 1
+            if self._escape is not None:
+                escape, self._escape = self._escape, None
+                if escape == "" and ch in "[O":
+                    # A CSI (ESC [) or SS3 (ESC O) sequence follows
+                    self._escape = ch
+                    continue
+                if escape == "O":
+                    continue
+                if escape == "[" and " " <= ch <= "~":
+                    # CSI parameters run until a final byte, @ to ~
+                    if not "@" <= ch <= "~":
+                        self._escape = escape
+                    continue
+                # Anything else ends the sequence (a lone ESC is just
+                # dropped) and is handled as a key of its own
+            if ch == "\n" and self._last_cr:
+                # The \n of a \r\n pair
+                self._last_cr = False
+                continue
+            self._last_cr = ch == "\r"
+
+            if ch in ENTER:
+                self.lines.append("".join(self.partial))
+                self.partial.clear()
+                echo.append("\n")
+                if not self._echo:
+                    self.lines_typed_ahead += 1
+            elif ch in BACKSPACE:
+                if self.partial:
+                    self.partial.pop()
+                    echo.append("\b \b")
+            elif ch == ERASE_LINE:
+                echo.append("\b \b" * len(self.partial))
+                self.partial.clear()
+            elif ch == END_OF_INPUT:
+                if not self.partial:
+                    self._end_of_input()
+                    break
+            elif ch == ESCAPE:
+                self._escape = ""
+            elif ch.isprintable():
+                self.partial.append(ch)
+                echo.append(ch)
+        if self._escape == "":
+            # A sequence comes in one read, so an ESC at the end was a lone key
+            self._escape = None
+        if self._echo and echo:
+            self._write("".join(echo))
+            self._flush()
+
+    def _end_of_input(self):
+        self.eof = True
+        # Whatever was typed before the end still counts as a line
+        if self.partial:
+            self.lines.append("".join(self.partial))
+            self.partial.clear()
+
+    # --- What the game calls ---
+
+    def read_line(self):
+        """
+        Returns the next line: the oldest typed-ahead one right away, or
+        else what the player types next (echoed as it is typed).
+        Raises EOFError at the end of input, like input().
+        """
+        if not self.lines:
+            if self.partial:
+                # Show what was typed ahead of the prompt
+                self._write("".join(self.partial))
+                self._flush()
+            self._echo = True
+            try:
+                while not self.lines and not self.eof:
+                    self.wait(None)
+            finally:
+                self._echo = False
+            if not self.lines:
+                raise EOFError
+        else:
+            # Show the queued line as if it had just been typed
+            self._write(self.lines[0] + "\n")
+            self._flush()
+        self.lines_read += 1
+        return self.lines.popleft()
+
+    def wait_key(self):
+        """
+        Waits for any key ("Press Enter to continue"). An Enter is used
+        up; other keys start the next line. Returns at once if the player
+        has already typed ahead. The cursor always ends on the next line.
+        """
+        while not self.lines and not self.partial and not self.eof:
+            self.wait(None)
+        if self.lines and self.lines[0] == "":
+            self.lines.popleft()
+        self._write("\n")
+        self._flush()
+
+    def key_pressed(self):
+        """
+        Skip check for the Animator: True if a key came since the last
+        check. A bare Enter is used up by the skip; anything else typed
+        stays for the next prompt.
+        """
+        self.wait(0)
+        if not self._keys:
+            return False
+        self._keys = 0
+        if self.lines and self.lines[-1] == "":
+            self.lines.pop()
+        return True
+
+    def stats(self):
+        """Returns the counters as a dict."""
+        return {
+            "keys_read": self.keys_read,
+            "lines_read": self.lines_read,
+            "lines_typed_ahead": self.lines_typed_ahead,
+        }
+
+
+@contextmanager
+def open_keyboard(write, flush, stream=None):
+    """
+    Puts the terminal behind stream (default sys.stdin) in cbreak mode
+    and yields a Keyboard reading it; the terminal settings are put back
+    on the way out, however the game ends. Yields None if the stream is
+    not a terminal or cbreak mode is not available.
+    """
+    stream = stream or sys.stdin
+    try:
+        import termios
+        import tty
+        fd = stream.fileno()
+    except (ImportError, AttributeError, ValueError, OSError):
+        fd = None
+    if fd is None or not os.isatty(fd):
+        yield None
+        return
+
+    saved = termios.tcgetattr(fd)
+
+    tty.setcbreak(fd)
+    keyboard = None
+    try:
+        keyboard = Keyboard(fd, write, flush)
+        yield keyboard
+    finally:
+        if keyboard:
+            keyboard.close()
+        termios.tcsetattr(fd, termios.TCSADRAIN, saved)
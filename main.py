@@ -1,5 +1,47 @@
+import argparse
+
 from game import SuperStarTrek
+from keyboard import open_keyboard
+from screen import ScreenBuffer
+from terminal import TerminalWriter, capabilities
+from galaxy_store import check_filled_size, galaxy_size
 # --- Run the Game ---
 if __name__ == "__main__":
-    game = SuperStarTrek()
-    game.run()
+    parser = argparse.ArgumentParser(description="Super Star Trek")
+    parser.add_argument("--record", metavar="FILE",
+                        help="append each finished game's replay log to FILE (see replay.py)")
+    parser.add_argument("--galaxy", type=galaxy_size, default=(8, 8), metavar="ROWSxCOLS",
+                        help="galaxy size in quadrants, e.g. 64x64 (default 8x8)")
+    parser.add_argument("--classic-galaxy", action="store_true",
+                        help="fill the whole galaxy at the start and re-randomize quadrants on every visit")
+    parser.add_argument("--fast-start", action="store_true",
+                        help="cut the intro animation to its last frame and show messages "
+                             "without the typewriter effect")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="time the game's hot paths and write them to FILE on exit "
+                             "(Prometheus text if it ends in .prom, else JSON lines)")
+    args = parser.parse_args()
+    if args.classic_galaxy:
+        try:
+            check_filled_size(*args.galaxy)
+        except ValueError as e:
+            parser.error(str(e))
+
+    out = TerminalWriter()
+    # Only send what changed each turn when drawing to a real terminal
+    screen = ScreenBuffer(write=out.write) if capabilities().is_tty else None
+    # Keys are read as they are typed when stdin is a terminal (keyboard.py)
+    with open_keyboard(out.write, out.flush) as keyboard:
+        game = SuperStarTrek(screen=screen, out=out, replay_path=args.record,
+                             galaxy_size=args.galaxy, procedural_galaxy=not args.classic_galaxy,
+                             fast_start=args.fast_start, keyboard=keyboard)
+        if args.profile:
+            from profiling import Profiler
+            profiler = Profiler()
+            profiler.attach(game)
+            try:
+                game.run()
+            finally:
+                profiler.write(args.profile)
+        else:
+            game.run()
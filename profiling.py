@@ -0,0 +1,198 @@
+"""
+Opt-in per-command profiling.
+
+A Profiler wraps the hot-path methods of the games attached to it:
+handle_command (one section per command), every execute_* method,
+enter_quadrant, klingons_fire_back, _process_message_queue and every
+_draw_* helper. Each call records into fixed power-of-two histograms:
+
+    wall_seconds   elapsed time
+    cpu_seconds    CPU time of the calling thread
+    output_bytes   characters the game wrote (before any screen diffing)
+    alloc_blocks   net change in allocated memory blocks
+
+Sections nest (handle_command includes the execute_* it runs), and each
+records its inclusive cost. In the terminal game, wall time of a section
+that waits for Enter (klingons_fire_back) includes the wait.
+
+    profiler = Profiler()
+    profiler.attach(game)
+    ...
+    profiler.write_prometheus("sst.prom")   # text format, replaced atomically
+    profiler.write_jsonl("sst.jsonl")       # one line appended per export
+
+Nothing is wrapped until attach(), so a game that is not profiled runs
+its plain methods with no checks or extra calls at all.
+"""
+import json
+import os
+import sys
+import time
+
+BUCKETS = 32 # Bucket i counts values below 2**i (in the histogram's unit)
+
+# Commands handle_command is profiled under; anything else is "other"
+COMMANDS = ("NAV", "SRS", "LRS", "PHA", "TOR", "SHE", "DAM", "COM", "XXX")
+
+# Metric name, help text, and the scale from recorded units to exported ones
+_METRICS = (
+    ("wall_seconds", "Wall time per call.", 1e-6),
+    ("cpu_seconds", "Thread CPU time per call.", 1e-6),
+    ("output_bytes", "Characters written per call.", 1),
+    ("alloc_blocks", "Net allocated memory blocks per call.", 1),
+)
+
+
+class Histogram:
+    """Counts of values in power-of-two buckets, plus their sum."""
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.total = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[min(max(int(value), 0).bit_length(), BUCKETS - 1)] += 1
+        self.total += value
+        self.count += 1
+
+
+class Section:
+    """The four histograms of one profiled method (see _METRICS)."""
+
+    __slots__ = ("wall", "cpu", "output", "alloc")
+
+    def __init__(self):
+        self.wall = Histogram()
+        self.cpu = Histogram()
+        self.output = Histogram()
+        self.alloc = Histogram()
+
+    def histograms(self):
+        return self.wall, self.cpu, self.output, self.alloc
+
+
+def profiled_methods(game):
+    """Names of the game methods a Profiler wraps."""
+    names = ["handle_command", "enter_quadrant", "klingons_fire_back", "_process_message_queue"]
+    names += sorted(name for name in dir(type(game))
+                    if name.startswith(("execute_", "_draw_")) and callable(getattr(game, name)))
+    return names
+
+
+class Profiler:
+    """
+    Collects section histograms from any number of games (e.g. every
+    session of a server, all running on one thread).
+    """
+
+    def __init__(self):
+        self.sections = {}
+        self.written = 0 # Characters written by attached games so far
+
+    def section(self, name):
+        stats = self.sections.get(name)
+        if stats is None:
+            stats = self.sections[name] = Section()
+        return stats
+
+    def _timed(self, method, pick):
+        """Wraps method so each call is recorded in the Section pick(args) returns."""
+        perf, cpu_time, blocks = time.perf_counter_ns, time.thread_time_ns, sys.getallocatedblocks
+
+        def timed(*args, **kwargs):
+            written = self.written
+            alloc = blocks()
+            cpu = cpu_time()
+            start = perf()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                wall = perf() - start
+                stats = pick(args)
+                stats.wall.observe(wall // 1000)
+                stats.cpu.observe((cpu_time() - cpu) // 1000)
+                stats.output.observe(self.written - written)
+                stats.alloc.observe(blocks() - alloc)
+        return timed
+
+    def attach(self, game):
+        """Starts profiling game by wrapping its methods on the instance."""
+        for name in profiled_methods(game):
+            if name == "handle_command":
+                sections = {c: self.section(f"handle_command:{c}") for c in COMMANDS}
+                other = self.section("handle_command:other")
+                pick = lambda args, sections=sections, other=other: sections.get(args[0], other)
+            else:
+                stats = self.section(name)
+                pick = lambda args, stats=stats: stats
+            setattr(game, name, self._timed(getattr(game, name), pick))
+
+        write = game._write
+
+        def counted_write(text):
+            self.written += len(text)
+            write(text)
+        game._write = counted_write
+        # The animator was handed the plain _write when the game was built
+        game.animator._write = counted_write
+
+    def detach(self, game):
+        """Stops profiling game; its plain methods are used again."""
+        for name in profiled_methods(game) + ["_write"]:
+            game.__dict__.pop(name, None)
+        game.animator._write = game._write
+
+    # --- Export ---
+
+    def to_dict(self):
+        """All sections as {name: {metric: {"sum", "count", "buckets"}}}, in recorded units."""
+        return {
+            name: {metric: {"sum": h.total, "count": h.count, "buckets": list(h.counts)}
+                   for (metric, _, _), h in zip(_METRICS, stats.histograms())}
+            for name, stats in sorted(self.sections.items())
+        }
+
+    def write_jsonl(self, path):
+        """Appends one JSON line with the time and every section's histograms."""
+        with open(path, "a") as f:
+            f.write(json.dumps({"time": time.time(), "sections": self.to_dict()}) + "\n")
+
+    def prometheus_text(self, prefix="sst_section"):
+        """The histograms in Prometheus text exposition format."""
+        lines = []
+        for index, (metric, help_text, scale) in enumerate(_METRICS):
+            full = f"{prefix}_{metric}"
+            lines.append(f"# HELP {full} {help_text}")
+            lines.append(f"# TYPE {full} histogram")
+            for name, stats in sorted(self.sections.items()):
+                h = stats.histograms()[index]
+                label = f'section="{name}"'
+                cumulative = 0
+                for i, count in enumerate(h.counts[:-1]):
+                    cumulative += count
+                    lines.append(f'{full}_bucket{{{label},le="{(1 << i) * scale:g}"}} {cumulative}')
+                lines.append(f'{full}_bucket{{{label},le="+Inf"}} {h.count}')
+                lines.append(f"{full}_sum{{{label}}} {h.total * scale:g}")
+                lines.append(f"{full}_count{{{label}}} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """
+        Writes prometheus_text() to path through a temporary file, so a
+        scraper reading it (e.g. a node_exporter textfile collector)
+        never sees half a file.
+        """
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(temp, path)
+
+    def write(self, path):
+        """Writes Prometheus text if path ends in .prom, otherwise appends JSON lines."""
+        if path.endswith(".prom"):
+            self.write_prometheus(path)
+        else:
+            self.write_jsonl(path)
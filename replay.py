@@ -0,0 +1,164 @@
+"""
+Game records and headless replay.
+
+Every game keeps a ReplayLog: its seed, difficulty, galaxy size and
+kind, any pre-generated galaxy and each command with the answers given to its prompts. Since
+all of a game's random numbers come from its seed (see GameRandom in
+utils.py), re-running the commands on a HeadlessStarTrek with the same
+seed reproduces the game exactly, at full speed:
+
+    python main.py --record games.jsonl      # play, recording each game
+    python replay.py games.jsonl             # replay and verify them
+
+Logs are stored one JSON object per line, so a file can collect many
+games. finish() stores a digest of the final state; replay() checks the
+replayed game ends in the same state.
+"""
+import hashlib
+import json
+import sys
+
+from utils import Difficulty, DIFFICULTIES, STANDARD
+
+_DIFFICULTY_FIELDS = ("name", "shield_multiplier", "base_klingon_shields",
+                      "energy_divisor", "initial_klingons", "initial_starbases")
+
+
+def state_digest(game):
+    """Returns a short hash of a game's state, including the whole galaxy."""
+    data = repr(game.state()).encode() + game.galaxy.fingerprint()
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def _difficulty_from_dict(fields):
+    """Returns the matching preset, or a new Difficulty for custom values."""
+    for difficulty in DIFFICULTIES:
+        if all(getattr(difficulty, f) == fields[f] for f in _DIFFICULTY_FIELDS):
+            return difficulty
+    return Difficulty(**fields)
+
+
+class ReplayLog:
+    """The seed and command stream of one game."""
+
+    def __init__(self, seed, difficulty=None, galaxy=None, commands=None, final=None,
+                 galaxy_size=(8, 8), procedural=False):
+        self.seed = seed
+        self.difficulty = difficulty
+        self.galaxy = galaxy
+        self.galaxy_size = tuple(galaxy_size)
+        self.procedural = procedural
+        # Each entry is [command, answer, answer, ...]
+        self.commands = commands if commands is not None else []
+        self.final = final
+
+    # --- Recording (called by the game) ---
+
+    def set_difficulty(self, difficulty):
+        self.difficulty = difficulty
+
+    def set_galaxy_options(self, galaxy_size, procedural):
+        self.galaxy_size = tuple(galaxy_size)
+        self.procedural = procedural
+
+    def set_galaxy(self, galaxy):
+        self.galaxy = [[int(v) for v in row] for row in galaxy]
+
+    def add_command(self, command):
+        self.commands.append([command])
+
+    def add_answer(self, answer):
+        """Records an answer to the current command's prompt."""
+        # Answers before the first command (difficulty menu, Y/N/I) only
+        # set up the game; the difficulty is recorded on its own.
+        if self.commands:
+            self.commands[-1].append(answer)
+
+    def finish(self, game):
+        """Records the digest of the game's final state."""
+        self.final = state_digest(game)
+
+    # --- Storage ---
+
+    def to_dict(self):
+        difficulty = None
+        if self.difficulty is not None:
+            difficulty = {f: getattr(self.difficulty, f) for f in _DIFFICULTY_FIELDS}
+        return {
+            "seed": self.seed,
+            "difficulty": difficulty,
+            "galaxy_size": list(self.galaxy_size),
+            "procedural": self.procedural,
+            "galaxy": self.galaxy,
+            "commands": self.commands,
+            "final": self.final,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        difficulty = data.get("difficulty")
+        if difficulty is not None:
+            difficulty = _difficulty_from_dict(difficulty)
+        return cls(data["seed"], difficulty, data.get("galaxy"),
+                   data.get("commands", []), data.get("final"),
+                   data.get("galaxy_size", (8, 8)),
+                   # Logs from before procedural galaxies used the classic fill
+                   data.get("procedural", False))
+
+    def dumps(self):
+        """Returns the log as one compact JSON line."""
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+
+    @classmethod
+    def loads(cls, line):
+        return cls.from_dict(json.loads(line))
+
+    def save(self, path):
+        """Appends the log to a file."""
+        with open(path, "a") as f:
+            f.write(self.dumps() + "\n")
+
+    @classmethod
+    def load_all(cls, path):
+        """Returns every log in a file."""
+        with open(path) as f:
+            return [cls.loads(line) for line in f if line.strip()]
+
+
+def replay(log):
+    """
+    Re-runs a logged game headlessly. Returns (game, matches) where
+    matches is True if the final state equals the recorded one (or None
+    if the log has no final digest).
+    """
+    from engine import HeadlessStarTrek
+
+    game = HeadlessStarTrek(log.difficulty or STANDARD, seed=log.seed, galaxy=log.galaxy,
+                            galaxy_size=log.galaxy_size, procedural_galaxy=log.procedural)
+    for command, *answers in log.commands:
+        if not game.is_running:
+            break
+        game.step(command, answers)
+
+    matches = None if log.final is None else state_digest(game) == log.final
+    return game, matches
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print("usage: python replay.py GAMES.jsonl")
+        return 2
+
+    failures = 0
+    for i, log in enumerate(ReplayLog.load_all(argv[0]), 1):
+        game, matches = replay(log)
+        result = {True: "OK", False: "MISMATCH", None: "UNVERIFIED"}[matches]
+        failures += matches is False
+        print(f"game {i}: seed {log.seed}, {len(log.commands)} commands, "
+              f"{game.game_over_reason or 'RUNNING'} at stardate {game.stardate:.1f}: {result}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
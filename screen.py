@@ -0,0 +1,290 @@
+"""
+Double-buffered, diff-based screen renderer.
+
+The game writes its usual ANSI output (cursor moves, clears, colors and
+text) into a ScreenBuffer instead of the terminal. The buffer keeps a
+virtual screen of rows x cells with attributes, and flush() sends only the
+cells that changed since the last flush, with cursor moves coalesced.
+Redrawing an unchanged map or panel therefore costs nothing on the wire.
+"""
+import re
+import sys
+
+from terminal import capabilities
+
+# Escape sequences (CSI ... final byte, or any other ESC x), line breaks,
+# or runs of plain text
+_TOKEN_PATTERN = re.compile(r'\x1b\[([0-9;?]*)([@-~])|\x1b.|[\n\r]|[^\x1b\n\r]+', re.S)
+
+# Attribute tuple: (bold, blink, foreground, background)
+NORMAL = (False, False, 0, 0)
+
+# Gaps of unchanged cells up to this size are re-sent instead of moving the
+# cursor, since a cursor move costs more bytes than a few characters.
+_MAX_GAP = 4
+
+
+def _apply_sgr(attr, params):
+    """Returns the attribute tuple after an SGR (ESC[...m) sequence."""
+    bold, blink, fg, bg = attr
+    for p in (params.split(';') if params else ['0']):
+        if not p.isdigit():
+            continue
+        code = int(p)
+        if code == 0:
+            bold, blink, fg, bg = NORMAL
+        elif code == 1:
+            bold = True
+        elif code == 22:
+            bold = False
+        elif code == 5:
+            blink = True
+        elif code == 25:
+            blink = False
+        elif 30 <= code <= 37 or 90 <= code <= 97:
+            fg = code
+        elif code == 39:
+            fg = 0
+        elif 40 <= code <= 47 or 100 <= code <= 107:
+            bg = code
+        elif code == 49:
+            bg = 0
+    return (bold, blink, fg, bg)
+
+
+_sgr_cache = {}
+
+
+def _sgr(attr):
+    """Returns the escape sequence that sets exactly this attribute tuple."""
+    seq = _sgr_cache.get(attr)
+    if seq is None:
+        bold, blink, fg, bg = attr
+        codes = ['0']
+        if bold: codes.append('1')
+        if blink: codes.append('5')
+        if fg: codes.append(str(fg))
+        if bg: codes.append(str(bg))
+        seq = _sgr_cache[attr] = f"\033[{';'.join(codes)}m"
+    return seq
+
+
+class ScreenBuffer:
+    """
+    A virtual terminal screen that emits only what changed.
+
+    Args:
+        rows, cols (int): Screen size. Defaults to the real terminal size.
+        write (callable): Where flushed output goes (default sys.stdout.write).
+    """
+
+    def __init__(self, rows=None, cols=None, write=None):
+        if rows is None or cols is None:
+            caps = capabilities()
+            rows = rows or caps.rows
+            cols = cols or caps.cols
+        self.rows = rows
+        self.cols = cols
+        self._out = write or sys.stdout.write
+
+        # The frame being drawn
+        self._chars = [[' '] * cols for _ in range(rows)]
+        self._attrs = [[NORMAL] * cols for _ in range(rows)]
+        # What the terminal is showing (None = row contents unknown)
+        self._shown_chars = [None] * rows
+        self._shown_attrs = [None] * rows
+
+        # Virtual cursor (1-based) and current attribute
+        self.row = 1
+        self.col = 1
+        self.attr = NORMAL
+
+        # Where the real terminal's cursor/attribute are (None = unknown)
+        self._term_pos = None
+        self._term_attr = None
+        self._cleared = True
+
+    # --- Writing into the virtual screen ---
+
+    def write(self, text):
+        """Interprets text (with ANSI codes) into the virtual screen."""
+        for match in _TOKEN_PATTERN.finditer(text):
+            token = match.group(0)
+            final = match.group(2)
+            if final is not None:
+                self._control(match.group(1), final)
+            elif token == '\n':
+                self.col = 1
+                self._line_feed()
+            elif token == '\r':
+                self.col = 1
+            elif token[0] != '\x1b':
+                self._put_text(token)
+
+    def _control(self, params, final):
+        if final == 'm':
+            self.attr = _apply_sgr(self.attr, params)
+        elif final in 'Hf':
+            parts = params.split(';') if params else []
+            row = int(parts[0]) if parts and parts[0].isdigit() else 1
+            col = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 1
+            self.row = min(max(row, 1), self.rows)
+            self.col = min(max(col, 1), self.cols)
+        elif final == 'K':
+            self._clear_cells(self.row - 1, self.col - 1, self.cols)
+        elif final == 'J':
+            if params == '2':
+                self.clear()
+            else:
+                self._clear_cells(self.row - 1, self.col - 1, self.cols)
+                for r in range(self.row, self.rows):
+                    self._clear_cells(r, 0, self.cols)
+
+    def _put_text(self, text):
+        attr = self.attr
+        for ch in text:
+            if self.col > self.cols:
+                self.col = 1
+                self._line_feed()
+            r, c = self.row - 1, self.col - 1
+            self._chars[r][c] = ch
+            self._attrs[r][c] = attr
+            self.col += 1
+
+    def _line_feed(self):
+        if self.row < self.rows:
+            self.row += 1
+        else:
+            # Scroll the virtual screen; the diff repaints what moved
+            self._chars.pop(0)
+            self._attrs.pop(0)
+            self._chars.append([' '] * self.cols)
+            self._attrs.append([NORMAL] * self.cols)
+
+    def _clear_cells(self, r, start, end):
+        chars, attrs = self._chars[r], self._attrs[r]
+        for c in range(start, end):
+            chars[c] = ' '
+            attrs[c] = NORMAL
+
+    def clear(self):
+        """Clears the whole screen (ESC[2J). The next flush sends one clear code."""
+        for r in range(self.rows):
+            self._clear_cells(r, 0, self.cols)
+        self._cleared = True
+
+    # --- Terminal state changes we did not draw ourselves ---
+
+    def invalidate(self):
+        """Forgets what the terminal shows, forcing a full repaint."""
+        self._shown_chars = [None] * self.rows
+        self._shown_attrs = [None] * self.rows
+        self._term_pos = None
+        self._term_attr = None
+
+    def note_line_input(self):
+        """
+        Accounts for a line typed at the cursor: the echoed text is on the
+        current row and Enter moved the cursor to the start of the next.
+        """
+        r = self.row - 1
+        self._shown_chars[r] = None
+        self._shown_attrs[r] = None
+        self.col = 1
+        if self.row < self.rows:
+            self.row += 1
+        else:
+            # The real terminal scrolled, and so did what it shows
+            for shown in (self._shown_chars, self._shown_attrs):
+                shown.pop(0)
+                shown.append(None)
+        self._term_pos = (self.row, 1)
+
+    # --- Emitting the difference ---
+
+    def render(self):
+        """Returns the output that brings the terminal up to date with the buffer."""
+        out = []
+        if self._cleared:
+            out.append("\033[0m\033[H\033[2J")
+            self._term_attr = NORMAL
+            self._term_pos = (1, 1)
+            blank_chars = [' '] * self.cols
+            blank_attrs = [NORMAL] * self.cols
+            self._shown_chars = [list(blank_chars) for _ in range(self.rows)]
+            self._shown_attrs = [list(blank_attrs) for _ in range(self.rows)]
+            self._cleared = False
+
+        for r in range(self.rows):
+            self._render_row(r, out)
+
+        # Leave the real cursor and color where the game expects them
+        pos = (self.row, min(self.col, self.cols))
+        if self._term_pos != pos:
+            out.append(f"\033[{pos[0]};{pos[1]}H")
+            self._term_pos = pos
+        if self._term_attr != self.attr:
+            out.append(_sgr(self.attr))
+            self._term_attr = self.attr
+        return ''.join(out)
+
+    def _render_row(self, r, out):
+        chars, attrs = self._chars[r], self._attrs[r]
+        shown_chars, shown_attrs = self._shown_chars[r], self._shown_attrs[r]
+        cols = self.cols
+
+        # Everything after `tail` is blank, so it can be cleared with ESC[K
+        tail = cols
+        while tail > 0 and chars[tail - 1] == ' ' and attrs[tail - 1] == NORMAL:
+            tail -= 1
+
+        if shown_chars is None:
+            changed = list(range(tail))
+            needs_erase = True
+        else:
+            changed = [c for c in range(tail)
+                       if chars[c] != shown_chars[c] or attrs[c] != shown_attrs[c]]
+            needs_erase = any(shown_chars[c] != ' ' or shown_attrs[c] != NORMAL
+                              for c in range(tail, cols))
+        if not changed and not needs_erase:
+            return
+
+        # Group changed cells into spans, bridging small gaps
+        spans = []
+        for c in changed:
+            if spans and c - spans[-1][1] <= _MAX_GAP:
+                spans[-1][1] = c + 1
+            else:
+                spans.append([c, c + 1])
+
+        for start, end in spans:
+            self._move(r + 1, start + 1, out)
+            for c in range(start, end):
+                attr = attrs[c]
+                if attr != self._term_attr:
+                    out.append(_sgr(attr))
+                    self._term_attr = attr
+                out.append(chars[c])
+            # Past the last column the cursor position is terminal-specific
+            self._term_pos = (r + 1, end + 1) if end < cols else None
+
+        if needs_erase:
+            self._move(r + 1, tail + 1, out)
+            if self._term_attr != NORMAL:
+                out.append(_sgr(NORMAL))
+                self._term_attr = NORMAL
+            out.append("\033[K")
+
+        self._shown_chars[r] = list(chars)
+        self._shown_attrs[r] = list(attrs)
+
+    def _move(self, row, col, out):
+        if self._term_pos != (row, col):
+            out.append(f"\033[{row};{col}H")
+            self._term_pos = (row, col)
+
+    def flush(self):
+        """Sends the changes since the last flush to the terminal."""
+        data = self.render()
+        if data:
+            self._out(data)
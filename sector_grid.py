@@ -0,0 +1,157 @@
+"""
+Occupancy grid for the sectors of the current quadrant.
+
+One byte per sector says what is there (EMPTY, ENTERPRISE, KLINGON,
+STARBASE or STAR) and a second byte holds the entity's index in its
+list (e.g. which entry of quadrant_klingons). Collision and hit tests
+are a single index lookup instead of a scan over every object, and the
+grid is updated in place as things move or are destroyed.
+
+The grid also keeps the free sectors in a swap-remove array, so a
+random free sector is one draw with no retries however full the
+quadrant is.
+
+Sectors are addressed 1-8 like the rest of the game.
+"""
+
+EMPTY = 0
+ENTERPRISE = 1
+KLINGON = 2
+STARBASE = 3
+STAR = 4
+
+
+class SectorGrid:
+    """Entity codes and ids for a rows x cols quadrant."""
+
+    __slots__ = ("rows", "cols", "codes", "ids", "version", "_free", "_slot",
+                 "_all_free", "_all_slot")
+
+    def __init__(self, rows=8, cols=8):
+        self.rows = rows
+        self.cols = cols
+        # Row-major with a 1-based index: sector (r, c) is at r * (cols + 1) + c,
+        # so row/column 0 are unused padding
+        size = (rows + 1) * (cols + 1)
+        self.codes = bytearray(size)
+        self.ids = bytearray(size)
+        # Bumped on every change, so drawings of the grid can be cached
+        self.version = 0
+        # Indexes of the empty sectors, in no particular order, and where
+        # each sector's index sits in that list (-1 if occupied)
+        # (built once and copied on every clear)
+        self._all_free = [r * (cols + 1) + c
+                          for r in range(1, rows + 1) for c in range(1, cols + 1)]
+        self._all_slot = [-1] * size
+        for n, i in enumerate(self._all_free):
+            self._all_slot[i] = n
+        self._reset_free()
+
+    def _reset_free(self):
+        self._free = self._all_free.copy()
+        self._slot = self._all_slot.copy()
+
+    def _take(self, i):
+        """Drops sector index i from the free list (swap with the last entry)."""
+        n = self._slot[i]
+        if n < 0:
+            return
+        last = self._free.pop()
+        if last != i:
+            self._free[n] = last
+            self._slot[last] = n
+        self._slot[i] = -1
+
+    def _release(self, i):
+        """Adds sector index i to the free list."""
+        if self._slot[i] < 0:
+            self._slot[i] = len(self._free)
+            self._free.append(i)
+
+    def _index(self, r, c):
+        return r * (self.cols + 1) + c
+
+    def in_bounds(self, r, c):
+        return 1 <= r <= self.rows and 1 <= c <= self.cols
+
+    def clear(self):
+        """Empties every sector."""
+        self.codes[:] = bytes(len(self.codes))
+        self.ids[:] = bytes(len(self.ids))
+        self._reset_free()
+        self.version += 1
+
+    def code_at(self, r, c):
+        """What is in sector r,c (EMPTY if nothing)."""
+        return self.codes[r * (self.cols + 1) + c]
+
+    def id_at(self, r, c):
+        """The list index of the entity in sector r,c."""
+        return self.ids[r * (self.cols + 1) + c]
+
+    def is_free(self, r, c):
+        return self.codes[r * (self.cols + 1) + c] == EMPTY
+
+    def place(self, r, c, code, ident=0):
+        """Puts an entity in sector r,c."""
+        i = self._index(r, c)
+        self.codes[i] = code
+        self.ids[i] = ident
+        self._take(i)
+        self.version += 1
+
+    def remove(self, r, c):
+        """Empties sector r,c."""
+        i = self._index(r, c)
+        self.codes[i] = EMPTY
+        self.ids[i] = 0
+        self._release(i)
+        self.version += 1
+
+    def move(self, r1, c1, r2, c2):
+        """Moves whatever is in sector r1,c1 to r2,c2."""
+        if (r1, c1) == (r2, c2):
+            return
+        i, j = self._index(r1, c1), self._index(r2, c2)
+        self.codes[j] = self.codes[i]
+        self.ids[j] = self.ids[i]
+        self.codes[i] = EMPTY
+        self.ids[i] = 0
+        self._take(j)
+        self._release(i)
+        self.version += 1
+
+    def free_count(self):
+        """Number of empty sectors."""
+        return len(self._free)
+
+    def free_order(self):
+        """
+        The free list as bytes of sector indexes. Random draws depend on
+        its order, so a snapshot keeps it to resume with the same draws.
+        """
+        return bytes(self._free)
+
+    def set_free_order(self, order):
+        """Restores the order saved by free_order() for the same occupancy."""
+        order = list(order)
+        if len(order) != len(self._free) or any(self._slot[i] < 0 for i in order):
+            raise ValueError("free sector order does not match the grid")
+        self._free = order
+        slot = self._slot
+        for n, i in enumerate(order):
+            slot[i] = n
+
+    def random_free(self, rng):
+        """
+        Returns a uniformly random empty sector (r, c), using one
+        rng.random() draw. Raises IndexError if the grid is full.
+        """
+        if not self._free:
+            raise IndexError("no free sector left")
+        return divmod(self._free[int(rng.random() * len(self._free))], self.cols + 1)
+
+    def row_codes(self, r):
+        """The codes of row r, columns 1..cols."""
+        start = r * (self.cols + 1) + 1
+        return self.codes[start:start + self.cols]
@@ -0,0 +1,349 @@
+"""
+Multi-session game server.
+
+Hosts many SuperStarTrek games in one process on asyncio, one coroutine
+per player and no threads. Connect with any telnet client:
+
+    python server.py --port 2323
+    telnet localhost 2323
+
+Each GameSession is a SuperStarTrek whose terminal hooks record output
+into a script instead of writing to stdout: text, animation holds and
+"press Enter" pauses. The session's play() coroutine runs the same
+steps as SuperStarTrek.run(), and whenever the game needs a line of
+input it sends the script to the client (sleeping through the holds,
+waiting for Enter at the pauses) and awaits the reply.
+
+Limits per session:
+  - idle_timeout: seconds to wait for a line before disconnecting.
+  - max_line: longest accepted input line, in bytes.
+  - max_output: most output a session may build up between two inputs
+    (animation holds and pauses count too).
+  - max_memory: most memory a session may hold at a prompt, roughly: its
+    pending output, its replay log and its galaxy's stored state.
+"""
+import argparse
+import asyncio
+import re
+
+from animation import Animator
+from game import SuperStarTrek
+from profiling import Profiler
+from galaxy_store import galaxy_size
+
+# Telnet commands to strip from input: subnegotiations (IAC SB ... IAC SE),
+# option requests (IAC WILL/WONT/DO/DONT x), other commands and escaped 0xFF
+_TELNET_PATTERN = re.compile(rb'\xff\xfa.*?\xff\xf0|\xff[\xfb-\xfe].|\xff[\xf0-\xfa]|\xff\xff', re.S)
+
+# Script marker for "wait for Enter"
+PAUSE = object()
+
+# If the client has this many bytes not yet sent, animation holds are
+# dropped so the session catches up instead of falling further behind.
+_BEHIND_BYTES = 16 * 1024
+
+# What a hold or pause in the script counts for against max_output, and
+# the per-input overhead of the replay log, in bytes
+_SCRIPT_ITEM_BYTES = 16
+_LOG_ENTRY_BYTES = 64
+
+
+class SessionClosed(Exception):
+    """The client left, went idle or broke a session limit."""
+
+
+class GameSession(SuperStarTrek):
+    """
+    One player's game, driven by an asyncio reader/writer pair.
+
+    Args:
+        reader, writer: The connection's asyncio streams.
+        idle_timeout (float): Seconds to wait for input.
+        max_output (int): Most bytes of output between two inputs.
+        max_memory (int): Most bytes the session may hold (see memory_use()).
+        animation_speed (float): Animation speed factor. 0 = instant.
+        galaxy_size (tuple): (rows, cols) of quadrants in each game.
+        fast_start (bool): Cut the intro short and drop the typewriter effect (see SuperStarTrek).
+    """
+
+    def __init__(self, reader, writer, idle_timeout=600, max_output=256 * 1024,
+                 max_memory=16 * 1024 * 1024, animation_speed=1.0, galaxy_size=(8, 8),
+                 fast_start=False):
+        self.reader = reader
+        self.writer = writer
+        self.idle_timeout = idle_timeout
+        self.max_output = max_output
+        self.max_memory = max_memory
+        self._script = []
+        self._script_bytes = 0
+        self._replay_bytes = 0
+        super().__init__(galaxy_size=galaxy_size, fast_start=fast_start,
+                         animation_speed=animation_speed)
+
+    def _attach_terminal(self, out, keyboard, animation_speed):
+        # No local terminal or keyboard. Holds are recorded, not slept;
+        # _send_script plays them back
+        self.out = self.keyboard = None
+        self.animator = Animator(self._write, self._flush, sleep=self._sleep,
+                                 clock=None, speed=animation_speed)
+
+    def reset_state(self, seed=None):
+        super().reset_state(seed)
+        self._replay_bytes = 0
+
+    def submit(self, response):
+        self._replay_bytes += len(response) + _LOG_ENTRY_BYTES
+        super().submit(response)
+
+    def memory_use(self):
+        """Rough bytes held by the session: pending output, replay log and galaxy."""
+        return self._script_bytes + self._replay_bytes + self.galaxy.memory_estimate()
+
+    # --- Terminal I/O hooks: record into the script ---
+
+    def _record(self, item, size):
+        self._script.append(item)
+        self._script_bytes += size
+        if self._script_bytes > self.max_output:
+            raise SessionClosed("output limit exceeded")
+
+    def _write(self, text):
+        self._record(text, len(text))
+
+    def _flush(self):
+        pass
+
+    def _sleep(self, seconds):
+        self._record(seconds, _SCRIPT_ITEM_BYTES)
+
+    def _pause(self, prompt="Press Enter to continue..."):
+        self._write(prompt)
+        self._record(PAUSE, _SCRIPT_ITEM_BYTES)
+
+    def _clear_screen(self):
+        self._write("\033[H\033[2J")
+
+    def _read_line(self, prompt):
+        raise RuntimeError("a session reads input with await self._ask()")
+
+    # --- Async I/O ---
+
+    async def _send(self, chunks):
+        """Sends the text chunks collected so far in one write."""
+        if chunks:
+            data = ''.join(chunks).replace("\n", "\r\n")
+            chunks.clear()
+            self.writer.write(data.encode("utf-8", errors="replace"))
+            await self.writer.drain()
+
+    async def _send_script(self):
+        """Sends the recorded output, playing its holds and pauses."""
+        script = self._script
+        self._script = []
+        self._script_bytes = 0
+        chunks = []
+        for item in script:
+            if item.__class__ is str:
+                chunks.append(item)
+            elif item is PAUSE:
+                await self._send(chunks)
+                await self._readline()
+            elif item > 0:
+                if self.writer.transport.get_write_buffer_size() > _BEHIND_BYTES:
+                    continue # Behind: drop the hold, the text still goes out
+                await self._send(chunks)
+                await asyncio.sleep(item)
+        await self._send(chunks)
+
+    async def _readline(self):
+        """Reads one line from the client, without telnet commands."""
+        try:
+            data = await asyncio.wait_for(self.reader.readline(), self.idle_timeout)
+        except asyncio.TimeoutError:
+            raise SessionClosed("idle timeout")
+        except ValueError:
+            # Line longer than the stream's limit
+            raise SessionClosed("input line too long")
+        if not data:
+            raise SessionClosed("connection closed")
+        data = _TELNET_PATTERN.sub(b'', data)
+        return data.decode("utf-8", errors="ignore").rstrip("\r\n")
+
+    async def _ask(self, prompt):
+        """Shows a prompt and returns the player's answer."""
+        self._write(prompt)
+        if self.memory_use() > self.max_memory:
+            raise SessionClosed("memory limit exceeded")
+        await self._send_script()
+        return await self._readline()
+
+    async def _prompt_and_submit_async(self):
+        self.submit(await self._ask(self._next_prompt()))
+
+    # --- The game, step for step like SuperStarTrek.run() ---
+
+    async def play(self):
+        """Plays games with the client until they quit or disconnect."""
+        while True:
+            # --- 1. SETUP ---
+            self._write("\033[15;1H\033[J")
+            self.setup_game()
+            # --- 2. SELECT DIFFICULTY ---
+            self.ask_difficulty()
+            while self.input_handler:
+                self._process_message_queue(use_full_width=True)
+                await self._prompt_and_submit_async()
+            if not self.is_running:
+                break
+
+            # --- 3. ANIMATION AND BRIEFING ---
+            self.show_intro_animation()
+            self.show_mission_briefing()
+
+            # --- 4. ACCEPT COMMAND (Y/N/I) ---
+            self.ask_accept_command()
+            while self.input_handler:
+                self._process_message_queue(use_full_width=True)
+                await self._prompt_and_submit_async()
+            if not self.is_running:
+                break
+
+            # --- 5. MAIN GAME LOOP ---
+            self._clear_screen()
+            while self.is_running:
+                if self._start_turn():
+                    await self._prompt_and_submit_async()
+                    self._check_end_conditions()
+
+            # --- 6. GAME ENDS ---
+            self.replay_log.finish(self)
+            self._write("\033[11;1H\033[J")
+            self._process_message_queue(use_full_width=True)
+            self._show_end_report()
+            if self._handle_replay_answer(await self._ask(self.REPLAY_PROMPT)):
+                self.reset_state()
+                self._clear_screen()
+            else:
+                break
+
+        await self._send_script()
+
+
+class GameServer:
+    """
+    Accepts telnet connections and runs a GameSession for each.
+
+    Args:
+        host, port: Where to listen.
+        max_sessions (int): Connections beyond this are turned away.
+        max_line (int): Longest accepted input line, in bytes.
+        profiler (Profiler, optional): Attached to every session.
+        Other keyword arguments are passed to each GameSession.
+    """
+
+    def __init__(self, host="0.0.0.0", port=2323, max_sessions=1000,
+                 max_line=1024, profiler=None, **session_options):
+        self.host = host
+        self.port = port
+        self.max_sessions = max_sessions
+        self.max_line = max_line
+        self.profiler = profiler
+        self.session_options = session_options
+        self.sessions = set()
+
+    async def handle_client(self, reader, writer):
+        if len(self.sessions) >= self.max_sessions:
+            writer.write(b"ALL STARSHIPS ARE IN USE. PLEASE TRY AGAIN LATER.\r\n")
+            await self._close(writer)
+            return
+
+        session = GameSession(reader, writer, **self.session_options)
+        if self.profiler:
+            self.profiler.attach(session)
+        self.sessions.add(session)
+        try:
+            await session.play()
+        except SessionClosed as e:
+            if str(e) != "connection closed":
+                try:
+                    writer.write(f"\r\n*** SESSION ENDED: {str(e).upper()} ***\r\n".encode())
+                except Exception:
+                    pass
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.sessions.discard(session)
+            await self._close(writer)
+
+    async def _close(self, writer):
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except Exception:
+            pass
+
+    async def serve_forever(self):
+        server = await asyncio.start_server(self.handle_client, self.host, self.port,
+                                            limit=self.max_line)
+        async with server:
+            await server.serve_forever()
+
+    async def export_profile(self, path, interval):
+        """Writes the profiler's histograms to path every interval seconds."""
+        while True:
+            await asyncio.sleep(interval)
+            self.profiler.write(path)
+
+    async def run(self, profile_path=None, profile_interval=10):
+        """Serves, exporting the profile (if any) alongside."""
+        if self.profiler and profile_path:
+            export = asyncio.create_task(self.export_profile(profile_path, profile_interval))
+            try:
+                await self.serve_forever()
+            finally:
+                export.cancel()
+                self.profiler.write(profile_path)
+        else:
+            await self.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Super Star Trek over telnet.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=2323)
+    parser.add_argument("--max-sessions", type=int, default=1000)
+    parser.add_argument("--idle-timeout", type=float, default=600,
+                        help="seconds without input before a session is dropped")
+    parser.add_argument("--max-line", type=int, default=1024,
+                        help="longest input line in bytes")
+    parser.add_argument("--max-output", type=int, default=256 * 1024,
+                        help="most output bytes a session may build up between inputs")
+    parser.add_argument("--max-memory", type=int, default=16 * 1024 * 1024,
+                        help="most bytes a session may hold: pending output, replay log, galaxy")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="animation speed factor (0 = no animations)")
+    parser.add_argument("--galaxy", type=galaxy_size, default=(8, 8), metavar="ROWSxCOLS",
+                        help="galaxy size in quadrants, e.g. 64x64 (default 8x8)")
+    parser.add_argument("--fast-start", action="store_true",
+                        help="cut the intro animation to its last frame and drop the typewriter effect")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="time every session's hot paths and write them to FILE "
+                             "(Prometheus text if it ends in .prom, else JSON lines)")
+    parser.add_argument("--profile-interval", type=float, default=10,
+                        help="seconds between profile exports (default 10)")
+    args = parser.parse_args(argv)
+
+    server = GameServer(args.host, args.port, max_sessions=args.max_sessions,
+                        max_line=args.max_line, idle_timeout=args.idle_timeout,
+                        max_output=args.max_output, max_memory=args.max_memory,
+                        animation_speed=args.speed,
+                        galaxy_size=args.galaxy, fast_start=args.fast_start,
+                        profiler=Profiler() if args.profile else None)
+    try:
+        asyncio.run(server.run(args.profile, args.profile_interval))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
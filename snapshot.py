@@ -0,0 +1,390 @@
+"""
+Binary game snapshots and a memory-mapped snapshot slab.
+
+A snapshot is the full game state packed into one fixed-size record with
+a single precompiled struct.Struct: no pickling and no per-field
+objects, so packing or restoring a game takes microseconds.
+
+    data = pack(game)             # bytes, SNAPSHOT_SIZE long
+    unpack(data, other_game)      # restores into an existing game
+
+Record layout (little-endian, no padding):
+
+    header       magic "SST1", format version, galaxy rows and cols
+    position     quadrant q1,q2 and sector s1,s2
+    time         stardate, stardate_start, stardate_end, time_remaining
+    ship         energy, energy_start, shields, torpedoes
+    mission      klingons_total, klingons_start, starbases_total,
+                 flags (running, docked, hostile action, pause, procedural
+                 galaxy), end reason,
+                 and which time/ship values were ints rather than floats
+    difficulty   name and the five tuning values
+    damage       the 8 device states, in damage-dict order
+    quadrant     up to 7 Klingons (s1, s2, shields), the starbase, up to 15 stars
+    free sectors the sector grid's free list, in order, since random
+                 sector draws pick by position in it
+    galaxy       ProceduralGalaxy.delta_bytes(), or GalaxyStore.to_bytes()
+                 (packed counts and known bitset) zero-padded to that size
+    rng          seed and the Mersenne Twister state of each GameRandom stream
+    input        pending input handler, its prompt and command_data
+                 (one value per key of _COMMAND_DATA_KEYS, flagged as
+                 absent, float or int)
+
+Only the standard 8x8 galaxy fits the fixed-size galaxy field; pack()
+and unpack() both refuse other sizes.
+
+Only the state the rules need is stored: queued messages, the screen
+and the replay log are not part of a snapshot.
+
+SnapshotSlab keeps many snapshots in one memory-mapped file, one fixed
+slot each, so a server can park idle games on disk and resume them.
+"""
+import mmap
+import os
+import struct
+
+from entities import Klingon, Star, Starbase
+from galaxy_store import GalaxyStore, ProceduralGalaxy, MAX_KLINGONS, MAX_STARS
+from utils import Difficulty, DIFFICULTIES, GameRandom
+
+MAGIC = b"SST1"
+VERSION = 4
+
+_REASONS = ("", "WIN", "TIME", "DESTROYED", "QUIT")
+_DAMAGE_KEYS = ("WARP_ENGINES", "SHORT_RANGE_SENSORS", "LONG_RANGE_SENSORS",
+                "PHASER_CONTROL", "PHOTON_TUBES", "DAMAGE_CONTROL",
+                "SHIELD_CONTROL", "LIBRARY_COMPUTER")
+_MT_WORDS = 625 # Mersenne Twister state: 624 words plus the index
+_MT_STATE = struct.Struct(f"<{_MT_WORDS}I")
+# Every key a pending prompt keeps in command_data (NAV, DAM and the
+# COM calculator)
+_COMMAND_DATA_KEYS = ("course", "repair_time", "q1", "s1", "qr1", "qc1", "sr1", "sc1")
+_ABSENT, _FLOAT, _INT = 0, 1, 2
+_CLASSIC_GALAXY_BYTES = len(GalaxyStore().to_bytes())
+_GALAXY_BYTES = len(ProceduralGalaxy().delta_bytes())
+_SECTORS = 64
+
+# Pending prompts whose render step must be rebuilt by re-asking
+_ASKERS = {
+    "handle_difficulty_select": "ask_difficulty",
+    "handle_y_n_i_input": "ask_accept_command",
+}
+
+_FORMAT = "<" + "".join((
+    "4s3H",                                 # magic, version, galaxy rows, cols
+    "4B",                                   # q1, q2, s1, s2
+    "4d",                                   # stardates, time_remaining
+    "3dh",                                  # energy, energy_start, shields, torpedoes
+    "3hBBB",                                # totals, flags, end reason, int mask
+    "16s3d2H",                              # difficulty
+    "8d",                                   # damage
+    "B" + "BBd" * MAX_KLINGONS,             # Klingons
+    "BBB",                                  # starbase: present, s1, s2
+    "B" + "BB" * MAX_STARS,                 # stars
+    f"{_SECTORS}s",                         # free sector order, zero-padded
+    f"{_GALAXY_BYTES}s",                    # galaxy changes or cells + known bits
+    "Q" + (f"{_MT_STATE.size}sdB" * len(GameRandom.STREAMS)), # rng
+    "32s96s" + "dB" * len(_COMMAND_DATA_KEYS), # pending input
+))
+SNAPSHOT = struct.Struct(_FORMAT)
+SNAPSHOT_SIZE = SNAPSHOT.size
+
+_FLAG_RUNNING = 1
+_FLAG_DOCKED = 2
+_FLAG_HOSTILE = 4
+_FLAG_PAUSE = 8
+_FLAG_PROCEDURAL = 16
+
+
+def _text(value, size):
+    data = value.encode("utf-8")
+    if len(data) > size:
+        raise ValueError(f"{value!r} does not fit in {size} bytes")
+    return data
+
+
+def _untext(data):
+    return data.rstrip(b"\0").decode("utf-8")
+
+
+def _values(game):
+    """Flattens a game's state into the record's field order."""
+    klingons = game.quadrant_klingons
+    stars = game.quadrant_stars
+    if (game.galaxy.rows, game.galaxy.cols) != (8, 8):
+        raise ValueError("snapshots only hold the standard 8x8 galaxy")
+    if len(klingons) > MAX_KLINGONS or len(stars) > MAX_STARS:
+        raise ValueError("quadrant holds more objects than a snapshot can store")
+    if not 0 <= game.rng.seed < 2 ** 64:
+        raise ValueError("snapshots need a seed between 0 and 2**64")
+
+    flags = ((_FLAG_RUNNING if game.is_running else 0)
+             | (_FLAG_DOCKED if game.is_docked else 0)
+             | (_FLAG_HOSTILE if game.hostile_action_taken else 0)
+             | (_FLAG_PAUSE if game.pause_after_messages else 0)
+             | (_FLAG_PROCEDURAL if game.galaxy.procedural else 0))
+    d = game.difficulty
+    # These start as ints and become floats during play; keep which is which
+    numbers = (game.stardate, game.stardate_start, game.stardate_end, game.time_remaining,
+               game.energy, game.energy_start, game.shields)
+    int_mask = 0
+    for bit, value in enumerate(numbers):
+        if isinstance(value, int):
+            int_mask |= 1 << bit
+
+    values = [MAGIC, VERSION, game.galaxy.rows, game.galaxy.cols,
+              game.q1, game.q2, game.s1, game.s2,
+              game.stardate, game.stardate_start, game.stardate_end, game.time_remaining,
+              game.energy, game.energy_start, game.shields, game.torpedoes,
+              game.klingons_total, game.klingons_start, game.starbases_total,
+              flags, _REASONS.index(game.game_over_reason), int_mask,
+              _text(d.name, 16), d.shield_multiplier, d.base_klingon_shields,
+              d.energy_divisor, d.initial_klingons, d.initial_starbases]
+    values.extend(game.damage[key] for key in _DAMAGE_KEYS)
+
+    values.append(len(klingons))
+    for i in range(MAX_KLINGONS):
+        if i < len(klingons):
+            k = klingons[i]
+            values.extend((k.s1, k.s2, k.shields))
+        else:
+            values.extend((0, 0, 0.0))
+
+    base = game.quadrant_starbase
+    values.extend((1, base.s1, base.s2) if base else (0, 0, 0))
+
+    values.append(len(stars))
+    for i in range(MAX_STARS):
+        values.extend((stars[i].s1, stars[i].s2) if i < len(stars) else (0, 0))
+    values.append(game.sectors.free_order())
+
+    galaxy = game.galaxy
+    values.append(galaxy.delta_bytes() if galaxy.procedural else galaxy.to_bytes())
+
+    values.append(game.rng.seed)
+    for name in GameRandom.STREAMS:
+        _, words, gauss = getattr(game.rng, name).getstate()
+        values.append(_MT_STATE.pack(*words))
+        values.extend((0.0, 0) if gauss is None else (gauss, 1))
+
+    handler = game.input_handler.__name__ if game.input_handler else ""
+    values.extend((_text(handler, 32), _text(game.input_prompt, 96)))
+    data = game.command_data
+    unknown = set(data).difference(_COMMAND_DATA_KEYS)
+    if unknown:
+        raise ValueError(f"command data {sorted(unknown)} has no place in a snapshot")
+    for key in _COMMAND_DATA_KEYS:
+        if key in data:
+            value = data[key]
+            values.extend((float(value), _INT if isinstance(value, int) else _FLOAT))
+        else:
+            values.extend((0.0, _ABSENT))
+    return values
+
+
+def pack(game):
+    """Returns the game's snapshot as bytes."""
+    return SNAPSHOT.pack(*_values(game))
+
+
+def pack_into(buffer, offset, game):
+    """Writes the game's snapshot into a writable buffer at offset."""
+    SNAPSHOT.pack_into(buffer, offset, *_values(game))
+
+
+def _difficulty(name, shield_multiplier, base_shields, divisor, klingons, starbases):
+    for difficulty in DIFFICULTIES:
+        if (difficulty.name, difficulty.shield_multiplier, difficulty.base_klingon_shields,
+                difficulty.energy_divisor, difficulty.initial_klingons,
+                difficulty.initial_starbases) == (name, shield_multiplier, base_shields,
+                                                  divisor, klingons, starbases):
+            return difficulty
+    return Difficulty(name, shield_multiplier, base_shields, divisor, klingons, starbases)
+
+
+def unpack_from(buffer, offset, game):
+    """Restores a snapshot from buffer at offset into game. Returns game."""
+    values = SNAPSHOT.unpack_from(buffer, offset)
+    if values[0] != MAGIC or values[1] != VERSION:
+        raise ValueError("not a version %d game snapshot" % VERSION)
+    rows, cols = values[2], values[3]
+    if (rows, cols) != (8, 8):
+        raise ValueError(f"snapshot holds a {rows}x{cols} galaxy; only 8x8 is supported")
+    if tuple(game.galaxy_size) != (rows, cols):
+        raise ValueError("cannot restore an 8x8 galaxy snapshot into a "
+                         "{}x{} game".format(*game.galaxy_size))
+    it = iter(values[4:])
+    take = it.__next__
+
+    game.q1, game.q2, game.s1, game.s2 = take(), take(), take(), take()
+    numbers = [take(), take(), take(), take(), take(), take(), take()]
+    game.torpedoes = take()
+    game.klingons_total, game.klingons_start, game.starbases_total = take(), take(), take()
+    flags = take()
+    game.is_running = bool(flags & _FLAG_RUNNING)
+    game.is_docked = bool(flags & _FLAG_DOCKED)
+    game.hostile_action_taken = bool(flags & _FLAG_HOSTILE)
+    game.pause_after_messages = bool(flags & _FLAG_PAUSE)
+    game.game_over_reason = _REASONS[take()]
+    int_mask = take()
+    for bit in range(len(numbers)):
+        if int_mask & (1 << bit):
+            numbers[bit] = int(numbers[bit])
+    (game.stardate, game.stardate_start, game.stardate_end, game.time_remaining,
+     game.energy, game.energy_start, game.shields) = numbers
+    game.difficulty = _difficulty(_untext(take()), take(), take(), take(), take(), take())
+    game.damage = {key: take() for key in _DAMAGE_KEYS}
+
+    count = take()
+    klingons = []
+    for i in range(MAX_KLINGONS):
+        s1, s2, shields = take(), take(), take()
+        if i < count:
+            klingons.append(Klingon(s1, s2, shields))
+    game.quadrant_klingons = klingons
+
+    present, s1, s2 = take(), take(), take()
+    game.quadrant_starbase = Starbase(s1, s2) if present else None
+
+    count = take()
+    stars = []
+    for i in range(MAX_STARS):
+        s1, s2 = take(), take()
+        if i < count:
+            stars.append(Star(s1, s2))
+    game.quadrant_stars = stars
+    game._index_quadrant()
+    # Sector indexes start at 1 * 9 + 1, so zero padding is never a sector
+    game.sectors.set_free_order(i for i in take() if i)
+
+    galaxy_data = take()
+
+    # Reuse the game's generators; setstate replaces their whole state
+    game.rng.seed = take()
+    for name in GameRandom.STREAMS:
+        words = _MT_STATE.unpack(take())
+        gauss, has_gauss = take(), take()
+        getattr(game.rng, name).setstate((3, words, gauss if has_gauss else None))
+
+    # A procedural galaxy is generated from the seed, so it is rebuilt after it
+    game.procedural_galaxy = bool(flags & _FLAG_PROCEDURAL)
+    if game.procedural_galaxy:
+        game.galaxy = ProceduralGalaxy(rows, cols, seed=game.rng.seed)
+        game.galaxy.load_delta_bytes(galaxy_data)
+    else:
+        game.galaxy = GalaxyStore(rows, cols)
+        game.galaxy.load_bytes(galaxy_data[:_CLASSIC_GALAXY_BYTES])
+
+    handler, prompt = _untext(take()), _untext(take())
+    command_data = {}
+    for key in _COMMAND_DATA_KEYS:
+        value, kind = take(), take()
+        if kind == _INT:
+            command_data[key] = int(value)
+        elif kind == _FLOAT:
+            command_data[key] = value
+
+    game.message_queue = []
+    game.input_handler = None
+    game.input_prompt = ""
+    game.input_render = None
+    if handler in _ASKERS:
+        getattr(game, _ASKERS[handler])()
+    elif handler:
+        game._await_input(getattr(game, handler), prompt)
+    game.command_data = command_data
+    return game
+
+
+def unpack(data, game):
+    """Restores a snapshot made by pack() into game. Returns game."""
+    return unpack_from(data, 0, game)
+
+
+class SnapshotSlab:
+    """
+    A file of fixed-size snapshot slots, memory-mapped.
+
+    park() packs a game straight into a free slot and resume() unpacks
+    it; nothing is copied through Python objects in between. Free slots
+    are found again on open by their missing magic, so the file survives
+    a restart.
+
+    Args:
+        path (str): Slab file. Created (or grown) to hold `slots` snapshots.
+        slots (int): Number of snapshot slots.
+    """
+
+    def __init__(self, path, slots):
+        self.path = path
+        self.slots = slots
+        size = slots * SNAPSHOT_SIZE
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        self._free = [slot for slot in range(slots - 1, -1, -1)
+                      if self._map[slot * SNAPSHOT_SIZE:slot * SNAPSHOT_SIZE + 4] != MAGIC]
+
+    def __len__(self):
+        """Number of parked games."""
+        return self.slots - len(self._free)
+
+    def park(self, game, slot=None, replace=False):
+        """
+        Stores the game in a free slot, or the given one. A given slot
+        that already holds a game raises ValueError unless replace is
+        True. Returns the slot.
+        """
+        # Flattened before a slot is taken, so a game that does not fit
+        # leaves the slab as it was
+        values = _values(game)
+        if slot is None:
+            if not self._free:
+                raise MemoryError("snapshot slab is full")
+            slot = self._free.pop()
+        elif slot in self._free:
+            self._free.remove(slot)
+        else:
+            if not 0 <= slot < self.slots:
+                raise IndexError(f"slot {slot} is outside the slab")
+            if not replace:
+                raise ValueError(f"slot {slot} already holds a game")
+        SNAPSHOT.pack_into(self._map, slot * SNAPSHOT_SIZE, *values)
+        return slot
+
+    def resume(self, slot, game, keep=False):
+        """
+        Restores the game parked in slot into game and frees the slot
+        (unless keep is True). Returns game.
+        """
+        self._check(slot)
+        unpack_from(self._map, slot * SNAPSHOT_SIZE, game)
+        if not keep:
+            self.free(slot)
+        return game
+
+    def free(self, slot):
+        """Discards the game parked in slot."""
+        self._check(slot)
+        offset = slot * SNAPSHOT_SIZE
+        self._map[offset:offset + 4] = b"\0\0\0\0"
+        self._free.append(slot)
+
+    def _check(self, slot):
+        if not 0 <= slot < self.slots:
+            raise IndexError(f"slot {slot} is outside the slab")
+        offset = slot * SNAPSHOT_SIZE
+        if self._map[offset:offset + 4] != MAGIC:
+            raise KeyError(f"slot {slot} holds no game")
+
+    def flush(self):
+        """Writes parked games through to the file."""
+        self._map.flush()
+
+    def close(self):
+        self._map.close()
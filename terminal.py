@@ -0,0 +1,212 @@
+"""
+Terminal control: buffered output, escape sequences and capabilities.
+
+TerminalWriter collects everything the game writes (cursor moves, colors
+and text) and sends it to the terminal with a single os.write when
+flushed. A frame is everything between two flushes, so a whole turn's
+redraw normally costs one write system call. Counters record how many
+bytes, writes and frames went out.
+
+The screen is cleared and the cursor moved with escape sequences, never
+by running a clear command. Cursor moves are built once per position
+and interned, and layout_sequences() prebuilds everything the fixed
+two-pane layout writes over and over. capabilities() asks the terminal
+what it can do once per process.
+"""
+import functools
+import io
+import os
+import shutil
+import sys
+from contextlib import contextmanager
+
+# --- Escape sequences ---
+CLEAR_SCREEN = "\033[H\033[2J" # Home the cursor and clear the screen
+CLEAR_LINE = "\033[K"           # Clear to the end of the line
+CLEAR_DOWN = "\033[J"           # Clear to the end of the screen
+
+
+@functools.lru_cache(maxsize=4096)
+def move(row, col):
+    """The cursor move to row, col (1-based), built once per position."""
+    return sys.intern(f"\033[{row};{col}H")
+
+
+@functools.lru_cache(maxsize=4096)
+def move_clear(row, col):
+    """Moves to row, col and clears the rest of the line."""
+    return sys.intern(move(row, col) + CLEAR_LINE)
+
+
+@functools.lru_cache(maxsize=4096)
+def move_clear_down(row, col):
+    """Moves to row, col and clears the rest of the screen."""
+    return sys.intern(move(row, col) + CLEAR_DOWN)
+
+
+class LayoutSequences:
+    """
+    The escape sequences for a fixed two-pane layout, built once.
+
+    Args:
+        col (int): First column of the message box.
+        width (int): Width of the message box.
+        top, bottom (int): First and last message rows.
+        cmd_row (int): Row of the COMMAND? prompt.
+    """
+
+    __slots__ = ("msg_lines", "msg_clear", "cmd_line", "cmd_clear_down", "right_panel")
+
+    def __init__(self, col, width, top, bottom, cmd_row):
+        # Move to and clear each message row, indexed by row
+        self.msg_lines = {r: move_clear(r, col) for r in range(top, bottom + 1)}
+        # Clear the whole message box and leave the cursor at its top
+        self.msg_clear = "".join(self.msg_lines.values()) + move(top, col)
+        self.cmd_line = move_clear(cmd_row, col)
+        self.cmd_clear_down = move_clear_down(cmd_row, col)
+
+        # The box border: top above the messages, a separator above the
+        # prompt row and the bottom below it
+        left = col - 1
+        edge = "+" + "-" * (width + 1) + "+"
+        parts = [move(top - 1, left) + edge]
+        for r in range(top, cmd_row + 1):
+            parts.append(move(r, left) + "|" + move(r, left + width + 2) + "|")
+        parts.append(move(cmd_row - 1, left) + edge)
+        parts.append(move(cmd_row + 1, left) + edge)
+        self.right_panel = "".join(parts)
+
+
+@functools.lru_cache(maxsize=64)
+def layout_sequences(col, width, top, bottom, cmd_row):
+    """Shared LayoutSequences for a layout (every game uses the same one)."""
+    return LayoutSequences(col, width, top, bottom, cmd_row)
+
+
+# --- Capabilities ---
+
+class TerminalCapabilities:
+    """
+    What stdout is connected to, found out once (see capabilities()).
+
+        is_tty   stdout is a terminal
+        ansi     escape sequences work (not TERM=dumb; on Windows, VT mode is on)
+        rows, cols   terminal size (120x40 if unknown)
+    """
+
+    __slots__ = ("is_tty", "ansi", "rows", "cols")
+
+    def __init__(self, stream=None):
+        stream = stream or sys.stdout
+        try:
+            self.is_tty = stream.isatty()
+        except (AttributeError, ValueError):
+            self.is_tty = False
+        self.ansi = os.environ.get("TERM") != "dumb" and (os.name != "nt" or _enable_windows_vt())
+        size = shutil.get_terminal_size(fallback=(120, 40))
+        self.rows = size.lines
+        self.cols = size.columns
+
+    @property
+    def clear(self):
+        """Clears the screen: escape codes, or blank lines on a dumb terminal."""
+        return CLEAR_SCREEN if self.ansi else "\n" * self.rows
+
+
+def _enable_windows_vt():
+    """Turns on escape sequence handling in a Windows console. True if it is on."""
+    try:
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11) # STD_OUTPUT_HANDLE
+        mode = ctypes.c_uint32()
+        if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+            return False
+        # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+        return bool(kernel32.SetConsoleMode(handle, mode.value | 0x0004))
+    except (AttributeError, OSError):
+        return False
+
+
+@functools.lru_cache(maxsize=1)
+def capabilities():
+    """The TerminalCapabilities of sys.stdout, queried on first use only."""
+    return TerminalCapabilities()
+
+
+def clear_screen():
+    """Clears the terminal screen with escape codes (no clear/cls subprocess)."""
+    sys.stdout.write(capabilities().clear)
+    sys.stdout.flush()
+
+
+class TerminalWriter:
+    """
+    Args:
+        stream: Text stream to write to (default sys.stdout). If it has a
+                real file descriptor, output goes straight to it with
+                os.write; otherwise stream.write/flush are used.
+    """
+
+    def __init__(self, stream=None):
+        self._stream = stream or sys.stdout
+        try:
+            self._fd = self._stream.fileno()
+        except (AttributeError, ValueError, io.UnsupportedOperation):
+            self._fd = None
+        self._encoding = getattr(self._stream, "encoding", None) or "utf-8"
+        self._buffer = []
+        self._frame_depth = 0
+
+        # --- Counters ---
+        self.bytes_written = 0
+        self.write_calls = 0
+        self.frames = 0
+
+    def write(self, text):
+        """Adds text to the pending output. Nothing is sent yet."""
+        self._buffer.append(text)
+
+    def flush(self):
+        """Sends all pending output in one write."""
+        if not self._buffer:
+            return
+        data = ''.join(self._buffer).encode(self._encoding, errors="replace")
+        self._buffer.clear()
+
+        if self._fd is None:
+            self._stream.write(data.decode(self._encoding))
+            self._stream.flush()
+            self.write_calls += 1
+        else:
+            # Anything written through the stream itself must go out first
+            self._stream.flush()
+            view = memoryview(data)
+            while view:
+                written = os.write(self._fd, view)
+                view = view[written:]
+                self.write_calls += 1
+        self.bytes_written += len(data)
+
+    @contextmanager
+    def frame(self):
+        """
+        Marks one frame (e.g. one turn's redraw): its output is sent
+        together when the frame ends.
+        """
+        self._frame_depth += 1
+        try:
+            yield self
+        finally:
+            self._frame_depth -= 1
+            if self._frame_depth == 0:
+                self.frames += 1
+                self.flush()
+
+    def stats(self):
+        """Returns the counters as a dict."""
+        return {
+            "bytes_written": self.bytes_written,
+            "write_calls": self.write_calls,
+            "frames": self.frames,
+        }
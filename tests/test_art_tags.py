@@ -0,0 +1,30 @@
+"""Art tags translate and strip in one pass."""
+from utils import Colors, register_art_tag, strip_art_tags, translate_art_tags
+
+
+def test_translate():
+    line = "[RED]<*>[RESET] [BGBLUE][WHITE]UFP[RESET] [NOT_A_TAG]"
+    assert translate_art_tags(line) == (f"{Colors.RED}<*>{Colors.RESET} "
+                                        f"{Colors.BGBLUE}{Colors.WHITE}UFP{Colors.RESET} [NOT_A_TAG]")
+
+
+def test_longest_tag_wins():
+    assert translate_art_tags("[BGBLACK]") == Colors.BGBLACK
+
+
+def test_one_pass_leaves_translated_text_alone():
+    # A tag name produced by a replacement is not translated again
+    register_art_tag("WRAP", "[RED]")
+    assert translate_art_tags("[WRAP]") == "[RED]"
+
+
+def test_strip_tags_and_ansi_together():
+    line = f"[YELLOW]*{Colors.BOLD}ENTERPRISE{Colors.RESET}*[RESET]"
+    assert strip_art_tags(line) == ("*ENTERPRISE*", 12)
+    assert strip_art_tags(translate_art_tags(line))[1] == 12
+
+
+def test_registered_tag():
+    register_art_tag("orange", "\033[38;5;208m")
+    assert translate_art_tags("[ORANGE]x") == "\033[38;5;208mx"
+    assert strip_art_tags("[ORANGE]x") == ("x", 1)
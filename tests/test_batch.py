@@ -0,0 +1,69 @@
+"""Batch scripts parse into games and play like a typed game."""
+import io
+import json
+
+import pytest
+
+from batch import ScriptError, Transcript, read_script, run
+from engine import HeadlessStarTrek
+from replay import state_digest
+from utils import DIFFICULTIES
+
+SCRIPT = """\
+# Two games
+SRS
+GAME seed=7 difficulty=3 galaxy=4x12
+NAV
+1
+0.5
+
+GAME seed=8 classic=1
+  PHA
+"""
+
+
+def test_read_script():
+    games = list(read_script(io.StringIO(SCRIPT)))
+    assert [game.lines for game in games] == [["SRS"], ["NAV", "1", "0.5"], ["  PHA"]]
+    defaults, first, second = games
+    assert (defaults.seed, defaults.difficulty, defaults.galaxy_size, defaults.procedural) == \
+        (None, 2, (8, 8), True)
+    assert (first.seed, first.difficulty, first.galaxy_size) == (7, 3, (4, 12))
+    assert (second.seed, second.procedural) == (8, False)
+
+
+def test_games_are_yielded_as_they_end():
+    lines = iter(["GAME seed=1\n", "SRS\n", "GAME seed=2\n", "LRS\n"])
+    games = read_script(lines)
+    assert next(games).lines == ["SRS"]
+    # The next game's lines have not been read yet
+    assert next(lines) == "LRS\n"
+
+
+@pytest.mark.parametrize("line", ["GAME seed=x", "GAME difficulty=4", "GAME galaxy=0x8",
+                                  "GAME colour=red", "GAME seed",
+                                  "GAME galaxy=4096x4096 classic=1"])
+def test_bad_game_line(line):
+    with pytest.raises(ScriptError, match="line 2"):
+        list(read_script(["SRS", line]))
+
+
+def test_play_matches_a_fed_game():
+    out = io.StringIO()
+    games, errors = run(["GAME seed=7 galaxy=4x12", "NAV", "1", "0.5", "SRS"],
+                        Transcript(out, as_json=True))
+    assert (games, errors) == (1, 0)
+    final = json.loads(out.getvalue().splitlines()[-1])
+
+    game = HeadlessStarTrek(galaxy_size=(4, 12))
+    game.reset(DIFFICULTIES[1], seed=7)
+    for line in ["NAV", "1", "0.5", "SRS"]:
+        game.feed(line)
+    assert final["digest"] == state_digest(game)
+
+
+def test_repeats_use_following_seeds():
+    out = io.StringIO()
+    run(["GAME seed=5", "SRS"], Transcript(out, as_json=True, quiet=True), repeat=3)
+    finals = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert len({final["digest"] for final in finals}) == 3
@@ -0,0 +1,103 @@
+"""NAV and TOR paths follow the original step-by-step algorithm exactly."""
+import random
+
+import pytest
+
+from course_rays import course_vector, nav_path, torpedo_ray
+from engine import HeadlessStarTrek
+from sector_grid import EMPTY, ENTERPRISE, STAR
+
+COURSES = [1, 1.5, 2, 2.25, 3.1, 3.999, 4.5, 5.05, 6.333, 7, 7.75, 8.5, 8.99]
+
+
+def _old_torpedo(s1, s2, course):
+    """The tracking loop of the original execute_tor_fire."""
+    d_row, d_col = course_vector(course)
+    track_row, track_col = float(s1), float(s2)
+    ray = []
+    for _ in range(15):
+        track_row += d_row
+        track_col += d_col
+        r, c = int(track_row + 0.5), int(track_col + 0.5)
+        ray.append((r, c))
+        if not (1 <= r <= 8 and 1 <= c <= 8):
+            break
+    return ray
+
+
+def _old_nav(s1, s2, course, distance, blocked):
+    """The within-quadrant loop of the original execute_nav_move."""
+    d_row, d_col = course_vector(course)
+    for i in range(1, distance + 1):
+        new_row = int(s1 + i * d_row + 0.5)
+        new_col = int(s2 + i * d_col + 0.5)
+        if not (1 <= new_row <= 8 and 1 <= new_col <= 8):
+            continue
+        if (new_row, new_col) in blocked:
+            return int(s1 + (i - 1) * d_row + 0.5), int(s2 + (i - 1) * d_col + 0.5)
+        s1, s2 = new_row, new_col
+    return s1, s2
+
+
+def _walk(s1, s2, course, distance, blocked):
+    for new_row, new_col, stop_row, stop_col in nav_path(s1, s2, course, distance):
+        if (new_row, new_col) in blocked:
+            return stop_row, stop_col
+        s1, s2 = new_row, new_col
+    return s1, s2
+
+
+def test_course_vector_interpolates():
+    assert course_vector(1) == (0, 1)
+    assert course_vector(8.5) == (0.5, 1.0)
+    assert course_vector(2.5) == (-1.0, 0.5)
+
+
+@pytest.mark.parametrize("course", COURSES)
+def test_torpedo_ray_matches_old_loop(course):
+    for s1 in range(1, 9):
+        for s2 in range(1, 9):
+            assert list(torpedo_ray(s1, s2, course)) == _old_torpedo(s1, s2, course)
+
+
+@pytest.mark.parametrize("course", COURSES)
+def test_nav_path_matches_old_loop(course):
+    rng = random.Random(course)
+    for s1 in range(1, 9):
+        for s2 in range(1, 9):
+            for distance in range(1, 9):
+                blocked = {(rng.randint(1, 8), rng.randint(1, 8)) for _ in range(6)}
+                blocked.discard((s1, s2))
+                assert _walk(s1, s2, course, distance, blocked) == \
+                       _old_nav(s1, s2, course, distance, blocked)
+                assert _walk(s1, s2, course, distance, set()) == \
+                       _old_nav(s1, s2, course, distance, set())
+
+
+def test_nav_in_game_stops_where_the_old_loop_did():
+    checked = 0
+    for seed in range(200):
+        game = HeadlessStarTrek(seed=seed)
+        if game.live_klingons:
+            continue # Klingons jump to new sectors as the ship moves
+        rng = random.Random(seed)
+        course, warp = rng.choice(COURSES), rng.choice([0.25, 0.5, 0.75])
+        distance = int(warp * 8 + 0.5)
+        d_row, d_col = course_vector(course)
+        if not (1 <= game.s1 + distance * d_row <= 8.99 and 1 <= game.s2 + distance * d_col <= 8.99):
+            continue # Leaves the quadrant
+
+        # Put a star somewhere along the way, half of the time
+        path = nav_path(game.s1, game.s2, course, distance)
+        if path and seed % 2:
+            r, c = path[rng.randrange(len(path))][:2]
+            if game.sectors.is_free(r, c):
+                game.sectors.place(r, c, STAR)
+        blocked = {(r, c) for r in range(1, 9) for c in range(1, 9)
+                   if game.sectors.code_at(r, c) not in (EMPTY, ENTERPRISE)}
+
+        expected = _old_nav(game.s1, game.s2, course, distance, blocked)
+        game.step("NAV", [course, warp])
+        assert (game.s1, game.s2) == expected
+        checked += 1
+    assert checked >= 10
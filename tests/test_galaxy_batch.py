@@ -0,0 +1,69 @@
+"""Batch-generated galaxies have the game's shape and odds."""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from engine import HeadlessStarTrek
+from galaxy_batch import GALAXY_DTYPE, generate_galaxies, packed_counts
+from utils import DIFFICULTIES, STANDARD
+
+GAMES = 300
+
+
+def _game_galaxies(n):
+    """(n, 8, 8, 3) Klingon/starbase/star counts from the game's own setup."""
+    game = HeadlessStarTrek(procedural_galaxy=False)
+    counts = []
+    for seed in range(n):
+        game.reset(seed=seed)
+        counts.append([[game.galaxy.counts(r, c) for c in range(1, 9)]
+                       for r in range(1, 9)])
+    return np.array(counts)
+
+
+def test_shape_and_dtype():
+    galaxies = generate_galaxies(5, STANDARD, rng=1)
+    assert galaxies.shape == (5, 8, 8)
+    assert galaxies.dtype == GALAXY_DTYPE
+    packed = packed_counts(galaxies)
+    assert packed.shape == (5, 8, 8)
+    assert packed.dtype == np.int16
+    assert (packed // 100 == galaxies["klingons"]).all()
+    assert (packed % 10 == galaxies["stars"]).all()
+
+
+def test_other_galaxy_sizes():
+    galaxies = generate_galaxies(3, STANDARD, rng=1, rows=5, cols=12)
+    assert galaxies.shape == (3, 5, 12)
+    assert (galaxies["starbases"].sum(axis=(1, 2)) == STANDARD.initial_starbases).all()
+    game = HeadlessStarTrek(seed=1, galaxy_size=(5, 12), galaxy=packed_counts(galaxies)[0])
+    assert game.galaxy.display_value(5, 12) == packed_counts(galaxies)[0, 4, 11]
+
+
+@pytest.mark.parametrize("difficulty", DIFFICULTIES, ids=lambda d: d.name)
+def test_every_galaxy_gets_the_difficultys_starbases(difficulty):
+    galaxies = generate_galaxies(200, difficulty, rng=2)
+    assert galaxies["starbases"].max() == 1
+    assert (galaxies["starbases"].sum(axis=(1, 2)) == difficulty.initial_starbases).all()
+
+
+def test_stars_and_klingons_match_the_game_setup():
+    batch = generate_galaxies(GAMES, STANDARD, rng=3)
+    game = _game_galaxies(GAMES)
+    for name, ours, theirs in (("klingons", batch["klingons"], game[..., 0]),
+                               ("stars", batch["stars"], game[..., 2])):
+        assert ours.min() == theirs.min() and ours.max() == theirs.max(), name
+        assert abs(ours.mean() - theirs.mean()) < 0.05, name
+    assert abs((batch["klingons"] > 0).mean() - (game[..., 0] > 0).mean()) < 0.02
+
+
+def test_random_games_start_without_starbases():
+    # The documented difference: setup_game() zeroes the count it fills from
+    assert _game_galaxies(20)[..., 1].sum() == 0
+
+
+def test_game_plays_a_batch_galaxy():
+    packed = packed_counts(generate_galaxies(1, STANDARD, rng=4))[0]
+    game = HeadlessStarTrek(STANDARD, seed=1, galaxy=packed)
+    assert [[game.galaxy.display_value(r, c) for c in range(1, 9)]
+            for r in range(1, 9)] == packed.tolist()
@@ -0,0 +1,71 @@
+"""Galaxies other than the standard 8x8: small, narrow and non-square."""
+import argparse
+
+import pytest
+
+from engine import HeadlessStarTrek
+from galaxy_store import GalaxyStore, MAX_FILLED_QUADRANTS, galaxy_size
+
+
+@pytest.mark.parametrize("size", [(1, 1), (1, 3), (2, 2), (3, 17), (5, 12)])
+def test_nav_stays_inside_small_galaxy(size):
+    # A warp 8 move is 64 sectors, more than these galaxies are wide
+    for seed in range(10):
+        game = HeadlessStarTrek(seed=seed, galaxy_size=size)
+        for course in (1, 2, 3, 4, 5, 6, 7, 8, 1.5, 6.25):
+            if not game.is_running:
+                break
+            game.energy = 3000
+            game.step("NAV", [course, 8])
+            assert 1 <= game.q1 <= size[0]
+            assert 1 <= game.q2 <= size[1]
+            assert 1 <= game.s1 <= 8 and 1 <= game.s2 <= 8
+
+
+def test_nav_repro_narrow_galaxy():
+    game = HeadlessStarTrek(seed=5, galaxy_size=(3, 17))
+    events, state = game.step("NAV", [3, 8])
+    assert any("PERIMETER" in e for e in events)
+    assert 1 <= state["quadrant"][0] <= 3
+
+
+def test_region_map_header_uses_real_rows():
+    game = HeadlessStarTrek(seed=1, galaxy_size=(3, 17))
+    game.q1, game.q2 = 2, 12
+    events, _ = game.step("COM", [5])
+    assert "    (Block of rows 1-3, columns 9-16)" in events
+    rows = [e for e in events if e[:3].strip().isdigit()]
+    assert len(rows) == 3
+
+    game = HeadlessStarTrek(seed=1, galaxy_size=(3, 17))
+    game.q1, game.q2 = 1, 17
+    events, _ = game.step("COM", [5])
+    assert "    (Block of rows 1-3, columns 17-17)" in events
+
+
+def test_galaxy_size_parser():
+    assert galaxy_size("64x32") == (64, 32)
+    assert galaxy_size("5") == (5, 5)
+    for bad in ("0x8", "8x", "4097", "axb", "1x2x3"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            galaxy_size(bad)
+
+
+def test_storage_grows_with_the_area_used():
+    store = GalaxyStore(4096, 4096)
+    store.set_counts(1, 1, 1, 0, 3)
+    store.set_counts(4096, 4096, 0, 1, 2)
+    store.set_counts(2000, 3000, 0, 0, 0) # Empty space stores nothing
+    store.mark_known(4096, 4096)
+    assert store.blocks_in_use() == 2
+    assert store.memory_estimate() < 2048
+    assert store.counts(4096, 4096) == (0, 1, 2)
+    assert store.counts(2000, 3000) == (0, 0, 0)
+
+
+def test_large_filled_galaxy_is_refused():
+    # Filling 16 million quadrants up front would take minutes
+    with pytest.raises(ValueError, match="too big to fill up front"):
+        HeadlessStarTrek(galaxy_size=(4096, 4096), procedural_galaxy=False)
+    game = HeadlessStarTrek(seed=1, galaxy_size=(256, 256), procedural_galaxy=False)
+    assert game.galaxy.rows * game.galaxy.cols == MAX_FILLED_QUADRANTS
@@ -0,0 +1,64 @@
+"""GalaxyStore packs counts and known bits and round-trips through bytes."""
+import random
+
+import pytest
+
+from galaxy_store import MAX_KLINGONS, MAX_STARBASES, MAX_STARS, GalaxyStore
+
+
+def _filled(seed, rows=8, cols=8):
+    rng = random.Random(seed)
+    store = GalaxyStore(rows, cols)
+    for r in range(1, rows + 1):
+        for c in range(1, cols + 1):
+            store.set_counts(r, c, rng.randint(0, MAX_KLINGONS), rng.randint(0, MAX_STARBASES),
+                             rng.randint(0, MAX_STARS))
+            if rng.random() < 0.3:
+                store.mark_known(r, c)
+    return store
+
+
+def _contents(store):
+    return [(store.counts(r, c), store.is_known(r, c))
+            for r in range(1, store.rows + 1) for c in range(1, store.cols + 1)]
+
+
+def test_counts_and_display_values():
+    store = GalaxyStore()
+    store.set_display_value(3, 5, 215)
+    assert store.counts(3, 5) == (2, 1, 5)
+    store.set_klingons(3, 5, 0)
+    store.set_starbases(3, 5, 0)
+    assert store.display_value(3, 5) == 5
+    assert store.counts(5, 3) == (0, 0, 0)
+
+
+def test_known_bits():
+    store = GalaxyStore()
+    store.mark_known(8, 8)
+    store.mark_known(1, 2)
+    known = [(r, c) for r in range(1, 9) for c in range(1, 9) if store.is_known(r, c)]
+    assert known == [(1, 2), (8, 8)]
+
+
+def test_bytes_round_trip():
+    store = _filled(1)
+    copy = GalaxyStore()
+    copy.load_bytes(store.to_bytes())
+    assert _contents(copy) == _contents(store)
+    assert copy.to_bytes() == store.to_bytes()
+
+
+def test_load_bytes_rejects_the_wrong_size():
+    with pytest.raises(ValueError):
+        GalaxyStore().load_bytes(_filled(2).to_bytes()[:-1])
+
+
+def test_out_of_range():
+    store = GalaxyStore()
+    with pytest.raises(IndexError):
+        store.counts(9, 1)
+    with pytest.raises(IndexError):
+        store.mark_known(1, 0)
+    with pytest.raises(ValueError):
+        store.set_counts(1, 1, MAX_KLINGONS + 1, 0, 0)
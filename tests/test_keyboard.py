@@ -0,0 +1,50 @@
+"""The cbreak-mode line editor and its escape sequence handling."""
+import os
+
+import pytest
+
+from keyboard import Keyboard
+
+
+@pytest.fixture
+def typed():
+    """Types text into a Keyboard through a pipe; returns its finished lines."""
+    read_fd, write_fd = os.pipe()
+    echoed = []
+    keyboard = Keyboard(read_fd, echoed.append, lambda: None)
+
+    def type_(*chunks):
+        for chunk in chunks:
+            os.write(write_fd, chunk.encode())
+            keyboard.wait(0)
+        return list(keyboard.lines)
+
+    yield type_
+    keyboard.close()
+    os.close(read_fd)
+    os.close(write_fd)
+
+
+def test_editing_keys(typed):
+    assert typed("NAX\x7fV\r\n", "junk\x15PHA\n") == ["NAV", "PHA"]
+
+
+def test_arrow_keys_are_skipped(typed):
+    assert typed("S\x1b[AR\x1b[1;5CS\x1bOB\n") == ["SRS"]
+
+
+def test_lone_escape_keeps_the_next_key(typed):
+    assert typed("\x1bSRS\n") == ["SRS"]
+    assert typed("\x1b\x1bNAV\n") == ["SRS", "NAV"]
+
+
+def test_escape_at_the_end_of_a_read_is_a_lone_key(typed):
+    assert typed("\x1b", "TOR\n") == ["TOR"]
+
+
+def test_sequence_split_across_reads(typed):
+    assert typed("L\x1b[", "1;2", "DRS\n") == ["LRS"]
+
+
+def test_enter_ends_an_unfinished_sequence(typed):
+    assert typed("DAM\x1b[\n") == ["DAM"]
@@ -0,0 +1,53 @@
+"""Line-mode input keeps commands typed during an animation."""
+import io
+import os
+import time
+
+import pytest
+
+from animation import LineModeInput
+
+
+@pytest.fixture
+def terminal():
+    """A LineModeInput on the far end of a pseudo-terminal, and a typist."""
+    pty = pytest.importorskip("pty")
+    master, slave = pty.openpty()
+    stream = open(slave, "r", closefd=True)
+    yield LineModeInput(stream), lambda text: os.write(master, text.encode())
+    stream.close()
+    os.close(master)
+
+
+def test_typed_command_is_kept_for_the_next_prompt(terminal):
+    line_input, type_ = terminal
+    assert not line_input.key_pressed()
+    type_("SRS\n")
+    time.sleep(0.05)
+    assert line_input.key_pressed()
+    assert line_input.read_line() == "SRS"
+
+
+def test_bare_enter_is_used_up_by_the_skip(terminal):
+    line_input, type_ = terminal
+    type_("\n")
+    time.sleep(0.05)
+    assert line_input.key_pressed()
+    assert not line_input.typed_ahead
+
+
+def test_wait_ends_when_a_line_comes_in(terminal):
+    line_input, type_ = terminal
+    type_("\n")
+    start = time.monotonic()
+    line_input.wait(5)
+    assert time.monotonic() - start < 1
+
+
+def test_piped_input_is_never_a_skip():
+    line_input = LineModeInput(io.StringIO("NAV\n1\n"))
+    assert not line_input.key_pressed()
+    assert line_input.read_line() == "NAV"
+    assert line_input.read_line() == "1"
+    with pytest.raises(EOFError):
+        line_input.read_line()
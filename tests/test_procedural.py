@@ -0,0 +1,55 @@
+"""A procedural galaxy is the same every time and stores only its changes."""
+from engine import HeadlessStarTrek
+from galaxy_store import ProceduralGalaxy
+
+
+def _counts(galaxy):
+    return [galaxy.counts(r, c) for r in range(1, galaxy.rows + 1)
+            for c in range(1, galaxy.cols + 1)]
+
+
+def test_same_seed_same_galaxy():
+    a, b = ProceduralGalaxy(16, 16, seed=7), ProceduralGalaxy(16, 16, seed=7)
+    assert _counts(a) == _counts(b)
+    assert _counts(a) != _counts(ProceduralGalaxy(16, 16, seed=8))
+    for klingons, starbases, stars in _counts(a):
+        assert 0 <= klingons <= 3 and starbases == 0 and 1 <= stars <= 8
+
+
+def test_overlay_holds_only_changes():
+    galaxy = ProceduralGalaxy(seed=3)
+    klingons, _, _ = galaxy.counts(4, 4)
+    galaxy.set_starbases(4, 4, 1)
+    galaxy.set_klingons(4, 4, klingons + 1)
+    assert galaxy.overlay_size() == 1
+    galaxy.set_counts(4, 4, *ProceduralGalaxy(seed=3).counts(4, 4))
+    assert galaxy.overlay_size() == 0
+
+
+def test_delta_bytes_round_trip():
+    galaxy = ProceduralGalaxy(8, 8, seed=11)
+    galaxy.set_starbases(2, 5, 1)
+    galaxy.set_klingons(8, 1, 0)
+    galaxy.mark_destroyed(3, 3, 2)
+    galaxy.mark_known(6, 7)
+    copy = ProceduralGalaxy(8, 8, seed=11)
+    copy.load_delta_bytes(galaxy.delta_bytes())
+    assert _counts(copy) == _counts(galaxy)
+    assert copy.destroyed(3, 3) == 0b100 and copy.is_known(6, 7)
+    assert copy.fingerprint() == galaxy.fingerprint()
+
+
+def test_revisit_keeps_the_layout():
+    game = HeadlessStarTrek(seed=4)
+    layout = [(s.s1, s.s2) for s in game.quadrant_stars]
+    game.enter_quadrant()
+    assert [(s.s1, s.s2) for s in game.quadrant_stars] == layout
+
+
+def test_huge_galaxy_costs_only_what_is_visited():
+    game = HeadlessStarTrek(seed=2, galaxy_size=(4096, 4096))
+    for course in (1, 3, 5, 7):
+        if game.is_running:
+            game.energy = 3000
+            game.step("NAV", [course, 8])
+    assert game.galaxy.memory_estimate() < 64 * 1024
@@ -0,0 +1,54 @@
+"""A recorded game replays headlessly to the same final state."""
+from engine import HeadlessStarTrek
+from replay import ReplayLog, replay, state_digest
+from utils import HARD, GameRandom
+
+COMMANDS = [("SRS", []), ("SHE", [400]), ("PHA", [300]), ("NAV", [2.5, 0.75]),
+            ("TOR", [6.1]), ("LRS", []), ("DAM", []), ("NAV", [7, 2]), ("PHA", [150])]
+
+
+def _recorded(seed, difficulty=HARD, galaxy=None):
+    game = HeadlessStarTrek(difficulty, seed=seed, galaxy=galaxy)
+    for command, args in COMMANDS:
+        if game.is_running:
+            game.step(command, args)
+    game.replay_log.finish(game)
+    return game, game.replay_log
+
+
+def test_same_seed_same_streams():
+    a, b = GameRandom(11), GameRandom(11)
+    for name in GameRandom.STREAMS:
+        assert [getattr(a, name).random() for _ in range(5)] == \
+            [getattr(b, name).random() for _ in range(5)]
+    assert a.setup.random() != GameRandom(12).setup.random()
+
+
+def test_log_records_commands_and_answers():
+    _, log = _recorded(5)
+    assert log.seed == 5 and log.difficulty is HARD
+    assert log.commands[0] == ["SRS"]
+    assert log.commands[1] == ["SHE", "400"]
+
+
+def test_record_then_replay_matches():
+    for seed in range(10):
+        game, log = _recorded(seed)
+        copy = ReplayLog.loads(log.dumps())
+        replayed, matches = replay(copy)
+        assert matches is True
+        assert state_digest(replayed) == state_digest(game)
+
+
+def test_replay_with_a_given_galaxy():
+    galaxy = [[(r * 8 + c) % 9 + 1 for c in range(8)] for r in range(8)]
+    galaxy[2][3] = 214
+    _, log = _recorded(3, galaxy=galaxy)
+    assert log.galaxy == galaxy
+    assert replay(ReplayLog.loads(log.dumps()))[1] is True
+
+
+def test_changed_command_is_a_mismatch():
+    _, log = _recorded(8)
+    log.commands[1][1] = "10"
+    assert replay(log)[1] is False
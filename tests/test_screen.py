@@ -0,0 +1,61 @@
+"""ScreenBuffer's diffs repaint the terminal to exactly the drawn frame."""
+import random
+
+from screen import ScreenBuffer
+
+ROWS, COLS = 12, 30
+COLORS = ["\033[0m", "\033[1;31m", "\033[93m", "\033[5;44m", "\033[22;39m"]
+
+
+def _screen(buffer):
+    return [("".join(chars), list(attrs)) for chars, attrs in zip(buffer._chars, buffer._attrs)]
+
+
+def _draw_frame(buffer, rng):
+    """A handful of colored writes, clears and line feeds at random places."""
+    for _ in range(rng.randint(1, 8)):
+        row, col = rng.randint(1, ROWS), rng.randint(1, COLS)
+        text = "".join(rng.choice("ab *-|") for _ in range(rng.randint(0, 12)))
+        buffer.write(f"\033[{row};{col}H{rng.choice(COLORS)}{text}")
+        roll = rng.random()
+        if roll < 0.1:
+            buffer.write("\033[K")
+        elif roll < 0.15:
+            buffer.write("\033[J")
+        elif roll < 0.2:
+            buffer.write("line\nnext\r\n")
+    if rng.random() < 0.05:
+        buffer.write("\033[2J")
+
+
+def test_diffs_replay_to_the_same_screen():
+    rng = random.Random(4)
+    sent = []
+    buffer = ScreenBuffer(ROWS, COLS, write=sent.append)
+    # A second buffer plays the part of the terminal receiving the output
+    terminal = ScreenBuffer(ROWS, COLS, write=lambda data: None)
+    for _ in range(200):
+        _draw_frame(buffer, rng)
+        buffer.flush()
+        for data in sent:
+            terminal.write(data)
+        sent.clear()
+        assert _screen(terminal) == _screen(buffer)
+        assert (terminal.row, terminal.col, terminal.attr) == \
+            (buffer.row, min(buffer.col, COLS), buffer.attr)
+
+
+def test_unchanged_frame_sends_nothing():
+    buffer = ScreenBuffer(ROWS, COLS, write=lambda data: None)
+    buffer.write("\033[3;4H\033[92mENTERPRISE\033[0m")
+    assert buffer.render()
+    buffer.write("\033[3;4H\033[92mENTERPRISE\033[0m")
+    assert buffer.render() == ""
+
+
+def test_small_change_sends_little():
+    buffer = ScreenBuffer(ROWS, COLS, write=lambda data: None)
+    buffer.write("\033[5;1H" + "=" * COLS)
+    full = buffer.render()
+    buffer.write("\033[5;10H#")
+    assert len(buffer.render()) < len(full) // 2
@@ -0,0 +1,125 @@
+"""SectorGrid tracks occupancy and free sectors, and the game keeps it in step."""
+import random
+
+import pytest
+
+from engine import HeadlessStarTrek
+from sector_grid import EMPTY, KLINGON, STAR, SectorGrid
+from utils import HARD
+
+
+def test_place_remove_move():
+    grid = SectorGrid()
+    grid.place(2, 3, KLINGON, 4)
+    assert (grid.code_at(2, 3), grid.id_at(2, 3)) == (KLINGON, 4)
+    assert not grid.is_free(2, 3) and grid.is_free(3, 2)
+
+    version = grid.version
+    grid.move(2, 3, 8, 8)
+    assert grid.is_free(2, 3)
+    assert (grid.code_at(8, 8), grid.id_at(8, 8)) == (KLINGON, 4)
+    assert grid.version > version
+
+    grid.remove(8, 8)
+    assert grid.code_at(8, 8) == EMPTY and grid.id_at(8, 8) == 0
+
+
+def test_row_codes_and_clear():
+    grid = SectorGrid()
+    grid.place(5, 1, STAR)
+    grid.place(5, 8, KLINGON)
+    assert list(grid.row_codes(5)) == [STAR] + [EMPTY] * 6 + [KLINGON]
+    grid.clear()
+    assert not any(grid.codes)
+    assert grid.in_bounds(8, 8) and not grid.in_bounds(0, 1) and not grid.in_bounds(1, 9)
+
+
+def _check_free_list(grid):
+    """The free list holds exactly the empty sectors, each slot pointing back."""
+    empty = {r * (grid.cols + 1) + c for r in range(1, grid.rows + 1)
+             for c in range(1, grid.cols + 1) if grid.is_free(r, c)}
+    assert sorted(grid._free) == sorted(empty)
+    assert grid.free_count() == len(empty)
+    for n, i in enumerate(grid._free):
+        assert grid._slot[i] == n
+    assert all(grid._slot[i] == -1 for i in range(len(grid.codes))
+               if i not in empty)
+
+
+def test_free_list_follows_random_changes():
+    rng = random.Random(9)
+    grid = SectorGrid()
+    for _ in range(2000):
+        r, c = rng.randint(1, 8), rng.randint(1, 8)
+        roll = rng.random()
+        if roll < 0.4:
+            grid.place(r, c, STAR)
+        elif roll < 0.7:
+            grid.remove(r, c)
+        elif roll < 0.98:
+            if not grid.is_free(r, c):
+                r2, c2 = grid.random_free(rng) if grid.free_count() else (r, c)
+                grid.move(r, c, r2, c2)
+        else:
+            grid.clear()
+        _check_free_list(grid)
+
+
+def test_random_free_draws_every_empty_sector():
+    grid = SectorGrid()
+    for c in range(1, 9):
+        grid.place(1, c, STAR)
+    rng = random.Random(1)
+    seen = {grid.random_free(rng) for _ in range(2000)}
+    assert seen == {(r, c) for r in range(2, 9) for c in range(1, 9)}
+
+    for r in range(2, 9):
+        for c in range(1, 9):
+            grid.place(r, c, STAR)
+    with pytest.raises(IndexError):
+        grid.random_free(rng)
+
+
+def test_free_order_round_trip():
+    grid = SectorGrid()
+    rng = random.Random(3)
+    for _ in range(20):
+        grid.place(*grid.random_free(rng), STAR)
+    order = grid.free_order()
+
+    copy = SectorGrid()
+    for r in range(1, 9):
+        for c in range(1, 9):
+            if not grid.is_free(r, c):
+                copy.place(r, c, STAR)
+    copy.set_free_order(order)
+    _check_free_list(copy)
+    assert [copy.random_free(random.Random(s)) for s in range(10)] == \
+        [grid.random_free(random.Random(s)) for s in range(10)]
+    with pytest.raises(ValueError):
+        copy.set_free_order(order[1:])
+
+
+def test_game_grid_matches_its_object_lists():
+    rng = random.Random(2)
+    for seed in range(20):
+        game = HeadlessStarTrek(HARD, seed=seed)
+        for _ in range(25):
+            if not game.is_running:
+                break
+            command = rng.choice(["NAV", "TOR", "PHA", "SRS"])
+            if command == "NAV":
+                args = [round(rng.uniform(1, 8.9), 2), rng.choice([0.125, 0.25, 0.5, 1])]
+            elif command == "TOR":
+                args = [round(rng.uniform(1, 8.9), 2)]
+            elif command == "PHA":
+                args = [rng.randint(50, 400)]
+            else:
+                args = []
+            game.step(command, args)
+
+            # Updated in place, the grid must equal one rebuilt from scratch
+            _check_free_list(game.sectors)
+            codes, ids = bytes(game.sectors.codes), bytes(game.sectors.ids)
+            game._index_quadrant()
+            assert (codes, ids) == (bytes(game.sectors.codes), bytes(game.sectors.ids))
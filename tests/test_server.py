@@ -0,0 +1,69 @@
+"""Game server sessions stay inside their limits."""
+import asyncio
+
+import pytest
+
+from server import GameSession, SessionClosed, _TELNET_PATTERN
+
+
+class FakeTransport:
+    def get_write_buffer_size(self):
+        return 0
+
+
+class FakeWriter:
+    def __init__(self):
+        self.data = bytearray()
+        self.transport = FakeTransport()
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+
+def _play(input_bytes=b"", eof=True, **options):
+    """Plays a session on the given input; returns (session, reason it closed)."""
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(input_bytes)
+        if eof:
+            reader.feed_eof()
+        session = GameSession(reader, FakeWriter(), animation_speed=0, fast_start=True, **options)
+        with pytest.raises(SessionClosed) as closed:
+            await session.play()
+        return session, str(closed.value)
+    return asyncio.run(run())
+
+
+def test_telnet_subnegotiation_is_stripped():
+    data = b"\xff\xfa\x18\x00xterm\xff\xf0N\xff\xfb\x01AV\xff\xf1\r\n"
+    assert _TELNET_PATTERN.sub(b"", data) == b"NAV\r\n"
+
+
+def test_session_has_no_local_terminal():
+    session, reason = _play()
+    assert session.out is None and session.keyboard is None
+    assert reason == "connection closed"
+
+
+def test_output_limit():
+    _, reason = _play(b"2\r\n", max_output=64)
+    assert reason == "output limit exceeded"
+
+
+def test_memory_limit():
+    _, reason = _play(b"2\r\n", max_memory=1024)
+    assert reason == "memory limit exceeded"
+
+
+def test_every_input_counts_against_memory():
+    session, _ = _play(b"2\r\n" + b"SRS\r\n" * 20)
+    quiet, _ = _play(b"2\r\n")
+    assert session._replay_bytes - quiet._replay_bytes >= 20 * len("SRS\r\n")
+
+
+def test_idle_timeout():
+    _, reason = _play(eof=False, idle_timeout=0.05)
+    assert reason == "idle timeout"
@@ -0,0 +1,104 @@
+"""Snapshots round-trip a game, including a pending prompt."""
+import pytest
+
+from engine import HeadlessStarTrek
+from galaxy_store import MAX_KLINGONS
+from replay import state_digest
+from snapshot import SnapshotSlab, pack, unpack
+
+COMMANDS = [("SRS", []), ("NAV", [3, 0.5]), ("PHA", [200]), ("SHE", [300]),
+            ("TOR", [4.5]), ("NAV", [7.25, 1]), ("LRS", [])]
+
+
+def _play(game, commands):
+    for command, args in commands:
+        if game.is_running:
+            game.step(command, args)
+
+
+def test_round_trip_resumes_the_same_game():
+    game = HeadlessStarTrek(seed=42)
+    _play(game, COMMANDS[:3])
+    copy = unpack(pack(game), HeadlessStarTrek(seed=1))
+    assert copy.state() == game.state()
+
+    _play(game, COMMANDS[3:])
+    _play(copy, COMMANDS[3:])
+    assert state_digest(copy) == state_digest(game)
+
+
+def test_round_trip_classic_galaxy():
+    game = HeadlessStarTrek(seed=9, procedural_galaxy=False)
+    _play(game, COMMANDS[:2])
+    copy = unpack(pack(game), HeadlessStarTrek(seed=1, procedural_galaxy=False))
+    _play(game, COMMANDS[2:])
+    _play(copy, COMMANDS[2:])
+    assert state_digest(copy) == state_digest(game)
+
+
+def test_pending_repair_prompt():
+    game = HeadlessStarTrek(seed=3)
+    game.is_docked = True
+    game.damage["WARP_ENGINES"] = -2.5
+    game.submit("DAM")
+    assert game.input_handler.__name__ == "handle_repair_input"
+
+    copy = unpack(pack(game), HeadlessStarTrek(seed=1))
+    assert copy.input_handler.__name__ == "handle_repair_input"
+    assert copy.input_prompt == game.input_prompt
+    assert copy.command_data == game.command_data
+
+    game.submit("Y")
+    copy.submit("Y")
+    assert copy.damage["WARP_ENGINES"] == 0
+    assert state_digest(copy) == state_digest(game)
+
+
+def test_unknown_command_data_is_refused():
+    game = HeadlessStarTrek(seed=3)
+    game.command_data = {"no_such_key": 1}
+    with pytest.raises(ValueError):
+        pack(game)
+
+
+def test_other_galaxy_sizes_are_refused():
+    with pytest.raises(ValueError):
+        pack(HeadlessStarTrek(seed=3, galaxy_size=(4, 4)))
+    data = pack(HeadlessStarTrek(seed=3))
+    with pytest.raises(ValueError):
+        unpack(data, HeadlessStarTrek(seed=3, galaxy_size=(16, 16)))
+
+
+def _crowded(game):
+    """A quadrant with one Klingon more than a snapshot has room for."""
+    game.quadrant_klingons = [{'s1': 1, 's2': c, 'shields': 100.0}
+                              for c in range(1, MAX_KLINGONS + 2)]
+    return game
+
+
+def test_slab_park_and_resume(tmp_path):
+    slab = SnapshotSlab(str(tmp_path / "slab"), 4)
+    game = HeadlessStarTrek(seed=5)
+    _play(game, COMMANDS[:2])
+    slot = slab.park(game)
+    assert len(slab) == 1
+
+    # A given slot that is taken is not overwritten by accident
+    with pytest.raises(ValueError):
+        slab.park(HeadlessStarTrek(seed=6), slot=slot)
+    copy = slab.resume(slot, HeadlessStarTrek(seed=1), keep=True)
+    assert copy.state() == game.state()
+
+    other = HeadlessStarTrek(seed=6)
+    assert slab.park(other, slot=slot, replace=True) == slot
+    assert slab.resume(slot, HeadlessStarTrek(seed=1)).state() == other.state()
+    assert len(slab) == 0
+    slab.close()
+
+
+def test_slab_keeps_slot_free_when_game_does_not_fit(tmp_path):
+    slab = SnapshotSlab(str(tmp_path / "slab"), 2)
+    with pytest.raises(ValueError):
+        slab.park(_crowded(HeadlessStarTrek(seed=3)))
+    assert len(slab) == 0
+    slab.close()
@@ -0,0 +1,48 @@
+"""wrap_ansi wraps exactly like the old message-box loop, escape codes and all."""
+import random
+
+from utils import Colors, strip_ansi, wrap_ansi
+
+
+def _old_wrap(text, width):
+    """The message box's original wrap, re-measuring a test line per word."""
+    lines = []
+    for line in text.split('\n'):
+        if len(strip_ansi(line)) <= width:
+            lines.append(line)
+            continue
+        current_line = ""
+        for word in line.split(' '):
+            if len(strip_ansi(word)) > width:
+                if current_line: lines.append(current_line)
+                lines.append(word)
+                current_line = ""
+                continue
+            test_line = current_line + " " + word if current_line else word
+            if len(strip_ansi(test_line)) <= width:
+                current_line = test_line
+            else:
+                lines.append(current_line)
+                current_line = word
+        if current_line: lines.append(current_line)
+    return lines
+
+
+def _random_text(rng):
+    pieces = ["PHASER", "LOCK", "ON", "TARGET", "*", "KLINGON-VESSEL-DESTROYED", "",
+              Colors.RED, Colors.RESET, Colors.BOLD + "RED ALERT" + Colors.RESET]
+    return rng.choice([" ", "  ", "\n"]).join(rng.choice(pieces) for _ in range(rng.randint(0, 15)))
+
+
+def test_matches_the_old_wrap():
+    rng = random.Random(7)
+    for _ in range(3000):
+        text = _random_text(rng)
+        width = rng.randint(1, 30)
+        assert list(wrap_ansi(text, width)) == _old_wrap(text, width), (text, width)
+
+
+def test_escape_codes_take_no_width():
+    text = f"{Colors.RED}CONDITION{Colors.RESET} {Colors.GREEN}GREEN{Colors.RESET}"
+    assert wrap_ansi(text, 15) == (text,)
+    assert [strip_ansi(line) for line in wrap_ansi(text, 14)] == ["CONDITION", "GREEN"]
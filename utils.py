@@ -1,17 +1,19 @@
-import os
 import re
 import math
+import functools
+import random
 
-# --- Helper Functions ---
 
-def clear_screen(): #clear sceen almost self documenting
-    """Clears the terminal screen."""
-    os.system('cls' if os.name == 'nt' else 'clear')
+# --- Helper Functions ---
 
 def get_quadrant_name(q1, q2): #holds the names of quadrents and gives a process to retrieve
     """
     Translates GOSUB 9030.
     Gets the galaxy region name for a given quadrant.
+
+    The 16 regions cover an 8x8 block of quadrants. Larger galaxies
+    repeat the names in every 8x8 block, and quadrants outside the first
+    block get the block's row,column appended (e.g. "VEGA II 3,1").
     """
     regions = [
         "ANTARES", "RIGEL", "PROCYON", "VEGA",
@@ -20,13 +22,18 @@ def get_quadrant_name(q1, q2): #holds the names of quadrents and gives a process
         "ALDEBARAN", "REGULUS", "ARCTURUS", "SPICA"
     ]
     romans = ["I", "II", "III", "IV"]
+    block_row, row = divmod(q1 - 1, 8)
+    block_col, col = divmod(q2 - 1, 8)
     
-    if q2 <= 4:
-        name = regions[q1 - 1]
+    if col < 4:
+        name = regions[row]
     else:
-        name = regions[q1 - 1 + 8]
+        name = regions[row + 8]
         
-    return f"{name} {romans[(q2 - 1) % 4]}"
+    name = f"{name} {romans[col % 4]}"
+    if block_row or block_col:
+        name += f" {block_row + 1},{block_col + 1}"
+    return name
 
 def load_ascii_art(filename):#loads art fromo file
     """
@@ -80,36 +87,131 @@ class Colors:
 # --- ANSI pattern to strip codes ---
 _ansi_escape_pattern = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
 
-def get_visible_length(text):
-    """Returns the visible length of a string, stripping ANSI codes."""
-    return len(_ansi_escape_pattern.sub('', text))
+def strip_ansi(text):
+    """Returns a string with all ANSI codes removed."""
+    return _ansi_escape_pattern.sub('', text)
+
+# --- Art tag translation ---
+# Tags like [RED] map to the Colors attribute of the same name. The table is
+# built from Colors, so a new color there is a new tag automatically.
+_art_tags = {name: code for name, code in vars(Colors).items()
+             if name.isupper() and isinstance(code, str)}
+_art_tag_pattern = None
+_art_strip_pattern = None
+
+def _compile_art_tags():
+    """(Re)builds the single-pass patterns from the tag table."""
+    global _art_tag_pattern, _art_strip_pattern
+    # Longest names first so e.g. [BGBLACK] never half-matches as [BLACK]
+    names = '|'.join(re.escape(name) for name in sorted(_art_tags, key=len, reverse=True))
+    _art_tag_pattern = re.compile(r'\[(' + names + r')\]')
+    _art_strip_pattern = re.compile(r'\[(?:' + names + r')\]|' + _ansi_escape_pattern.pattern)
+    _translate_cached.cache_clear()
+    _strip_cached.cache_clear()
+
+@functools.lru_cache(maxsize=4096)
+def _translate_cached(line):
+    return _art_tag_pattern.sub(lambda m: _art_tags[m.group(1)], line)
+
+@functools.lru_cache(maxsize=4096)
+def _strip_cached(line):
+    plain = _art_strip_pattern.sub('', line)
+    return plain, len(plain)
+
+def register_art_tag(name, code):
+    """
+    Adds (or replaces) a user-defined tag, e.g.
+    register_art_tag("ORANGE", "\\033[38;5;208m") makes [ORANGE] usable in art.
+    """
+    _art_tags[name.upper()] = code
+    _compile_art_tags()
 
 def translate_art_tags(line):
     """
     Translates human-readable tags like [RED] in a string
-    to their proper ANSI color codes.
-    """
-    return (line
-            .replace("[RESET]", Colors.RESET)
-            .replace("[BOLD]", Colors.BOLD)
-            .replace("[BLINK]", Colors.BLINK)
-            .replace("[RED]", Colors.RED)
-            .replace("[GREEN]", Colors.GREEN)
-            .replace("[YELLOW]", Colors.YELLOW)
-            .replace("[BLUE]", Colors.BLUE)
-            .replace("[MAGENTA]", Colors.MAGENTA)
-            .replace("[CYAN]", Colors.CYAN)
-            .replace("[WHITE]", Colors.WHITE)
-            .replace("[BLACK]", Colors.BLACK)
-            .replace("[BGRED]", Colors.BGRED)
-            .replace("[BGGREEN]", Colors.BGGREEN)
-            .replace("[BGYELLOW]", Colors.BGYELLOW)
-            .replace("[BGBLUE]", Colors.BGBLUE)
-            .replace("[BGMAGENTA]", Colors.BGMAGENTA)
-            .replace("[BGCYAN]", Colors.BGCYAN)
-            .replace("[BGWHITE]", Colors.BGWHITE)
-            .replace("[BGBLACK]", Colors.BGBLACK)
-            )
+    to their proper ANSI color codes, in a single pass.
+    Results are memoized per line.
+    """
+    return _translate_cached(line)
+
+def strip_art_tags(line):
+    """
+    Removes tags like [RED] and any ANSI codes in a single pass.
+    Returns (plain_text, visible_length).
+    """
+    return _strip_cached(line)
+
+_compile_art_tags()
+
+# --- ANSI-aware word wrap ---
+# One token per escape code, space, or run of other characters
+_wrap_token_pattern = re.compile(_ansi_escape_pattern.pattern + r'| |[^\x1b ]+')
+
+def _split_words(line):
+    """
+    Splits a line on single spaces in one pass.
+    Returns (words, widths, line_width): the words (escape codes kept
+    inside them) and their visible widths.
+    """
+    words = []
+    widths = []
+    parts = []
+    width = 0
+    for match in _wrap_token_pattern.finditer(line):
+        token = match.group(0)
+        if token == ' ':
+            words.append(''.join(parts))
+            widths.append(width)
+            parts = []
+            width = 0
+        else:
+            parts.append(token)
+            if token[0] != '\x1b':
+                width += len(token)
+    words.append(''.join(parts))
+    widths.append(width)
+    return words, widths, sum(widths) + len(widths) - 1
+
+@functools.lru_cache(maxsize=1024)
+def wrap_ansi(text, width):
+    """
+    Word-wraps text to a visible width, ignoring ANSI codes when measuring.
+    Manual newlines are kept, lines that fit are left untouched, and a
+    word longer than the width gets a line of its own.
+
+    Returns:
+        tuple: The wrapped lines (cached per (text, width)).
+    """
+    lines = []
+    for line in text.split('\n'):
+        words, widths, line_width = _split_words(line)
+        if line_width <= width:
+            lines.append(line)
+            continue
+
+        # Words on the line being built; empty only while the line is ''
+        current = []
+        current_width = 0
+        for word, word_width in zip(words, widths):
+            if word_width > width:
+                if current: lines.append(' '.join(current))
+                lines.append(word)
+                current = []
+                current_width = 0
+                continue
+
+            if current:
+                test_width = current_width + 1 + word_width
+                if test_width <= width:
+                    current.append(word)
+                    current_width = test_width
+                    continue
+                lines.append(' '.join(current))
+            current = [word] if word else []
+            current_width = word_width
+
+        if current: lines.append(' '.join(current))
+    return tuple(lines)
 
 def get_distance(r1, c1, r2, c2):
     """Calculates the Euclidean distance between two sector coordinates."""
@@ -202,4 +304,28 @@ HARD = Difficulty(
 )
 
 # List of difficulties for the menu
-DIFFICULTIES = [EASY, STANDARD, HARD]
\ No newline at end of file
+DIFFICULTIES = [EASY, STANDARD, HARD]
+
+
+class GameRandom:
+    """
+    A game's own random numbers, split into independent streams so that,
+    e.g., an extra damage roll does not change where Klingons appear.
+
+        setup   galaxy contents, start position, sector placement, Klingon shields
+        combat  phaser hit strengths (both sides)
+        damage  device damage and repairs
+
+    Every stream is derived from the one seed, so the seed alone
+    reproduces the game.
+    """
+    STREAMS = ("setup", "combat", "damage")
+
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.seed = seed
+        for name in self.STREAMS:
+            # String seeds are hashed with SHA-512, so the streams are
+            # unrelated to each other and stable across runs
+            setattr(self, name, random.Random(f"{seed}:{name}"))